@@ -1,17 +1,29 @@
 from cron.data_upload.f1.f1_data_upload_utils import fetch_race_results
 from cron.data_upload.f1.f1_utils import qualifying_1, qualifying_2, sprint_qualifying_1, sprint_qualifying_2, \
-    race_type_to_url_map, main_race, fastest_laps
+    race_type_to_url_map, main_race, fastest_laps, SEASONGRID
 from cron.notifiaction.notification_utils import send_race_complete_notification
 from cron.stats_calc.f1.f1_stats_update import process_update_f1_stats
-from cron.strapi_api.apis import get_latest_past_race, get_race_results_for_race_event, get_season_grid_map, \
-    create_race_result, update_config_for_race_result, get_fastest_laps_for_gp, create_fastest_lap, clear_server_cache
-import json
+from cron.strapi_api.apis import get_latest_past_race, get_race_results_for_race_event, read_season_dataset, \
+    create_race_results, update_config_for_race_result, get_fastest_laps_for_gp, create_fastest_laps, clear_server_cache
+from cron.strapi_api.graphql_batch import require_all_rows
+from cron.strapi_api.season_snapshots import SEASON_GRID
 import time
 from loguru import logger
 
 from cron.utils import f1_graphql_token
 
 
+def fetch_rows_with_season_grid(f1_url, race_id, race_type, year, q2_id, q1_id):
+    """Race result rows mapped with the season grid snapshot, re-read from strapi when a driver is not in it."""
+    season_grid_map = read_season_dataset(is_f1_feed=True, season=year, dataset=SEASON_GRID)
+    rows = fetch_race_results(f1_url, season_grid_map, race_id, race_type, year, q2_id, q1_id)
+    if any(isinstance(row, dict) and row.get(SEASONGRID) is None for row in rows):
+        logger.info("driver missing from the season grid snapshot, fetching the season grid again")
+        season_grid_map = read_season_dataset(is_f1_feed=True, season=year, dataset=SEASON_GRID, refresh=True)
+        rows = fetch_race_results(f1_url, season_grid_map, race_id, race_type, year, q2_id, q1_id)
+    return rows
+
+
 def process():
     logger.error("############################################")
     logger.error("fetching the F1 schedule")
@@ -50,67 +62,79 @@ def process():
     # fire cache-clear + notification exactly once at the end.
     did_upload = False
     original_race_type = race_type  # preserve before any reassignment below
-
-    # ── Block 1: main race results / regular race results ──────────────────
-    if race_result_count == 0:
-        if race_type not in (qualifying_1, qualifying_2, sprint_qualifying_1, sprint_qualifying_2):
-            logger.info("proceeding ahead to fetch the data")
-            race_identifier = race_type_to_url_map[race_type]
-            logger.info(f"race_identifier: {race_identifier}")
-            f1_url = site_event_id + race_identifier
-            logger.info(f"f1_url: {f1_url}")
-            season_grid_map = get_season_grid_map(is_f1_feed=True, season=year)
-            rows = fetch_race_results(f1_url, season_grid_map, race_id, race_type, year, q2_id, q1_id)
-            if len(rows) < 10:
-                logger.warning(f"Insufficient race results fetched for URL: {f1_url}. Expected at least 10, got {len(rows)}.")
-                return
-            for row in rows:
-                create_race_result(is_f1_feed=True, json_str=json.dumps(row))
-
-            update_config_for_race_result(is_f1_feed=True, gp_id=gp_id)
-            logger.info("######################")
-            logger.info(f"updating stats for year: {year}")
-            process_update_f1_stats(season_year=year)
-            did_upload = True
-
-    else:
-        logger.info("race results already present in strapi. no action needed.")
-
-    # ── Block 2: fastest laps (main race only) ─────────────────────────────
-    if original_race_type == main_race:
-        logger.info("checking for fastest lap data to be uploaded...")
-        fastest_laps_data = get_fastest_laps_for_gp(is_f1_feed=True, gp_id=gp_id)
-        fastest_laps_count = len(fastest_laps_data['data']['fastestLaps']['data'])
-
-        if fastest_laps_count == 0:
-            logger.info("no fastest lap data found for this gp. fetching and uploading now...")
-            fl_race_identifier = race_type_to_url_map[fastest_laps]  # no reassignment of race_type
-            logger.info(f"race_identifier: {fl_race_identifier}")
-            f1_url = site_event_id + fl_race_identifier
-            logger.info(f"f1_url: {f1_url}")
-            season_grid_map = get_season_grid_map(is_f1_feed=True, season=year)
-            rows = fetch_race_results(f1_url, season_grid_map, race_id, fastest_laps, year, q2_id, q1_id)
-            if len(rows) < 10:
-                logger.warning(f"Insufficient race results fetched for URL: {f1_url}. Expected at least 10, got {len(rows)}.")
-                return
-            for row in rows:
-                create_fastest_lap(is_f1_feed=True, json_str=json.dumps(row))
-
-            update_config_for_race_result(is_f1_feed=True, gp_id=gp_id)
-            logger.info("######################")
-            logger.info(f"updating stats for year: {year} as fastest laps data uploaded")
-            process_update_f1_stats(season_year=year)
-            did_upload = True
-
-    # ── Final step: cache clear + notification (once, after all uploads) ───
-    if did_upload:
-        logger.info("All uploads complete. Waiting 30s before clearing server cache...")
-        time.sleep(30)
-        clear_server_cache()
-        logger.info("Server cache cleared. Waiting 10s before sending notification...")
-        time.sleep(10)
-        logger.info(f"Sending race complete notification for year: {year}")
-        send_race_complete_notification(is_f1=True, race_type=original_race_type, grand_prix=grand_prix)
+    # races whose results were uploaded this run, the stats are updated once for all of them at the end
+    changed_races = {}
+
+    # block 1 marks the gp uploaded: the stats and notification run even when block 2 fails
+    try:
+        # ── Block 1: main race results / regular race results ──────────────────
+        if race_result_count == 0:
+            if race_type not in (qualifying_1, qualifying_2, sprint_qualifying_1, sprint_qualifying_2):
+                logger.info("proceeding ahead to fetch the data")
+                race_identifier = race_type_to_url_map[race_type]
+                logger.info(f"race_identifier: {race_identifier}")
+                f1_url = site_event_id + race_identifier
+                logger.info(f"f1_url: {f1_url}")
+                rows = fetch_rows_with_season_grid(f1_url, race_id, race_type, year, q2_id, q1_id)
+                if len(rows) < 10:
+                    logger.warning(f"Insufficient race results fetched for URL: {f1_url}. Expected at least 10, got {len(rows)}.")
+                    return
+                ids = create_race_results(is_f1_feed=True, rows=rows)
+                # fail the run before the gp is marked uploaded when rows are missing
+                require_all_rows(ids, f"race results of race {race_id}")
+
+                update_config_for_race_result(is_f1_feed=True, gp_id=gp_id)
+                changed_races[race_id] = race_type
+                did_upload = True
+
+        else:
+            logger.info("race results already present in strapi. no action needed.")
+
+        # ── Block 2: fastest laps (main race only) ─────────────────────────────
+        if original_race_type == main_race:
+            logger.info("checking for fastest lap data to be uploaded...")
+            fastest_laps_data = get_fastest_laps_for_gp(is_f1_feed=True, gp_id=gp_id)
+            fastest_laps_count = len(fastest_laps_data['data']['fastestLaps']['data'])
+
+            if fastest_laps_count == 0:
+                logger.info("no fastest lap data found for this gp. fetching and uploading now...")
+                fl_race_identifier = race_type_to_url_map[fastest_laps]  # no reassignment of race_type
+                logger.info(f"race_identifier: {fl_race_identifier}")
+                f1_url = site_event_id + fl_race_identifier
+                logger.info(f"f1_url: {f1_url}")
+                rows = fetch_rows_with_season_grid(f1_url, race_id, fastest_laps, year, q2_id, q1_id)
+                if len(rows) < 10:
+                    logger.warning(f"Insufficient race results fetched for URL: {f1_url}. Expected at least 10, got {len(rows)}.")
+                    return
+                ids = create_fastest_laps(is_f1_feed=True, rows=rows)
+                require_all_rows(ids, f"fastest laps of race {race_id}")
+
+                update_config_for_race_result(is_f1_feed=True, gp_id=gp_id)
+                # the race rows are re-read in case strapi flagged the fastest lap on them
+                changed_races[race_id] = original_race_type
+                did_upload = True
+    finally:
+        # ── Stats: one incremental update for everything uploaded above ───────
+        update_stats_for_uploads(year, changed_races)
+
+        # ── Final step: cache clear + notification (once, after all uploads) ───
+        if did_upload:
+            logger.info("All uploads complete. Waiting 30s before clearing server cache...")
+            time.sleep(30)
+            clear_server_cache()
+            logger.info("Server cache cleared. Waiting 10s before sending notification...")
+            time.sleep(10)
+            logger.info(f"Sending race complete notification for year: {year}")
+            send_race_complete_notification(is_f1=True, race_type=original_race_type, grand_prix=grand_prix)
+
+
+def update_stats_for_uploads(year, changed_races: dict):
+    """One incremental stats update for every race uploaded in this run ({race id: race type})."""
+    if not changed_races:
+        return
+    logger.info("######################")
+    logger.info(f"updating stats for year: {year} after races: {changed_races}")
+    process_update_f1_stats(season_year=year, changed_races=changed_races)
 
 
 if __name__ == "__main__":
@@ -1,9 +1,10 @@
 from cron.moto_gp.moto_gp_api import fetch_season, fetch_event, fetch_session, fetch_race_results
 from cron.notifiaction.notification_utils import send_race_complete_notification
 from cron.stats_calc.moto_gp.moto_gp_stats_update import process_update_moto_gp_stats
-from cron.strapi_api.apis import get_latest_past_race, get_race_results_for_race_event, get_season_grid_map, \
-    create_race_result, update_race_result, update_config_for_race_result
-import json
+from cron.strapi_api.apis import get_latest_past_race, get_race_results_for_race_event, read_season_dataset, \
+    create_race_results, update_race_results, update_config_for_race_result
+from cron.strapi_api.graphql_batch import require_all_rows
+from cron.strapi_api.season_snapshots import SEASON_GRID
 from loguru import logger
 
 is_update_enabled = False
@@ -16,35 +17,58 @@ def process():
     races = json_data["data"]["races"]["data"]
     logger.info(f"Total races to process: {len(races)}")
 
-    for race_entry in races:
-        race_id = race_entry["id"]
-        race_type = race_entry["attributes"]["type"]
-        grand_prix = race_entry["attributes"]["grandPrix"]["data"]
-        logger.info(f"race_id: {race_id} --- race_type: {race_type}")
-        strapi_races = get_race_results_for_race_event(is_f1_feed=False, race_id=race_id)
-        race_result_count = len(strapi_races['data']['raceResults']['data'])
-        logger.info(f"race_result_count from strapi: {race_result_count}")
-
-        # Build a minimal json_data-like structure scoped to this race entry
-        race_json_data = {"data": {"races": {"data": [race_entry]}}}
+    # uploaded races per season ({year: {race id: race type}}), the stats are updated once per season at the end
+    changed_races = {}
+    notifications = []
+
+    # a later race failing must not cost the races already uploaded their stats and notification:
+    # the gp is marked uploaded, the next run would skip them
+    try:
+        for race_entry in races:
+            race_id = race_entry["id"]
+            race_type = race_entry["attributes"]["type"]
+            grand_prix = race_entry["attributes"]["grandPrix"]["data"]
+            logger.info(f"race_id: {race_id} --- race_type: {race_type}")
+            strapi_races = get_race_results_for_race_event(is_f1_feed=False, race_id=race_id)
+            race_result_count = len(strapi_races['data']['raceResults']['data'])
+            logger.info(f"race_result_count from strapi: {race_result_count}")
+
+            # Build a minimal json_data-like structure scoped to this race entry
+            race_json_data = {"data": {"races": {"data": [race_entry]}}}
+
+            uploaded = False
+            if not is_update_enabled:
+                if race_result_count == 0:
+                    moto_gp_race_results, season_grid_map, year = fetch_and_upload_race_data(race_json_data)
+                    uploaded = upload_moto_gp_race_results(moto_gp_race_results, season_grid_map, race_id, race_type, grand_prix, year)
+                else:
+                    logger.info("Race results already exist in Strapi. No need to fetch from MotoGP API.")
+            else:
+                logger.info("UPDATE is enabled")
+                moto_gp_race_results, season_grid_map, year = fetch_and_upload_race_data(race_json_data)
+                if race_result_count == 0:
+                    uploaded = upload_moto_gp_race_results(moto_gp_race_results, season_grid_map, race_id, race_type, grand_prix, year)
+                else:
+                    # Convert strapi races to driver number -> race result id mapping
+                    driver_number_to_id_map = convert_strapi_races_to_driver_map(strapi_races)
+                    logger.info(f"Driver number to ID map: {driver_number_to_id_map}")
+                    logger.info("Race results already exist in Strapi. No need to fetch from MotoGP API.")
+                    uploaded = upload_moto_gp_race_results(moto_gp_race_results, season_grid_map, race_id, race_type, grand_prix, year, driver_number_to_id_map)
+
+            if uploaded:
+                changed_races.setdefault(year, {})[race_id] = race_type
+                notifications.append((race_type, grand_prix))
+    finally:
+        for year, season_changed_races in changed_races.items():
+            logger.info("######################")
+            logger.info(f"update stats for {year} after races: {season_changed_races}")
+            process_update_moto_gp_stats(season_year=year, changed_races=season_changed_races)
+            logger.info("######################")
 
         if not is_update_enabled:
-            if race_result_count == 0:
-                moto_gp_race_results, season_grid_map, year = fetch_and_upload_race_data(race_json_data)
-                upload_moto_gp_race_results(moto_gp_race_results, season_grid_map, race_id, race_type, grand_prix, year)
-            else:
-                logger.info("Race results already exist in Strapi. No need to fetch from MotoGP API.")
-        else:
-            logger.info("UPDATE is enabled")
-            moto_gp_race_results, season_grid_map, year = fetch_and_upload_race_data(race_json_data)
-            if race_result_count == 0:
-                upload_moto_gp_race_results(moto_gp_race_results, season_grid_map, race_id, race_type, grand_prix, year)
-            else:
-                # Convert strapi races to driver number -> race result id mapping
-                driver_number_to_id_map = convert_strapi_races_to_driver_map(strapi_races)
-                logger.info(f"Driver number to ID map: {driver_number_to_id_map}")
-                logger.info("Race results already exist in Strapi. No need to fetch from MotoGP API.")
-                upload_moto_gp_race_results(moto_gp_race_results, season_grid_map, race_id, race_type, grand_prix, year, driver_number_to_id_map)
+            for race_type, grand_prix in notifications:
+                logger.info(f"sending race complete notification")
+                send_race_complete_notification(is_f1=False, race_type=race_type, grand_prix=grand_prix)
 
 
 def fetch_and_upload_race_data(json_data):
@@ -60,7 +84,11 @@ def fetch_and_upload_race_data(json_data):
     session_uuid = fetch_session(session_type=session_type, event_uuid=event_uuid)
     logger.info(f"session_uuid: {session_uuid}")
     moto_gp_race_results = fetch_race_results(session_uuid)
-    season_grid_map = get_season_grid_map(is_f1_feed=False, season=year)
+    season_grid_map = read_season_dataset(is_f1_feed=False, season=year, dataset=SEASON_GRID)
+    riders = [item["rider"]["number"] for item in moto_gp_race_results.get("classification") or []]
+    if any(number not in season_grid_map for number in riders):
+        logger.info("rider missing from the season grid snapshot, fetching the season grid again")
+        season_grid_map = read_season_dataset(is_f1_feed=False, season=year, dataset=SEASON_GRID, refresh=True)
     return moto_gp_race_results, season_grid_map, year
 
 def convert_strapi_races_to_driver_map(strapi_races):
@@ -86,7 +114,8 @@ def convert_strapi_races_to_driver_map(strapi_races):
 
     return driver_map
 
-def upload_moto_gp_race_results(moto_gp_race_results, season_grid_map, race_id, race_type, grand_prix, year, driver_number_to_id_map=None):
+def upload_moto_gp_race_results(moto_gp_race_results, season_grid_map, race_id, race_type, grand_prix, year, driver_number_to_id_map=None) -> bool:
+    """Create / update the strapi race results of one session, False when the MotoGP API had no classification."""
     official = moto_gp_race_results.get("official", False)
     # if not official:
     #     logger.error("official results not found in MotoGP API response. skipping upload.")
@@ -101,7 +130,7 @@ def upload_moto_gp_race_results(moto_gp_race_results, season_grid_map, race_id,
     logger.info(f"gp_id: {gp_id} ")
     if classification is None or len(classification) == 0:
         logger.warning("No classification data found in MotoGP API response.")
-        return
+        return False
 
     for record in records:
         if record.get("type") == "fastestLap":
@@ -110,6 +139,8 @@ def upload_moto_gp_race_results(moto_gp_race_results, season_grid_map, race_id,
             logger.debug(f"fastest_lap_rider_id: {fastest_lap_rider_id}")
             break
 
+    rows_to_create = []
+    rows_to_update = []
     for index, item in enumerate(classification):
         pos = item.get("position")
         pos = pos if pos is not None else (index + 1)
@@ -141,18 +172,21 @@ def upload_moto_gp_race_results(moto_gp_race_results, season_grid_map, race_id,
         if driver_number_to_id_map:
             row_id = driver_number_to_id_map[item["rider"]["number"]]
             logger.debug(f" row id: {row_id} for {item['rider']['number']}")
-            update_race_result(is_f1_feed=False, json_str=json.dumps(race_result_json), row_id=row_id)
+            rows_to_update.append((race_result_json, row_id))
         else:
-            create_race_result(is_f1_feed=False, json_str=json.dumps(race_result_json))
+            rows_to_create.append(race_result_json)
+
+    # one aliased mutation per batch instead of one request per rider
+    if rows_to_update:
+        ids = update_race_results(is_f1_feed=False, rows_with_ids=rows_to_update)
+        require_all_rows(ids, f"race result updates of race {race_id}")
+    if rows_to_create:
+        ids = create_race_results(is_f1_feed=False, rows=rows_to_create)
+        # fail the run before the gp is marked uploaded when rows are missing
+        require_all_rows(ids, f"race results of race {race_id}")
 
     update_config_for_race_result(is_f1_feed=False, gp_id=gp_id)
-    logger.info("######################")
-    logger.info(f"update stats")
-    process_update_moto_gp_stats(season_year=year)
-    logger.info("######################")
-    if not is_update_enabled:
-        logger.info(f"sending race complete notification")
-        send_race_complete_notification(is_f1=False, race_type=race_type, grand_prix=grand_prix)
+    return True
 
 
 if __name__ == "__main__":
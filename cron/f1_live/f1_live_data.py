@@ -1,6 +1,7 @@
 import json
 import os
 import re
+import time
 from loguru import logger
 from playwright.sync_api import sync_playwright
 from bs4 import BeautifulSoup, Tag
@@ -81,29 +82,163 @@ def _parse_table(soup: BeautifulSoup) -> list[dict]:
     return records
 
 
-def scrape_f1_live_table() -> str:
+# ── Persistent browser session ─────────────────────────────────────────────────
+# Launching Chromium and loading the page takes several seconds, longer than the publish interval. The scraper
+# keeps one browser and page open and every scrape() only reads the table the page already rendered (the site
+# updates it in place). The page is reopened when it crashed, was closed, navigated away or stopped showing the
+# table, the browser is relaunched when it died.
+TABLE_SELECTOR = f'table.{TABLE_CLASS.replace(" ", ".")}'
+USER_AGENT = (
+    "Mozilla/5.0 (X11; Linux x86_64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/125.0.0.0 Safari/537.36"
+)
+BROWSER_ARGS = ["--no-sandbox", "--disable-setuid-sandbox", "--disable-dev-shm-usage"]
+TABLE_TIMEOUT_MS = 45_000
+# consecutive reads without the table before the page is reloaded
+MAX_EMPTY_READS = 10
+
+
+# ── DOM mutation extraction (observe mode) ─────────────────────────────────────
+# Instead of reading the table every cycle, an in-page script watches the DOM with a MutationObserver, extracts
+# the rows like _parse_table does (same cells, same text / tyre rules) and sends only the rows that changed to
+# Python through a Playwright binding: {"reset": bool, "count": number of rows, "changes": [[index, values]]}.
+# Mutation bursts are coalesced for OBSERVER_DEBOUNCE_MS. The binding callbacks run while the sync API waits on
+# the page (wait_for_update), LiveTimingState keeps the current rows.
+OBSERVER_BINDING = "psLiveTimingRows"
+OBSERVER_DEBOUNCE_MS = 50
+OBSERVER_POLL_MS = 25
+OBSERVER_JS = """
+([selector, binding, debounceMs]) => {
+    if (window.__psLiveTimingObserver) window.__psLiveTimingObserver.disconnect();
+    // BeautifulSoup get_text(strip=True): every text node stripped, joined without separator
+    const text = (el) => {
+        if (!el) return "";
+        const parts = [];
+        const walker = document.createTreeWalker(el, NodeFilter.SHOW_TEXT);
+        while (walker.nextNode()) {
+            const t = walker.currentNode.nodeValue.trim();
+            if (t) parts.push(t);
+        }
+        return parts.join("");
+    };
+    const span = (td, cls) => text(td.querySelector(`span[class*="${cls}"]`));
+    const tyre = (td) => {
+        const img = td.querySelector("img");
+        const match = img && (img.getAttribute("src") || "").match(/\/([a-z]+)\.[a-f0-9]+\.png/);
+        return match ? match[1].charAt(0).toUpperCase() + match[1].slice(1) : "";
+    };
+    const readRows = () => {
+        const tbody = document.querySelector(selector)?.querySelector("tbody");
+        if (!tbody) return [];
+        const rows = [];
+        for (const tr of tbody.querySelectorAll("tr")) {
+            const tds = tr.querySelectorAll("td, th");
+            if (tds.length < 5) continue;
+            rows.push([
+                text(tds[0]), span(tds[1], "font-normal"), span(tds[1], "uppercase"), span(tds[1], "text-grey-60"),
+                span(tds[1], "tablet:hidden"), text(tds[2]), tyre(tds[3]), text(tds[4]),
+            ]);
+        }
+        return rows;
+    };
+    let last = [];
+    let reset = true;
+    let pending = null;
+    const flush = () => {
+        pending = null;
+        const rows = readRows();
+        const changes = [];
+        rows.forEach((row, i) => {
+            if (reset || JSON.stringify(row) !== JSON.stringify(last[i])) changes.push([i, row]);
+        });
+        if (reset || changes.length || rows.length !== last.length) {
+            window[binding]({reset: reset, count: rows.length, changes: changes});
+        }
+        last = rows;
+        reset = false;
+    };
+    const observer = new MutationObserver(() => {
+        if (pending === null) pending = setTimeout(flush, debounceMs);
+    });
+    observer.observe(document.body, {subtree: true, childList: true, characterData: true, attributes: true,
+                                     attributeFilter: ["src", "class"]});
+    window.__psLiveTimingObserver = observer;
+    flush();
+    return last.length;
+}
+"""
+
+
+class LiveTimingState:
+    """The table rows as last reported by the in-page observer."""
+
+    def __init__(self):
+        self.rows: list[dict | None] = []
+        self.version = 0  # bumped on every change
+
+    def apply(self, change: dict) -> bool:
+        count = change.get("count", 0)
+        rows = [] if change.get("reset") else self.rows[:count]
+        rows += [None] * (count - len(rows))
+        for index, values in change.get("changes") or []:
+            rows[index] = dict(zip(HEADERS, values))
+        changed = bool(change.get("reset") or change.get("changes") or count != len(self.rows))
+        self.rows = rows
+        if changed:
+            self.version += 1
+        return changed
+
+    def records(self) -> list[dict]:
+        return [row for row in self.rows if row is not None]
+
+
+class F1LiveScraper:
     """
-    Scrape the live timing table from the F1 website.
-    Returns a JSON string — an array of objects, each mapping header names to values.
+    Long-lived headless browser on the live timing page; scrape() reads the rendered table.
+    With ``observe`` the page reports row changes itself, see wait_for_update / records.
     """
-    logger.info(f"Launching headless browser to scrape: {URL}")
-
-    with sync_playwright() as p:
-        browser = p.chromium.launch(
-            headless=True,
-            args=["--no-sandbox", "--disable-setuid-sandbox", "--disable-dev-shm-usage"],
-        )
-        page = browser.new_page(
-            user_agent=(
-                "Mozilla/5.0 (X11; Linux x86_64) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/125.0.0.0 Safari/537.36"
-            ),
-            viewport={"width": 1920, "height": 1080},
-        )
+
+    def __init__(self, url: str = URL, table_timeout_ms: int = TABLE_TIMEOUT_MS, observe: bool = False):
+        self.url = url
+        self.table_timeout_ms = table_timeout_ms
+        self.observe = observe
+        self.state = LiveTimingState()
+        self._playwright = None
+        self._browser = None
+        self._page = None
+        self._page_broken = False
+        self._needs_observer = False
+        self._empty_reads = 0
+        self.page_loads = 0
+
+    # ── lifecycle ──────────────────────────────────────────────────────────────
+    def start(self) -> None:
+        if self._playwright is None:
+            self._playwright = sync_playwright().start()
+        if self._browser is None or not self._browser.is_connected():
+            logger.info(f"Launching headless browser for: {self.url}")
+            self._browser = self._playwright.chromium.launch(headless=True, args=BROWSER_ARGS)
+            self._page = None
+        if self._page is None:
+            self._open_page()
+
+    def _open_page(self) -> None:
+        page = self._browser.new_page(user_agent=USER_AGENT, viewport={"width": 1920, "height": 1080})
+        self._page = page
+        self._page_broken = False
+        self._empty_reads = 0
+        # the events of a replaced page can still arrive after _recover opened the new one: ignore them
+        page.on("crash", lambda p: self._page is p and self._mark_broken("page crashed"))
+        page.on("close", lambda p: self._page is p and self._mark_broken("page closed"))
+        if self.observe:
+            page.expose_binding(OBSERVER_BINDING, self._on_rows)
+            # a reload of the site drops the script, it is injected again by the next wait_for_update
+            page.on("domcontentloaded", lambda p: self._page is p and self._request_observer())
 
         logger.info("Navigating to page...")
-        page.goto(URL, wait_until="domcontentloaded", timeout=60_000)
+        page.goto(self.url, wait_until="domcontentloaded", timeout=60_000)
+        self.page_loads += 1
 
         # Dismiss cookie/consent banners if present
         for selector in ["button:has-text('Accept')", "button:has-text('agree')", "[id*='accept']"]:
@@ -114,25 +249,143 @@ def scrape_f1_live_table() -> str:
             except Exception:
                 pass
 
-        # Wait for dynamic content to render
+        # Wait for dynamic content to render (later reads only look at what is there)
         try:
-            page.wait_for_selector(f'table.{TABLE_CLASS.replace(" ", ".")}', timeout=45_000)
+            page.wait_for_selector(TABLE_SELECTOR, timeout=self.table_timeout_ms)
             logger.info("Table found in DOM.")
         except Exception:
             logger.warning("Table selector timed out – waiting extra time for JS render...")
             page.wait_for_timeout(10_000)
 
-        html = page.content()
-        browser.close()
+        if self.observe:
+            self._install_observer()
+
+    def _mark_broken(self, reason: str) -> None:
+        if not self._page_broken:
+            logger.warning(f"Live timing page unusable: {reason}")
+        self._page_broken = True
 
-    # Save raw HTML snapshot
-    # html_path = os.path.join(SCRIPT_DIR, "f1_live_page_snapshot.html")
-    # with open(html_path, "w", encoding="utf-8") as f:
-    #     f.write(html)
-    # logger.info(f"Raw HTML snapshot saved to {html_path}")
+    def _healthy(self) -> bool:
+        if self._browser is None or not self._browser.is_connected():
+            return False
+        if self._page is None or self._page_broken or self._page.is_closed():
+            return False
+        if not self._page.url.startswith(self.url):
+            self._mark_broken(f"navigated away to {self._page.url}")
+            return False
+        return True
+
+    def _recover(self) -> None:
+        """Drop the page (and the browser when it died) and open them again."""
+        page, self._page = self._page, None
+        if page is not None and not page.is_closed():
+            try:
+                page.close()
+            except Exception as e:
+                logger.debug(f"closing broken page failed: {e}")
+        if self._browser is not None and not self._browser.is_connected():
+            self._browser = None
+        self.start()
+
+    def close(self) -> None:
+        try:
+            if self._browser is not None:
+                self._browser.close()
+            if self._playwright is not None:
+                self._playwright.stop()
+        except Exception as e:
+            logger.debug(f"browser shutdown: {e}")
+        self._page = self._browser = self._playwright = None
 
-    soup = BeautifulSoup(html, "html.parser")
-    return json.dumps(_parse_table(soup), indent=2, ensure_ascii=False)
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ── observe mode ───────────────────────────────────────────────────────────
+    def _request_observer(self) -> None:
+        self._needs_observer = True
+
+    def _on_rows(self, source, change: dict) -> None:
+        if self.state.apply(change):
+            logger.debug(f"live timing: {len(change.get('changes') or [])} row(s) changed (reset: {change.get('reset')})")
+
+    def _install_observer(self) -> None:
+        self._needs_observer = False
+        try:
+            rows = self._page.evaluate(OBSERVER_JS, [TABLE_SELECTOR, OBSERVER_BINDING, OBSERVER_DEBOUNCE_MS])
+            logger.info(f"Live timing observer installed ({rows} rows)")
+        except Exception as e:
+            logger.warning(f"Installing the live timing observer failed: {e}")
+            self._needs_observer = True
+
+    def wait_for_update(self, since_version: int, timeout: float) -> bool:
+        """
+        Wait up to ``timeout`` seconds for the rows to change after ``since_version`` (state.version), pumping the
+        page events meanwhile. Recovers the page like scrape() does. True when the rows changed.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            if not self._healthy():
+                self._recover()
+            elif self._needs_observer:
+                self._install_observer()
+            if self.state.version != since_version:
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            try:
+                self._page.wait_for_timeout(min(OBSERVER_POLL_MS, remaining * 1000))
+            except Exception as e:
+                self._mark_broken(f"wait failed: {e}")
+
+    def records(self) -> list[dict]:
+        """The rows last reported by the observer (observe mode)."""
+        return self.state.records()
+
+    # ── reads ──────────────────────────────────────────────────────────────────
+    def _read_table_html(self) -> str | None:
+        try:
+            return self._page.eval_on_selector(TABLE_SELECTOR, "el => el.outerHTML")
+        except Exception as e:
+            # no table right now (page re-rendering) or the page went away; the latter is caught by _healthy
+            logger.debug(f"table read failed: {e}")
+            return None
+
+    def scrape(self) -> list[dict]:
+        """
+        The driver rows of the live timing table, read from the open page (one row dict per driver,
+        keys as in HEADERS). Empty when the table is not rendered right now.
+        """
+        if not self._healthy():
+            self._recover()
+
+        html = self._read_table_html()
+        if html is None:
+            self._empty_reads += 1
+            if self._empty_reads >= MAX_EMPTY_READS or not self._healthy():
+                logger.warning(f"No live timing table for {self._empty_reads} read(s), reloading the page")
+                self._mark_broken("no table")
+                self._recover()
+                html = self._read_table_html()
+            if html is None:
+                return []
+        self._empty_reads = 0
+        return _parse_table(BeautifulSoup(html, "html.parser"))
+
+
+def scrape_f1_live_table() -> str:
+    """
+    Scrape the live timing table from the F1 website (one-off: launches and closes its own browser).
+    Returns a JSON string — an array of objects, each mapping header names to values.
+    Loops should keep an F1LiveScraper instead.
+    """
+    with F1LiveScraper() as scraper:
+        records = scraper.scrape()
+    return json.dumps(records, indent=2, ensure_ascii=False)
 
 
 if __name__ == "__main__":
@@ -2,7 +2,15 @@
 F1 Live Data Publisher
 
 Continuously scrapes F1 live timing data and publishes it to AWS IoT Core MQTT broker
-every 2 minutes.
+as it changes. One browser page stays open for the whole run (F1LiveScraper):
+  - EXTRACTION_MODE "observe": the page reports row changes itself (MutationObserver), a
+    change is published right away, the loop wakes up at least every HEARTBEAT_INTERVAL
+  - EXTRACTION_MODE "poll": the rendered table is read every PUBLISH_INTERVAL seconds
+The rows go out with the delta protocol of mqtt/live_delta.py: a retained keyframe on f1/live
+(full array, every KEYFRAME_INTERVAL or on a resync request), per-driver diffs on f1/live/delta,
+nothing while the rows are unchanged.
+With ASYNC_PUBLISH the cycles only queue the messages (AsyncMqttPublisher): the broker round
+trips no longer set the scrape cadence.
 
 Usage:
     python f1_live_data_publisher.py
@@ -17,15 +25,25 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from loguru import logger
-from f1_live_data import scrape_f1_live_table
-from mqtt.ps_mqtt import build_client, publish, F1_LIVE_DATA_TOPIC
+from f1_live_data import F1LiveScraper
+from mqtt.ps_mqtt import (
+    AsyncMqttPublisher, build_client, publish, F1_LIVE_DATA_TOPIC, F1_LIVE_DELTA_TOPIC, F1_LIVE_RESYNC_TOPIC
+)
+from mqtt.live_delta import LiveDeltaEncoder
 
 # Configuration
-PUBLISH_INTERVAL = 5  # seconds (60 for production, 10 for testing)
+EXTRACTION_MODE = "observe"  # "observe" (DOM mutations) or "poll" (read the table every PUBLISH_INTERVAL)
+PUBLISH_INTERVAL = 1  # seconds, poll cycles are scheduled at a fixed rate (a slow cycle is not added to the wait)
+HEARTBEAT_INTERVAL = 5  # seconds, observe mode checks for due keyframes / resync requests this often
+DELTA_CODEC = "compact"  # payload codec of f1/live/delta (keyframes keep the ps_mqtt default, JSON)
+ASYNC_PUBLISH = True  # queue the publishes (in-flight window, coalescing) instead of waiting for every PUBACK
+METRICS_INTERVAL = 60  # seconds between two logs of the async publisher metrics
 USE_FALLBACK_DATA = False  # Set to True to send fallback data when no live data is available, False to skip publish
 
 # Persistent MQTT client (reused for all publishes)
 mqtt_client = None
+# Keyframe / delta state of the published rows (seq numbers, last hash)
+delta_encoder = LiveDeltaEncoder()
 
 # Fallback data to send in case of errors
 FALLBACK_F1_DATA = [
@@ -252,22 +270,24 @@ FALLBACK_F1_DATA = [
 ]
 
 
-def publish_f1_live_data(client) -> bool:
+def publish_f1_live_data(client, scraper: F1LiveScraper, records: list | None = None) -> bool:
     """
-    Scrape F1 live timing data and publish to MQTT using persistent client.
+    Scrape F1 live timing data from the open page (or take the observed ``records``) and publish
+    to MQTT using persistent client.
     If scraping fails and USE_FALLBACK_DATA is True, publishes fallback sample data instead.
     If USE_FALLBACK_DATA is False, skips publish on error.
 
     Args:
-        client: Persistent MQTT client to use for publishing
+        client: Persistent MQTT client to use for publishing, or an AsyncMqttPublisher over it
+        scraper: Started F1LiveScraper (recovers its page by itself)
 
     Returns:
         bool: True if successful, False otherwise
     """
     try:
-        logger.info("🏎️  Scraping F1 live timing data...")
-        json_str = scrape_f1_live_table()
-        records = json.loads(json_str)
+        if records is None:
+            logger.info("🏎️  Scraping F1 live timing data...")
+            records = scraper.scrape()
 
         if not records:
             if USE_FALLBACK_DATA:
@@ -279,15 +299,26 @@ def publish_f1_live_data(client) -> bool:
 
         logger.info(f"✅ Prepared {len(records)} driver records")
 
-        # Publish to MQTT (with retention enabled by default)
-        logger.info(f"📡 Publishing to topic: {F1_LIVE_DATA_TOPIC}")
-        publish(
-            payload=records,
-            topic=F1_LIVE_DATA_TOPIC,
-            qos=1,
-            client=client,
-            retain=False
-        )
+        messages = delta_encoder.encode(records)
+        if not messages:
+            logger.debug("⏸️  Standings unchanged, nothing to publish")
+            return True
+
+        for message in messages:
+            # keyframes are retained so new subscribers start from the full array
+            keyframe = message["kind"] == "keyframe"
+            topic = F1_LIVE_DATA_TOPIC if keyframe else F1_LIVE_DELTA_TOPIC
+            logger.info(f"📡 Publishing {message['kind']} #{delta_encoder.seq} to topic: {topic}")
+            options = dict(
+                payload=message["payload"],
+                topic=topic,
+                qos=1,
+                retain=keyframe,
+                properties=message["properties"],
+                codec=None if keyframe else DELTA_CODEC
+            )
+            # a keyframe replaces the keyframe still queued and the queued deltas it already contains
+            _publish_with(client, options, coalesce=keyframe, supersedes=(F1_LIVE_DELTA_TOPIC,) if keyframe else ())
 
         logger.info(f"✅ Successfully published {len(records)} records to AWS IoT Core")
         return True
@@ -298,13 +329,12 @@ def publish_f1_live_data(client) -> bool:
         if USE_FALLBACK_DATA:
             logger.warning("⚠️  Publishing fallback sample data to MQTT...")
             try:
-                publish(
+                _publish_with(client, dict(
                     payload=FALLBACK_F1_DATA,
                     topic=F1_LIVE_DATA_TOPIC,
                     qos=1,
-                    client=client,
                     retain=False
-                )
+                ))
                 logger.info(f"✅ Successfully published fallback data ({len(FALLBACK_F1_DATA)} records) to AWS IoT Core")
                 return True
             except Exception as fallback_error:
@@ -315,12 +345,28 @@ def publish_f1_live_data(client) -> bool:
             return False
 
 
-def run_continuous_publisher(interval: int = PUBLISH_INTERVAL) -> None:
+def _publish_with(client, options: dict, coalesce: bool = False, supersedes: tuple = ()) -> None:
+    """Publish through the AsyncMqttPublisher queue when ``client`` is one, else synchronously on the paho client."""
+    if isinstance(client, AsyncMqttPublisher):
+        client.publish(**options, coalesce=coalesce, supersedes=supersedes)
+    else:
+        publish(**options, client=client)
+
+
+def on_resync_request(client, userdata, message):
+    """A subscriber missed a delta: the next cycle sends a keyframe (rate limited)."""
+    logger.info(f"🔁 Resync requested: {message.payload[:100]!r}")
+    if not delta_encoder.request_keyframe():
+        logger.debug("Resync request ignored, a keyframe was sent for one just before")
+
+
+def run_continuous_publisher(interval: float = PUBLISH_INTERVAL) -> None:
     """
-    Run the publisher continuously at specified interval using a persistent client connection.
+    Run the publisher continuously at specified interval using a persistent client connection
+    and a persistent browser page.
 
     Args:
-        interval (int): Time in seconds between publishes. Defaults to 10 (for testing)
+        interval (float): Time in seconds between the starts of two cycles. Defaults to 1
     """
     global mqtt_client
 
@@ -330,35 +376,68 @@ def run_continuous_publisher(interval: int = PUBLISH_INTERVAL) -> None:
     # Create persistent client connection (reused for all publishes)
     logger.info("🔌 Establishing persistent connection to AWS IoT Core...")
     mqtt_client = build_client(client_id="ps-f1-live-publisher")
+    mqtt_client.message_callback_add(F1_LIVE_RESYNC_TOPIC, on_resync_request)
+    mqtt_client.subscribe(F1_LIVE_RESYNC_TOPIC, qos=1)
+    publisher = AsyncMqttPublisher(mqtt_client).start() if ASYNC_PUBLISH else None
     logger.info("✅ Connected! Ready to publish.")
 
+    # Open the live timing page once, the cycles only read it
+    observe = EXTRACTION_MODE == "observe"
+    scraper = F1LiveScraper(observe=observe)
+    scraper.start()
+    logger.info(f"✅ Live timing page open (mode: {EXTRACTION_MODE}).")
+
     publish_count = 0
     error_count = 0
+    next_cycle = time.monotonic()
+    next_metrics = next_cycle + METRICS_INTERVAL
 
     try:
         while True:
+            if observe:
+                # publish on every change, wake up once per heartbeat for due keyframes / resync requests
+                scraper.wait_for_update(scraper.state.version, HEARTBEAT_INTERVAL)
+                records = scraper.records()
+            else:
+                records = None
+
             publish_count += 1
-            logger.info(f"\n{'='*60}")
-            logger.info(f"📊 Publication cycle #{publish_count}")
-            logger.info(f"{'='*60}")
+            logger.debug(f"📊 Publication cycle #{publish_count}")
+            cycle_start = time.monotonic()
 
-            success = publish_f1_live_data(mqtt_client)
+            success = publish_f1_live_data(publisher or mqtt_client, scraper, records)
 
             if not success:
                 error_count += 1
                 logger.warning(f"⚠️  Error count: {error_count}")
 
-            logger.info(f"⏰ Next publish in {interval} seconds...")
-            time.sleep(interval)
+            logger.debug(f"⏱️  Cycle #{publish_count} took {(time.monotonic() - cycle_start) * 1000:.0f} ms")
+            if publisher and time.monotonic() >= next_metrics:
+                next_metrics = time.monotonic() + METRICS_INTERVAL
+                logger.info(f"📊 MQTT publisher: {publisher.metrics()}")
+            if observe:
+                continue
+            # fixed rate: skip the missed slots instead of bursting after a slow cycle (e.g. a page reload)
+            next_cycle += interval
+            now = time.monotonic()
+            if next_cycle < now:
+                next_cycle = now
+            time.sleep(next_cycle - now)
 
     except KeyboardInterrupt:
         logger.info("\n🛑 Publisher stopped by user (Ctrl+C)")
         logger.info(f"📈 Statistics:")
         logger.info(f"   Total publishes: {publish_count}")
         logger.info(f"   Errors: {error_count}")
+        logger.info(f"   Page loads: {scraper.page_loads}")
         logger.info(f"   Success rate: {((publish_count - error_count) / publish_count * 100):.1f}%")
 
+    finally:
         # Cleanup
+        scraper.close()
+        if publisher:
+            publisher.stop()  # sends what is still queued first
+            logger.info(f"📊 MQTT publisher: {publisher.metrics()}")
         if mqtt_client:
             mqtt_client.loop_stop()
             mqtt_client.disconnect()
@@ -5,8 +5,9 @@ F1 Live Data Subscriber
 Test subscriber to receive F1 live timing data from AWS IoT Core MQTT broker.
 This will:
 1. Connect to the MQTT broker
-2. Receive the last retained message (if available)
-3. Continue receiving new messages as they're published
+2. Receive the last retained message (if available), the keyframe of the delta protocol
+3. Apply the per-driver deltas of f1/live/delta as they're published, and ask for a new
+   keyframe on f1/live/resync when one is missed (see mqtt/live_delta.py)
 
 Usage:
     python f1_live_data_subscriber.py
@@ -21,10 +22,38 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from loguru import logger
-from mqtt.ps_mqtt import build_client, F1_LIVE_DATA_TOPIC
+from mqtt.ps_mqtt import build_client, decode_message, message_codec, F1_LIVE_DATA_TOPIC, F1_LIVE_DELTA_TOPIC, F1_LIVE_RESYNC_TOPIC
+from mqtt.live_delta import LiveDeltaDecoder, read_keyframe_properties
 
 # Global message counter
 message_count = 0
+# Driver array rebuilt from keyframes and deltas
+decoder = LiveDeltaDecoder()
+
+def log_standings(payload):
+    logger.info(f"\nDriver Standings:")
+    for i, driver in enumerate(payload[:5]):
+        logger.info(f"  {i+1}. {driver['First Name']} {driver['Last Name']} ({driver['Abbreviation']}) - {driver['Team']} Gap: {driver['Gap']}")
+    if len(payload) > 5:
+        logger.info(f"  ... and {len(payload)-5} more drivers")
+    logger.info(f"")
+
+def on_delta_handler(client, userdata, message):
+    """Apply a per-driver delta, or ask for a keyframe when it does not follow the current rows"""
+    global message_count
+    message_count += 1
+
+    try:
+        delta = decode_message(message)
+        if decoder.apply_delta(delta):
+            logger.info(f"🔄 Delta #{delta['seq']}: {len(delta.get('rows', {}))} drivers changed")
+            log_standings(decoder.records())
+        else:
+            logger.warning(f"⚠️  Delta #{delta.get('seq')} does not follow #{decoder.seq}, requesting a keyframe")
+            # no wait_for_publish here, this runs on the network loop thread
+            client.publish(F1_LIVE_RESYNC_TOPIC, decoder.resync_request(), qos=1)
+    except Exception as e:
+        logger.error(f"Error processing delta: {e}")
 
 def on_message_handler(client, userdata, message):
     """Handle incoming messages"""
@@ -32,29 +61,28 @@ def on_message_handler(client, userdata, message):
     message_count += 1
 
     try:
-        payload = json.loads(message.payload.decode('utf-8'))
+        payload = decode_message(message)
 
-        # If it's a list (F1 data)
+        # If it's a list (F1 data, a keyframe)
         if isinstance(payload, list):
+            meta = read_keyframe_properties(message)
+            decoder.apply_keyframe(payload, meta)
             logger.info(f"\n{'='*70}")
             logger.info(f"📨 Message #{message_count} received at {time.strftime('%H:%M:%S')}")
             logger.info(f"{'='*70}")
             logger.info(f"🏎️  Received {len(payload)} F1 driver records")
             logger.info(f"📍 Topic: {message.topic}")
             logger.info(f"⏱️  QoS: {message.qos}")
+            logger.info(f"📦 Codec: {message_codec(message)}")
             logger.info(f"📌 Retained: {message.retain}")
-            logger.info(f"\nDriver Standings:")
-            for i, driver in enumerate(payload[:5]):
-                logger.info(f"  {i+1}. {driver['First Name']} {driver['Last Name']} ({driver['Abbreviation']}) - {driver['Team']} Gap: {driver['Gap']}")
-            if len(payload) > 5:
-                logger.info(f"  ... and {len(payload)-5} more drivers")
-            logger.info(f"")
+            logger.info(f"🔑 Keyframe: #{meta.get('seq')} (stream {meta.get('stream')})")
+            log_standings(payload)
         else:
             logger.info(f"📦 Received data: {json.dumps(payload, indent=2)}")
 
     except json.JSONDecodeError as e:
         logger.error(f"Failed to parse JSON: {e}")
-        logger.info(f"Raw payload: {message.payload.decode('utf-8')[:100]}...")
+        logger.info(f"Raw payload: {message.payload[:100]!r}...")
     except Exception as e:
         logger.error(f"Error processing message: {e}")
 
@@ -81,11 +109,13 @@ try:
     client.on_message = on_message_handler
     client.on_connect = on_connect_handler
     client.on_disconnect = on_disconnect_handler
+    client.message_callback_add(F1_LIVE_DELTA_TOPIC, on_delta_handler)
     
-    # Subscribe to the topic
+    # Subscribe to the keyframes and the deltas
     client.subscribe(F1_LIVE_DATA_TOPIC, qos=1)
-    logger.info(f"✅ Subscribed to [{F1_LIVE_DATA_TOPIC}]")
-    logger.info(f"⏳ Listening for messages (retained message will arrive first, then new publishes every 10s)...\n")
+    client.subscribe(F1_LIVE_DELTA_TOPIC, qos=1)
+    logger.info(f"✅ Subscribed to [{F1_LIVE_DATA_TOPIC}] and [{F1_LIVE_DELTA_TOPIC}]")
+    logger.info(f"⏳ Listening for messages (retained keyframe will arrive first, then deltas as the standings change)...\n")
     
     # Start the event loop - this will block and listen for messages
     client.loop_forever()
@@ -0,0 +1,180 @@
+import hashlib
+import json
+import threading
+import time
+import uuid
+
+from paho.mqtt.packettypes import PacketTypes
+from paho.mqtt.properties import Properties
+
+# ── Delta protocol for the live timing topic ───────────────────────────────────
+# f1/live used to carry the full driver array on every cycle, changed or not. Now:
+#   - keyframe (f1/live, retained): the full array as before, so existing subscribers keep working. The
+#     protocol fields travel as MQTT v5 user properties: ps-stream (random id of the publisher run), ps-seq,
+#     ps-hash (hash of the rows). Sent every KEYFRAME_INTERVAL seconds when the rows changed since the last one,
+#     when a subscriber asks for a resync, and when a delta would not be smaller than a keyframe.
+#   - delta (f1/live/delta, not retained): {"stream", "seq", "hash", "rows": {driver: {changed fields}},
+#     "removed": [driver], "order": [driver] (only when the order changed)}. Drivers are keyed by abbreviation.
+#   - resync (f1/live/resync): a subscriber that sees a seq gap, another stream or a hash mismatch publishes
+#     {"stream", "seq"} here and ignores deltas until the next keyframe.
+# Keyframes and deltas share one seq counter: a delta is only applied on top of seq - 1.
+# Nothing is published while the hash of the rows is unchanged.
+KEYFRAME_INTERVAL = 30  # seconds
+MIN_RESYNC_INTERVAL = 2  # seconds between two keyframes sent for resync requests
+STREAM_PROPERTY = "ps-stream"
+SEQ_PROPERTY = "ps-seq"
+HASH_PROPERTY = "ps-hash"
+
+
+def _compact(value) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def rows_hash(records: list[dict]) -> str:
+    return hashlib.sha1(json.dumps(records, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()[:16]
+
+
+def driver_key(row: dict) -> str:
+    return row.get("Abbreviation") or f"{row.get('First Name', '')} {row.get('Last Name', '')}".strip()
+
+
+def keyframe_properties(stream: str, seq: int, rows_digest: str) -> Properties:
+    properties = Properties(PacketTypes.PUBLISH)
+    properties.UserProperty = [(STREAM_PROPERTY, stream), (SEQ_PROPERTY, str(seq)), (HASH_PROPERTY, rows_digest)]
+    return properties
+
+
+def read_keyframe_properties(message) -> dict:
+    """{"stream", "seq", "hash"} of a keyframe message, empty when it has none (older publisher)."""
+    user_properties = dict(getattr(getattr(message, "properties", None), "UserProperty", None) or [])
+    if SEQ_PROPERTY not in user_properties:
+        return {}
+    return {
+        "stream": user_properties.get(STREAM_PROPERTY),
+        "seq": int(user_properties[SEQ_PROPERTY]),
+        "hash": user_properties.get(HASH_PROPERTY),
+    }
+
+
+class LiveDeltaEncoder:
+    """Publisher side: turns every scraped driver array into the keyframe / delta messages to send."""
+
+    def __init__(self, keyframe_interval: float = KEYFRAME_INTERVAL, stream: str | None = None):
+        self.keyframe_interval = keyframe_interval
+        self.stream = stream or uuid.uuid4().hex[:8]
+        self.seq = 0
+        self._lock = threading.Lock()
+        self._rows: dict[str, dict] = {}
+        self._order: list[str] = []
+        self._hash = None
+        self._keyframe_hash = None
+        self._keyframe_at = float("-inf")
+        self._keyframe_requested = True
+        self._last_resync = float("-inf")
+
+    def request_keyframe(self, now: float | None = None) -> bool:
+        """Resync request of a subscriber (thread safe, rate limited). True when a keyframe will be sent."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if now - self._last_resync < MIN_RESYNC_INTERVAL:
+                return False
+            self._last_resync = now
+            self._keyframe_requested = True
+            return True
+
+    def encode(self, records: list[dict], now: float | None = None) -> list[dict]:
+        """
+        The messages for ``records``: [{"kind": "keyframe" | "delta", "payload": list | dict, "properties"}], in
+        send order. Empty when nothing has to be sent.
+        """
+        now = time.monotonic() if now is None else now
+        digest = rows_hash(records)
+        with self._lock:
+            keyframe_due = (
+                self._keyframe_requested
+                or (now - self._keyframe_at >= self.keyframe_interval and digest != self._keyframe_hash)
+            )
+            if digest == self._hash and not keyframe_due:
+                return []
+
+            rows = {driver_key(r): r for r in records}
+            order = [driver_key(r) for r in records]
+            messages = []
+            if not keyframe_due:
+                delta = self._delta(rows, order, digest)
+                if len(_compact(delta)) < len(_compact(records)):
+                    messages.append({"kind": "delta", "payload": delta, "properties": None})
+                else:
+                    keyframe_due = True
+            if keyframe_due:
+                self.seq += 1
+                messages.append({
+                    "kind": "keyframe",
+                    "payload": records,
+                    "properties": keyframe_properties(self.stream, self.seq, digest),
+                })
+                self._keyframe_hash = digest
+                self._keyframe_at = now
+                self._keyframe_requested = False
+            self._rows, self._order, self._hash = rows, order, digest
+            return messages
+
+    def _delta(self, rows: dict, order: list, digest: str) -> dict:
+        self.seq += 1
+        changed = {}
+        for key, row in rows.items():
+            old = self._rows.get(key)
+            fields = {f: v for f, v in row.items() if old is None or old.get(f) != v}
+            if fields:
+                changed[key] = fields
+        delta = {"stream": self.stream, "seq": self.seq, "hash": digest, "rows": changed}
+        removed = [key for key in self._rows if key not in rows]
+        if removed:
+            delta["removed"] = removed
+        if order != self._order:
+            delta["order"] = order
+        return delta
+
+
+class LiveDeltaDecoder:
+    """Subscriber side: rebuilds the driver array from keyframes and deltas, detects when a resync is needed."""
+
+    def __init__(self):
+        self.stream = None
+        self.seq = None
+        self.in_sync = False
+        self._rows: dict[str, dict] = {}
+        self._order: list[str] = []
+
+    def apply_keyframe(self, records: list[dict], meta: dict | None = None) -> None:
+        meta = meta or {}
+        self._rows = {driver_key(r): dict(r) for r in records}
+        self._order = [driver_key(r) for r in records]
+        self.stream = meta.get("stream")
+        self.seq = meta.get("seq")
+        # a keyframe without protocol fields (older publisher) is complete, but deltas cannot follow it
+        self.in_sync = self.seq is not None
+
+    def apply_delta(self, delta: dict) -> bool:
+        """Apply ``delta`` on the current rows. False (and out of sync) when it does not follow them."""
+        if not self.in_sync or delta.get("stream") != self.stream or delta.get("seq") != self.seq + 1:
+            self.in_sync = False
+            return False
+        rows = {key: dict(row) for key, row in self._rows.items()}
+        for key in delta.get("removed", []):
+            rows.pop(key, None)
+        for key, fields in delta.get("rows", {}).items():
+            rows.setdefault(key, {}).update(fields)
+        order = delta.get("order") or [key for key in self._order if key in rows]
+        records = [rows[key] for key in order if key in rows]
+        if delta.get("hash") and rows_hash(records) != delta["hash"]:
+            self.in_sync = False
+            return False
+        self._rows, self._order, self.seq = rows, order, delta["seq"]
+        return True
+
+    def records(self) -> list[dict]:
+        return [self._rows[key] for key in self._order if key in self._rows]
+
+    def resync_request(self) -> str:
+        return _compact({"stream": self.stream, "seq": self.seq})
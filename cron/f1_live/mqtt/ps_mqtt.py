@@ -3,12 +3,22 @@ import time
 import json
 import os
 import base64
+import functools
 import tempfile
 import threading
+import zlib
+from collections import deque
 import paho.mqtt.client as mqtt
+from paho.mqtt.packettypes import PacketTypes
+from paho.mqtt.properties import Properties
 from dotenv import load_dotenv
 from loguru import logger
 
+try:
+    import msgpack
+except ImportError:  # the msgpack codec is only available with the package
+    msgpack = None
+
 load_dotenv()
 
 # ── AWS IoT Core endpoint ──────────────────────────────────────────────────────
@@ -21,7 +31,8 @@ CLIENT_ID     = "ps-f1-live-publisher"
 # Priority 2: local files in certs/     — used for local development
 _CERTS_DIR = os.path.join(os.path.dirname(__file__), "..", "certs")
 
-# Temp files are created once at module load and cleaned up on process exit
+# Resolved when the first client is built (codecs and benchmarks need no certs), temp files are cleaned up on
+# process exit
 _tmp_cert_files: list[tempfile.NamedTemporaryFile] = []
 
 
@@ -61,27 +72,163 @@ def _cert_from_env_or_file(env_var: str, fallback_path: str) -> str:
     )
 
 
-CA_CERT     = _cert_from_env_or_file(
-    "MQTT_CA_CERT",
-    os.path.join(_CERTS_DIR, "AmazonRootCA1.pem"),
-)
-DEVICE_CERT = _cert_from_env_or_file(
-    "MQTT_DEVICE_CERT",
-    os.path.join(_CERTS_DIR, "device-certificate.pem.crt"),
-)
-PRIVATE_KEY = _cert_from_env_or_file(
-    "MQTT_PRIVATE_KEY",
-    os.path.join(_CERTS_DIR, "device-private.pem.key"),
-)
+@functools.lru_cache(maxsize=None)
+def _tls_files() -> tuple[str, str, str]:
+    """(ca cert, device cert, private key) paths, resolved once per process."""
+    return (
+        _cert_from_env_or_file("MQTT_CA_CERT", os.path.join(_CERTS_DIR, "AmazonRootCA1.pem")),
+        _cert_from_env_or_file("MQTT_DEVICE_CERT", os.path.join(_CERTS_DIR, "device-certificate.pem.crt")),
+        _cert_from_env_or_file("MQTT_PRIVATE_KEY", os.path.join(_CERTS_DIR, "device-private.pem.key")),
+    )
+
 
 # ── Default topic ──────────────────────────────────────────────────────────────
 F1_LIVE_DATA_TOPIC = "f1/live"
 F1_LAP_BY_LAP_TOPIC = "f1/lap-by-lap"
+F1_LIVE_DELTA_TOPIC = "f1/live/delta"  # per-driver diffs between two f1/live keyframes (see live_delta.py)
+F1_LIVE_RESYNC_TOPIC = "f1/live/resync"  # subscribers ask here for a new keyframe
 
 # ── Message retention ────────────────────────────────────────────────────────────
 # When True, broker retains last published message and sends to new subscribers
 RETAIN_LAST_MESSAGE = True  # Set to False to disable message retention
 
+# ── Payload codecs ─────────────────────────────────────────────────────────────
+# publish(codec=...) picks how dict / list payloads are encoded:
+#   json    : UTF-8 JSON (ensure_ascii=False), what every subscriber understands
+#   compact : JSON without spaces, known keys shortened (COMPACT_KEYS) and lists of records with the
+#             same keys sent as {"$k": [keys], "$r": [[values], ...]}. Other keys that equal a short key or
+#             start with "$" / "~" get a "~" prefix, so any JSON payload comes back unchanged
+#   msgpack : MessagePack (needs the msgpack package)
+#   +zlib   : zlib on top of any of them, e.g. "compact+zlib"
+# Every message advertises its codec: MQTT v5 content type, payload format indicator and the
+# ps-codec user property. decode_message() reads them back; a message without them is plain JSON.
+PAYLOAD_CODEC = "json"  # default of publish()
+CODEC_PROPERTY = "ps-codec"
+ZLIB_LEVEL = 6
+COMPACT_KEYS = {
+    "Pos": "p",
+    "First Name": "fn",
+    "Last Name": "ln",
+    "Team": "t",
+    "Abbreviation": "a",
+    "Gap": "g",
+    "Tyre": "ty",
+    "Tyres Used": "tu",
+}
+_COMPACT_KEYS_REVERSE = {short: key for key, short in COMPACT_KEYS.items()}
+_CONTENT_TYPES = {
+    "json": "application/json",
+    "compact": "application/vnd.ps.compact+json",
+    "msgpack": "application/msgpack",
+}
+
+
+def available_codecs() -> list[str]:
+    bases = [base for base in _CONTENT_TYPES if base != "msgpack" or msgpack is not None]
+    return bases + [f"{base}+zlib" for base in bases]
+
+
+def _split_codec(codec: str) -> tuple[str, bool]:
+    base, _, extra = codec.partition("+")
+    if base not in _CONTENT_TYPES or extra not in ("", "zlib"):
+        raise ValueError(f"Unknown payload codec {codec!r} (known: {', '.join(available_codecs())})")
+    if base == "msgpack" and msgpack is None:
+        raise ValueError("The msgpack payload codec needs the msgpack package")
+    return base, extra == "zlib"
+
+
+def _pack_key(key):
+    if key in COMPACT_KEYS:
+        return COMPACT_KEYS[key]
+    if isinstance(key, str) and (key in _COMPACT_KEYS_REVERSE or key.startswith(("$", "~"))):
+        return "~" + key  # would be read back as a long key or a table marker
+    return key
+
+
+def _unpack_key(key):
+    if key.startswith("~"):
+        return key[1:]
+    return _COMPACT_KEYS_REVERSE.get(key, key)
+
+
+def _compact_pack(value):
+    if isinstance(value, dict):
+        return {_pack_key(k): _compact_pack(v) for k, v in value.items()}
+    if isinstance(value, list):
+        if len(value) > 1 and all(isinstance(v, dict) for v in value):
+            keys = list(value[0])
+            if all(list(v) == keys for v in value):
+                return {
+                    "$k": [_pack_key(k) for k in keys],
+                    "$r": [[_compact_pack(v[k]) for k in keys] for v in value],
+                }
+        return [_compact_pack(v) for v in value]
+    return value
+
+
+def _compact_unpack(value):
+    if isinstance(value, dict):
+        if len(value) == 2 and "$k" in value and "$r" in value:
+            keys = [_unpack_key(k) for k in value["$k"]]
+            return [dict(zip(keys, (_compact_unpack(v) for v in row))) for row in value["$r"]]
+        return {_unpack_key(k): _compact_unpack(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_compact_unpack(v) for v in value]
+    return value
+
+
+def encode_payload(payload, codec: str = PAYLOAD_CODEC) -> bytes:
+    base, compressed = _split_codec(codec)
+    if base == "json":
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    elif base == "compact":
+        body = json.dumps(_compact_pack(payload), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    else:
+        body = msgpack.packb(payload, use_bin_type=True)
+    return zlib.compress(body, ZLIB_LEVEL) if compressed else body
+
+
+def decode_payload(body: bytes | str, codec: str = PAYLOAD_CODEC):
+    base, compressed = _split_codec(codec)
+    if compressed:
+        body = zlib.decompress(body)
+    if base == "msgpack":
+        return msgpack.unpackb(body, raw=False)
+    payload = json.loads(body)
+    return _compact_unpack(payload) if base == "compact" else payload
+
+
+def codec_properties(codec: str, properties: Properties | None = None) -> Properties:
+    """Publish properties advertising ``codec``, added to ``properties`` (user properties are kept)."""
+    base, compressed = _split_codec(codec)
+    if properties is None:
+        properties = Properties(PacketTypes.PUBLISH)
+    properties.ContentType = _CONTENT_TYPES[base]
+    properties.PayloadFormatIndicator = 0 if compressed or base == "msgpack" else 1  # 1: UTF-8 text
+    advertised = dict(getattr(properties, "UserProperty", None) or []).get(CODEC_PROPERTY)
+    if advertised is None:
+        properties.UserProperty = [(CODEC_PROPERTY, codec)]  # paho appends to the existing user properties
+    elif advertised != codec:
+        raise ValueError(f"Publish properties already advertise the {advertised!r} codec, not {codec!r}")
+    return properties
+
+
+def message_codec(message) -> str:
+    """Codec of a received message: ps-codec user property, else content type, else json."""
+    properties = getattr(message, "properties", None)
+    user_properties = dict(getattr(properties, "UserProperty", None) or [])
+    if CODEC_PROPERTY in user_properties:
+        return user_properties[CODEC_PROPERTY]
+    content_type = getattr(properties, "ContentType", None)
+    for base, known_type in _CONTENT_TYPES.items():
+        if content_type == known_type:
+            return base
+    return "json"
+
+
+def decode_message(message):
+    return decode_payload(message.payload, message_codec(message))
+
 
 # ── Callbacks ──────────────────────────────────────────────────────────────────
 def _on_connect(client, userdata, flags, reason_code, properties=None):
@@ -100,7 +247,11 @@ def _on_publish(client, userdata, mid, reason_code=None, properties=None):
 
 
 def _on_message(client, userdata, message):
-    logger.info(f"[{message.topic}] {message.payload.decode('utf-8')}")
+    try:
+        payload = decode_message(message)
+    except Exception:
+        payload = message.payload[:200]
+    logger.info(f"[{message.topic}] {payload}")
 
 
 # ── Client factory ─────────────────────────────────────────────────────────────
@@ -127,10 +278,11 @@ def build_client(client_id: str = CLIENT_ID) -> mqtt.Client:
     )
 
     # Attach TLS using the IoT certificates
+    ca_cert, device_cert, private_key = _tls_files()
     client.tls_set(
-        ca_certs=CA_CERT,
-        certfile=DEVICE_CERT,
-        keyfile=PRIVATE_KEY,
+        ca_certs=ca_cert,
+        certfile=device_cert,
+        keyfile=private_key,
         tls_version=ssl.PROTOCOL_TLS_CLIENT,
     )
 
@@ -154,12 +306,25 @@ def build_client(client_id: str = CLIENT_ID) -> mqtt.Client:
 
 
 # ── High-level helpers ─────────────────────────────────────────────────────────
+def _prepare_payload(payload, properties: Properties | None, codec: str | None):
+    """(body, properties, codec, log preview): dict / list encoded with ``codec``, strings sent as is."""
+    if not isinstance(payload, (dict, list)):
+        return payload, properties, None, payload
+    codec = codec or PAYLOAD_CODEC
+    body = encode_payload(payload, codec)
+    properties = codec_properties(codec, properties)
+    preview = body[:100].decode("utf-8", "replace") if properties.PayloadFormatIndicator else f"<{len(body)} bytes>"
+    return body, properties, codec, preview
+
+
 def publish(
     payload: dict | str,
     topic: str = F1_LIVE_DATA_TOPIC,
     qos: int = 1,
     retain: bool | None = None,
     client: mqtt.Client | None = None,
+    properties: Properties | None = None,
+    codec: str | None = None,
 ) -> None:
     """
     Publish a message to MQTT topic.
@@ -168,11 +333,13 @@ def publish(
     This allows new clients to receive the latest data upon subscription.
 
     Args:
-        payload : dict (serialised to JSON), list, or raw string.
+        payload : dict or list (encoded with ``codec``), or raw string (sent as is).
         topic   : MQTT topic string.
         qos     : Quality of service level (0 / 1 / 2).
         retain  : Whether to retain message (default uses RETAIN_LAST_MESSAGE setting).
         client  : Reuse an existing connected client, or None to create one.
+        properties : MQTT v5 publish properties (e.g. user properties), or None.
+        codec   : Payload codec, see available_codecs() (default uses PAYLOAD_CODEC setting).
     """
     _own_client = client is None
     if _own_client:
@@ -184,12 +351,12 @@ def publish(
     if retain is None:
         retain = RETAIN_LAST_MESSAGE
 
-    body = json.dumps(payload, ensure_ascii=False) if isinstance(payload, (dict, list)) else payload
+    body, properties, codec, preview = _prepare_payload(payload, properties, codec)
 
     try:
-        result = client.publish(topic, body, qos=qos, retain=retain)
+        result = client.publish(topic, body, qos=qos, retain=retain, properties=properties)
         result.wait_for_publish(timeout=10)
-        logger.info(f"Published to [{topic}] (retain={retain}): {body[:100]}...")
+        logger.info(f"Published to [{topic}] (retain={retain}, {codec or 'raw'}): {preview[:100]}...")
     except Exception as e:
         logger.error(f"Failed to publish: {e}")
         raise
@@ -237,6 +404,193 @@ def subscribe(
     return client
 
 
+# ── Async publisher ────────────────────────────────────────────────────────────
+# publish() waits for the PUBACK of every message, so a caller loop (the live timing scrape) stalls for
+# a full round trip to AWS IoT on each publish. AsyncMqttPublisher.publish() only queues the message:
+#   - a worker thread sends the queue in order, with at most max_in_flight messages not yet acknowledged
+#   - coalesce=True replaces the message still queued for the same topic (the new one goes to the end),
+#     supersedes=(topics) drops the messages still queued for those topics (e.g. deltas older than a keyframe)
+#   - when max_queued messages wait, the oldest one is dropped
+#   - a message not acknowledged within ack_timeout frees its window slot (paho still redelivers it)
+# metrics() returns queue depth, in flight, ack latency (p50 / p95 / max) and the sent / acked / coalesced /
+# dropped / ack timeout / error counts.
+MAX_IN_FLIGHT = 10
+MAX_QUEUED = 100
+ACK_TIMEOUT = 10  # seconds
+ACK_LATENCY_SAMPLES = 1000
+
+
+class AsyncMqttPublisher:
+    """Non-blocking publishes over a connected client (see build_client), with an in-flight window."""
+
+    def __init__(
+        self,
+        client: mqtt.Client,
+        max_in_flight: int = MAX_IN_FLIGHT,
+        max_queued: int = MAX_QUEUED,
+        ack_timeout: float = ACK_TIMEOUT,
+    ):
+        self.client = client
+        self.max_in_flight = max_in_flight
+        self.max_queued = max_queued
+        self.ack_timeout = ack_timeout
+        self._cond = threading.Condition()
+        self._queue: deque[dict] = deque()
+        self._in_flight: dict[int, float] = {}  # mid → send time
+        self._early_acks: dict[int, float] = {}  # acks received before publish() returned the mid
+        self._ack_latencies: deque[float] = deque(maxlen=ACK_LATENCY_SAMPLES)
+        self._counts = {"sent": 0, "acked": 0, "coalesced": 0, "dropped": 0, "ack_timeouts": 0, "errors": 0}
+        self._running = False
+        self._thread = None
+        self._previous_on_publish = None
+
+    def start(self) -> "AsyncMqttPublisher":
+        if self._running:
+            return self
+        self._previous_on_publish = self.client.on_publish
+        self.client.on_publish = self._on_publish
+        self.client.max_inflight_messages_set(max(self.max_in_flight, 1))
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="mqtt-async-publisher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, flush_timeout: float = ACK_TIMEOUT) -> bool:
+        """Wait (up to ``flush_timeout``) for the queue to be sent and acknowledged, then stop. True when flushed."""
+        deadline = time.monotonic() + flush_timeout
+        with self._cond:
+            while (self._queue or self._in_flight) and time.monotonic() < deadline:
+                self._cond.wait(timeout=min(0.1, max(deadline - time.monotonic(), 0)))
+            flushed = not self._queue and not self._in_flight
+            self._running = False
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout=5)
+        self.client.on_publish = self._previous_on_publish
+        if not flushed:
+            logger.warning(f"Async publisher stopped with {len(self._queue)} queued / {len(self._in_flight)} in flight")
+        return flushed
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def publish(
+        self,
+        payload: dict | str,
+        topic: str = F1_LIVE_DATA_TOPIC,
+        qos: int = 1,
+        retain: bool | None = None,
+        properties: Properties | None = None,
+        codec: str | None = None,
+        coalesce: bool = False,
+        supersedes: tuple[str, ...] = (),
+    ) -> None:
+        """Queue a message (same arguments as publish()) and return right away."""
+        body, properties, codec, _ = _prepare_payload(payload, properties, codec)
+        message = {
+            "topic": topic,
+            "body": body,
+            "qos": qos,
+            "retain": RETAIN_LAST_MESSAGE if retain is None else retain,
+            "properties": properties,
+        }
+        with self._cond:
+            if coalesce or supersedes:
+                stale_topics = set(supersedes) | ({topic} if coalesce else set())
+                kept = [m for m in self._queue if m["topic"] not in stale_topics]
+                self._counts["coalesced"] += len(self._queue) - len(kept)
+                self._queue = deque(kept)
+            if len(self._queue) >= self.max_queued:
+                dropped = self._queue.popleft()
+                self._counts["dropped"] += 1
+                logger.warning(f"Async publisher queue full, dropped the oldest message for [{dropped['topic']}]")
+            self._queue.append(message)
+            self._cond.notify_all()
+
+    def metrics(self) -> dict:
+        with self._cond:
+            latencies = sorted(self._ack_latencies)
+            metrics = {"queue_depth": len(self._queue), "in_flight": len(self._in_flight), **self._counts}
+
+        def percentile(q: float) -> float | None:
+            return round(latencies[min(int(q * len(latencies)), len(latencies) - 1)] * 1000, 1) if latencies else None
+
+        metrics["ack_ms_p50"] = percentile(0.5)
+        metrics["ack_ms_p95"] = percentile(0.95)
+        metrics["ack_ms_max"] = round(latencies[-1] * 1000, 1) if latencies else None
+        return metrics
+
+    def _expire(self, now: float) -> None:
+        for mid, sent_at in list(self._in_flight.items()):
+            if now - sent_at > self.ack_timeout:
+                del self._in_flight[mid]
+                self._counts["ack_timeouts"] += 1
+        for mid, acked_at in list(self._early_acks.items()):
+            if now - acked_at > self.ack_timeout:
+                del self._early_acks[mid]  # ack of a message this publisher did not send
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while self._running and not (self._queue and len(self._in_flight) < self.max_in_flight):
+                    self._expire(time.monotonic())
+                    self._cond.wait(timeout=0.1)
+                if not self._running:
+                    return
+                message = self._queue.popleft()
+            self._send(message)
+
+    def _send(self, message: dict) -> None:
+        sent_at = time.monotonic()
+        try:
+            info = self.client.publish(
+                message["topic"], message["body"], qos=message["qos"], retain=message["retain"],
+                properties=message["properties"],
+            )
+        except Exception as e:
+            logger.error(f"Failed to publish to [{message['topic']}]: {e}")
+            with self._cond:
+                self._counts["errors"] += 1
+                self._cond.notify_all()
+            return
+        # not connected: paho keeps the message and sends it after the reconnect
+        if info.rc not in (mqtt.MQTT_ERR_SUCCESS, mqtt.MQTT_ERR_NO_CONN):
+            logger.error(f"Failed to publish to [{message['topic']}]: {mqtt.error_string(info.rc)}")
+            with self._cond:
+                self._counts["errors"] += 1
+                self._cond.notify_all()
+            return
+        with self._cond:
+            self._counts["sent"] += 1
+            acked_at = self._early_acks.pop(info.mid, None)
+            if acked_at is None:
+                self._in_flight[info.mid] = sent_at
+            else:
+                self._ack(acked_at - sent_at)
+
+    def _ack(self, latency: float) -> None:
+        self._counts["acked"] += 1
+        self._ack_latencies.append(latency)
+        self._cond.notify_all()
+
+    def _on_publish(self, client, userdata, mid, reason_code=None, properties=None):
+        if self._previous_on_publish:
+            self._previous_on_publish(client, userdata, mid, reason_code, properties)
+        now = time.monotonic()
+        with self._cond:
+            if getattr(reason_code, "is_failure", False):
+                logger.error(f"Broker rejected message mid={mid}: {reason_code}")
+                self._counts["errors"] += 1
+            sent_at = self._in_flight.pop(mid, None)
+            if sent_at is not None:
+                self._ack(now - sent_at)
+            else:
+                self._early_acks[mid] = now
+
+
 def get_subscription_info() -> dict:
     """
     Get information about message retention and subscriptions.
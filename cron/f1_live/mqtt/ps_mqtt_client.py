@@ -16,10 +16,15 @@ python ps_mqtt_client.py --topic "f1/#"
 
 # Subscribe with a custom QoS
 python ps_mqtt_client.py --topic f1/live --qos 0
+
+# Compare the payload codecs (size, encode / decode time) on a saved live timing array
+python ps_mqtt_client.py --benchmark
+python ps_mqtt_client.py --benchmark --sample ../f1_live_data_output.json --iterations 5000
 """
 
 import argparse
 import json
+import os
 import sys
 import time
 import signal
@@ -32,8 +37,16 @@ from ps_mqtt import (
     F1_LAP_BY_LAP_TOPIC,
     MQTT_ENDPOINT,
     MQTT_PORT,
+    available_codecs,
     build_client,
+    decode_message,
+    decode_payload,
+    encode_payload,
+    message_codec,
 )
+from live_delta import LiveDeltaEncoder
+
+DEFAULT_SAMPLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "f1_live_data_output.json")
 
 # ── Logger setup ───────────────────────────────────────────────────────────────
 logger.remove()
@@ -51,31 +64,110 @@ _client: mqtt.Client | None = None
 def on_message(client: mqtt.Client, userdata: dict, message: mqtt.MQTTMessage) -> None:
     """
     Called every time a message arrives on a subscribed topic.
-    Attempts to parse the payload as JSON; falls back to raw string.
+    Decodes the payload with the codec the message advertises; falls back to raw string.
     """
-    raw = message.payload.decode("utf-8")
+    codec = message_codec(message)
 
     try:
-        payload = json.loads(raw)
+        payload = decode_message(message)
         logger.info(
             f"\n{'─' * 60}\n"
             f"  Topic   : {message.topic}\n"
             f"  QoS     : {message.qos}\n"
             f"  Retain  : {message.retain}\n"
+            f"  Codec   : {codec} ({len(message.payload)} bytes)\n"
             f"  Payload :\n{json.dumps(payload, indent=4, ensure_ascii=False)}\n"
             f"{'─' * 60}"
         )
-    except json.JSONDecodeError:
+    except Exception:
         logger.info(
             f"\n{'─' * 60}\n"
             f"  Topic   : {message.topic}\n"
             f"  QoS     : {message.qos}\n"
             f"  Retain  : {message.retain}\n"
-            f"  Payload : {raw}\n"
+            f"  Codec   : {codec} (could not decode)\n"
+            f"  Payload : {message.payload.decode('utf-8', 'replace')}\n"
             f"{'─' * 60}"
         )
 
 
+# ── Codec benchmark ───────────────────────────────────────────────────────────
+def _time_per_call(fn, iterations: int) -> float:
+    """Best of 3 runs, in microseconds per call."""
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        best = min(best, time.perf_counter() - start)
+    return best / iterations * 1e6
+
+
+def benchmark_codecs(payload, iterations: int = 2000) -> list[dict]:
+    """Size and encode / decode time of ``payload`` with every available codec (checks the round trip too)."""
+    results = []
+    for codec in available_codecs():
+        body = encode_payload(payload, codec)
+        if decode_payload(body, codec) != payload:
+            raise ValueError(f"{codec}: decoded payload differs from the original")
+        results.append({
+            "codec": codec,
+            "bytes": len(body),
+            "encode_us": _time_per_call(lambda: encode_payload(payload, codec), iterations),
+            "decode_us": _time_per_call(lambda: decode_payload(body, codec), iterations),
+        })
+    return results
+
+
+# payloads the codecs must give back unchanged: keys equal to the short keys of the compact codec, its table
+# markers, escape prefix and nested record lists
+ROUND_TRIP_CASES = [
+    {"t": 1, "a": 2, "Team": 3},
+    {"$k": ["x"], "$r": [[1]]},
+    [{"$k": 1, "~a": 2}, {"$k": 3, "~a": 4}],
+    {"~": "x", "~~t": None, "fn": [{"p": 1, "Pos": "2"}, {"p": 3, "Pos": "4"}]},
+    [{"Pos": "1", "Gap": "+0.1"}, {"Pos": "2"}],
+    [],
+    {},
+]
+
+
+def check_round_trips(cases: list = ROUND_TRIP_CASES) -> None:
+    """Raise when a codec does not give one of ``cases`` back unchanged."""
+    for codec in available_codecs():
+        for payload in cases:
+            decoded = decode_payload(encode_payload(payload, codec), codec)
+            if decoded != payload:
+                raise ValueError(f"{codec}: {payload!r} decoded as {decoded!r}")
+
+
+def _sample_delta(records: list[dict]) -> dict:
+    """A typical f1/live/delta payload: the gaps of three drivers changed."""
+    encoder = LiveDeltaEncoder()
+    encoder.encode(records)
+    changed = [dict(r) for r in records]
+    for row in changed[1:4]:
+        row["Gap"] = f"{row.get('Gap')}1"
+    return encoder.encode(changed)[0]["payload"]
+
+
+def run_benchmark(sample_path: str, iterations: int) -> None:
+    with open(sample_path, "r", encoding="utf-8") as f:
+        records = json.load(f)
+    check_round_trips()
+
+    for name, payload in (("keyframe", records), ("delta", _sample_delta(records))):
+        results = benchmark_codecs(payload, iterations)
+        json_size = results[0]["bytes"]
+        lines = [f"{'codec':<14} {'bytes':>7} {'vs json':>8} {'encode µs':>10} {'decode µs':>10}"]
+        for r in results:
+            lines.append(
+                f"{r['codec']:<14} {r['bytes']:>7} {r['bytes'] / json_size:>7.0%} "
+                f"{r['encode_us']:>10.1f} {r['decode_us']:>10.1f}"
+            )
+        logger.info(f"{name} payload ({len(records)} drivers, {iterations} iterations):\n" + "\n".join(lines))
+
+
 # ── Subscription callback (runs on successful connect) ────────────────────────
 def on_connect_and_subscribe(
     client: mqtt.Client,
@@ -132,8 +224,28 @@ def main() -> None:
         default=f"ps-subscriber-{int(time.time())}",
         help="MQTT client ID (default: auto-generated)",
     )
+    parser.add_argument(
+        "--benchmark",
+        action="store_true",
+        help="Compare the payload codecs on --sample instead of subscribing",
+    )
+    parser.add_argument(
+        "--sample",
+        default=DEFAULT_SAMPLE,
+        help="Live timing JSON array used by --benchmark (default: ../f1_live_data_output.json)",
+    )
+    parser.add_argument(
+        "--iterations",
+        type=int,
+        default=2000,
+        help="Encode / decode calls per codec and run for --benchmark (default: 2000)",
+    )
     args = parser.parse_args()
 
+    if args.benchmark:
+        run_benchmark(args.sample, args.iterations)
+        return
+
     # Register SIGINT / SIGTERM handlers
     signal.signal(signal.SIGINT, _shutdown)
     signal.signal(signal.SIGTERM, _shutdown)
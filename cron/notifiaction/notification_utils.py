@@ -6,10 +6,10 @@ import asyncio
 import firebase_admin
 from firebase_admin import credentials, messaging
 from dotenv import load_dotenv
-from googletrans import Translator
 from loguru import logger
 
 from cron.notifiaction.notification_message_utils import get_title_body_for_notification
+from cron.translation.translation_service import get_translation_service
 from cron.utils import locales
 
 topic_prefix_f1 = "ps_"
@@ -93,23 +93,18 @@ async def send_notification_to_topic(is_f1: bool, is_prod: bool, title: str, bod
     
     __init_firebase_admin(is_prod=is_prod)
     logger.debug(f"firebase init done")
-    translator = Translator()
     
     # Send notification for default (en) locale
     __send_notification_to_topic_lang(is_f1, title, body, "en")
 
+    # all locales are translated concurrently (and cached), zh -> zh-CN is mapped by the google backend
+    translations = await get_translation_service().translate_all([title, body], locales)
     for locale in locales:
         try:
-            if locale == "zh":
-                translate_locale = "zh-CN"
-            else:
-                translate_locale = locale
-            
-            translated_title_obj = translator.translate(title, dest=translate_locale)
-            translated_desc_obj = translator.translate(body, dest=translate_locale)
-
-            translated_title = translated_title_obj.text if translated_title_obj else None
-            translated_desc = translated_desc_obj.text if translated_desc_obj else None
+            if locale not in translations:
+                logger.warning(f"Skipping {locale} translation for this notification.")
+                continue
+            translated_title, translated_desc = translations[locale]
             
             if not translated_title or not translated_desc:
                 logger.warning(f"Translation returned None for locale {locale}: title={translated_title}, body={translated_desc}")
@@ -0,0 +1,109 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Iterator
+
+from loguru import logger
+
+from cron.strapi_api.graphql_batch import run_batched_mutation
+
+#----------------------------------------------------------------------------------------------------------------
+# bulk deletion pipeline used by clean_rss.py
+#----------------------------------------------------------------------------------------------------------------
+# producer  : pages old rows by a stable id cursor (id > last seen id), so deletes never shift the next page
+# workers   : bounded thread pool, each worker sends one batched (aliased) delete mutation
+# rate limit: caps the number of delete requests per second sent to strapi
+DELETE_PAGE_SIZE = 100
+DELETE_BATCH_SIZE = 25
+DELETE_PARALLELISM = 8
+DELETE_RATE_LIMIT = 10  # delete requests per second, 0 disables the limit
+
+
+class RateLimiter:
+    """Spaces calls to acquire() at least 1 / rate_per_second apart (thread safe)."""
+
+    def __init__(self, rate_per_second: float):
+        self.interval = 1.0 / rate_per_second if rate_per_second and rate_per_second > 0 else 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            wait_for = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+        if wait_for > 0:
+            time.sleep(wait_for)
+
+
+def iter_ids_by_cursor(fetch_page: Callable[[int, int], list], page_size: int = DELETE_PAGE_SIZE) -> Iterator[list]:
+    """
+    Yield pages of ids from ``fetch_page(after_id, limit)`` until an empty page is returned.
+
+    ``fetch_page`` must return rows sorted by id ascending and filtered on ``id > after_id``.
+    """
+    after_id = 0
+    while True:
+        rows = fetch_page(after_id, page_size)
+        if not rows:
+            return
+        ids = [row["id"] for row in rows]
+        yield ids
+        after_id = max(int(i) for i in ids)
+
+
+def delete_ids_concurrently(
+        is_f1_feed: bool,
+        delete_mutation: str,
+        id_pages: Iterator[list],
+        batch_size: int = DELETE_BATCH_SIZE,
+        parallelism: int = DELETE_PARALLELISM,
+        rate_limit: float = DELETE_RATE_LIMIT,
+        label: str = "rows",
+) -> tuple[int, int]:
+    """
+    Delete every id yielded by ``id_pages`` using ``delete_mutation`` (a single ``$id`` mutation from
+    api_queries.py), ``batch_size`` ids per request and at most ``parallelism`` requests in flight.
+
+    Returns:
+        (deleted, failed) counts
+    """
+    limiter = RateLimiter(rate_limit)
+    deleted = 0
+    failed = 0
+
+    def _delete_batch(ids: list) -> tuple[int, int]:
+        results = run_batched_mutation(is_f1_feed, delete_mutation, [{"id": i} for i in ids], batch_size=len(ids))
+        ok = sum(1 for r in results if r is not None)
+        return ok, len(ids) - ok
+
+    def _collect(done) -> None:
+        nonlocal deleted, failed
+        for future in done:
+            try:
+                ok, ko = future.result()
+            except Exception as e:
+                logger.error(f"delete batch failed: {e}")
+                continue
+            deleted += ok
+            failed += ko
+
+    with ThreadPoolExecutor(max_workers=parallelism, thread_name_prefix="delete") as pool:
+        in_flight = set()
+        for ids in id_pages:
+            logger.info(f"queueing {len(ids)} {label} for deletion")
+            for start in range(0, len(ids), batch_size):
+                # bounded queue: never keep more than 2x parallelism batches waiting on the pool
+                while len(in_flight) >= parallelism * 2:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    _collect(done)
+                limiter.acquire()
+                in_flight.add(pool.submit(_delete_batch, ids[start:start + batch_size]))
+
+        done, _ = wait(in_flight)
+        _collect(done)
+
+    logger.info(f"deleted {deleted} {label}, {failed} failed")
+    return deleted, failed
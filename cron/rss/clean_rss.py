@@ -1,3 +1,5 @@
+from cron.rss.bulk_delete import iter_ids_by_cursor, delete_ids_concurrently, DELETE_PAGE_SIZE
+from cron.strapi_api.api_queries import mutation_delete_feed, mutation_delete_vote, mutation_delete_vote_count
 from cron.strapi_api.apis import *
 from datetime import datetime, timedelta, timezone
 from dotenv import load_dotenv
@@ -6,85 +8,48 @@ from loguru import logger
 # Load environment variables from .env file - this is for local setup of token
 load_dotenv()
 
-def fetch_and_clean_feeds(is_f1_feed: bool, lang: str = "en"):
-  # Cutoff: 20 days ago
+def get_cutoff_date_str() -> str:
+  # Cutoff: 10 days ago
   cutoff_date = datetime.now(timezone.utc) - timedelta(days=10)
 
   # Format as "YYYY-MM-DDTHH:MM:SS.sssZ"
-  cutoff_date_str = cutoff_date.strftime("%Y-%m-%dT%H:%M:%S.000Z")
-
-  start = 0
-  limit = 50
-  total_deleted = 0
+  return cutoff_date.strftime("%Y-%m-%dT%H:%M:%S.000Z")
 
-  while True:
-    feeds = fetch_old_feeds(is_f1_feed, cutoff_date_str, start=start, limit=limit, lang= lang)
-    if not feeds:
-      break
 
-    for feed in feeds:
-      fid = feed["id"]
-      logger.info(f"Deleting feed {fid} ...")
-      delete_feed(is_f1_feed, fid)
-      total_deleted += 1
+def fetch_and_clean_feeds(is_f1_feed: bool, lang: str = "en"):
+  cutoff_date_str = get_cutoff_date_str()
 
-    start += limit
+  id_pages = iter_ids_by_cursor(
+    lambda after_id, limit: fetch_old_feeds(is_f1_feed, cutoff_date_str, after_id=after_id, limit=limit, lang=lang),
+    page_size=DELETE_PAGE_SIZE,
+  )
+  total_deleted, _ = delete_ids_concurrently(is_f1_feed, mutation_delete_feed, id_pages, label=f"feeds [{lang}]")
 
   logger.info(f"Finished cleanup. Deleted {total_deleted} old feeds for locale {lang}")
 
 
 def fetch_and_clean_votes(is_f1_feed: bool):
-  # Cutoff: 20 days ago
-  cutoff_date = datetime.now(timezone.utc) - timedelta(days=10)
-
-  # Format as "YYYY-MM-DDTHH:MM:SS.sssZ"
-  cutoff_date_str = cutoff_date.strftime("%Y-%m-%dT%H:%M:%S.000Z")
-
-  start = 0
-  limit = 50
-  total_deleted = 0
-
-  while True:
-    votes = fetch_old_votes(is_f1_feed, cutoff_date_str, start=start, limit=limit)
-    if not votes:
-      break
+  cutoff_date_str = get_cutoff_date_str()
 
-    for vote in votes:
-      fid = vote["id"]
-      logger.info(f"Deleting vote {fid} ...")
-      delete_vote(is_f1_feed, fid)
-      total_deleted += 1
-
-    start += limit
+  id_pages = iter_ids_by_cursor(
+    lambda after_id, limit: fetch_old_votes(is_f1_feed, cutoff_date_str, after_id=after_id, limit=limit),
+    page_size=DELETE_PAGE_SIZE,
+  )
+  total_deleted, _ = delete_ids_concurrently(is_f1_feed, mutation_delete_vote, id_pages, label="votes")
 
   logger.info(f"Finished cleanup. Deleted {total_deleted} old votes.")
 
 
 def fetch_and_clean_vote_counts(is_f1_feed: bool):
-  # Cutoff: 20 days ago
-  cutoff_date = datetime.now(timezone.utc) - timedelta(days=10)
-
-  # Format as "YYYY-MM-DDTHH:MM:SS.sssZ"
-  cutoff_date_str = cutoff_date.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+  cutoff_date_str = get_cutoff_date_str()
 
-  start = 0
-  limit = 50
-  total_deleted = 0
+  id_pages = iter_ids_by_cursor(
+    lambda after_id, limit: fetch_old_vote_counts(is_f1_feed, cutoff_date_str, after_id=after_id, limit=limit),
+    page_size=DELETE_PAGE_SIZE,
+  )
+  total_deleted, _ = delete_ids_concurrently(is_f1_feed, mutation_delete_vote_count, id_pages, label="vote counts")
 
-  while True:
-    votes = fetch_old_vote_counts(is_f1_feed, cutoff_date_str, start=start, limit=limit)
-    if not votes:
-      break
-
-    for vote in votes:
-      fid = vote["id"]
-      logger.info(f"Deleting vote count {fid} ...")
-      delete_vote_count(is_f1_feed, fid)
-      total_deleted += 1
-
-    start += limit
-
-  logger.info(f"Finished cleanup. Deleted {total_deleted} old votes.")
+  logger.info(f"Finished cleanup. Deleted {total_deleted} old vote counts.")
 
 
 if __name__ == "__main__":
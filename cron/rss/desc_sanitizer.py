@@ -0,0 +1,80 @@
+import html
+import json
+import os
+import re
+
+#----------------------------------------------------------------------------------------------------------------
+# feed description sanitiser
+#----------------------------------------------------------------------------------------------------------------
+# precompiled patterns, applied once per summary:
+#   - the text of <a>, <script>, <style> and <figcaption> (image credits) is dropped, like the link text before
+#   - every other tag (and CDATA / comment markers) is replaced by a space, entities are decoded
+#   - whitespace is collapsed and the text is cut at DESC_MAX_LENGTH on a word boundary
+# html.parser's event API was measured too, it is ~10x slower than this on the fixture corpus
+# (python -m cron.rss.desc_sanitizer).
+DESC_MAX_LENGTH = 1000
+DESC_ELLIPSIS = "…"
+
+_SKIP_TEXT_RE = re.compile(r"<(a|script|style|figcaption)\b[^>]*>.*?</\1\s*>", re.IGNORECASE | re.DOTALL)
+_TAG_RE = re.compile(r"<!\[CDATA\[|\]\]>|<!--.*?-->|</?[a-zA-Z!][^>]*>", re.DOTALL)
+
+
+def truncate_text(text: str, max_length: int) -> str:
+  """Cut ``text`` to ``max_length`` characters on a word boundary, adding an ellipsis."""
+  if len(text) <= max_length:
+    return text
+  cut = text[:max_length - len(DESC_ELLIPSIS)]
+  if " " in cut:
+    cut = cut[:cut.rindex(" ")]
+  return cut.rstrip(" ,.;:-") + DESC_ELLIPSIS
+
+
+def sanitize_description(description: str, max_length: int = DESC_MAX_LENGTH) -> str:
+  """Plain text of an RSS summary: no markup, no link text, single spaces, at most ``max_length`` chars."""
+  if not description:
+    return ""
+  text = description
+  if "<" in text:
+    text = _TAG_RE.sub(" ", _SKIP_TEXT_RE.sub(" ", text))
+  if "&" in text:
+    text = html.unescape(text)
+  # str.split() collapses every kind of whitespace (incl. &nbsp;) and is much cheaper than a \s+ substitution
+  return truncate_text(" ".join(text.split()), max_length)
+
+
+if __name__ == "__main__":
+  # micro benchmark: python -m cron.rss.desc_sanitizer
+  import timeit
+
+  def legacy_process_feed_desc(description: str) -> str:
+    # process_feed_desc as it was before this module
+    if not description:
+      return ""
+    description = re.sub(r'<img[^>]*>', '', description, flags=re.IGNORECASE)
+    description = re.sub(r'<br\s*/?>', '', description, flags=re.IGNORECASE)
+    description = re.sub(r'<a\b[^>]*>.*?</a>', '', description, flags=re.IGNORECASE | re.DOTALL)
+    return description.strip()
+
+  def soup_get_text(description: str) -> str:
+    # what a BeautifulSoup based strip costs, for reference
+    from bs4 import BeautifulSoup
+    return " ".join(BeautifulSoup(description, "html.parser").get_text(" ").split())
+
+  fixture = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "feed_summaries.json")
+  with open(fixture, "r", encoding="utf-8") as f:
+    summaries = json.load(f)
+
+  rounds = 200
+  candidates = (
+    ("legacy regex", legacy_process_feed_desc),
+    ("bs4", soup_get_text),
+    ("sanitizer", sanitize_description),
+  )
+  for name, fn in candidates:
+    seconds = min(timeit.repeat(lambda: [fn(s) for s in summaries], number=rounds, repeat=5))
+    per_item = seconds / (rounds * len(summaries)) * 1e6
+    print(f"{name:>12}: {per_item:8.2f} us / summary ({len(summaries)} summaries x {rounds} rounds)")
+
+  for summary in summaries[:3]:
+    print("-" * 80)
+    print(sanitize_description(summary))
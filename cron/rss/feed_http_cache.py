@@ -0,0 +1,91 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+from loguru import logger
+
+from cron.utils import get_cache_dir
+
+#----------------------------------------------------------------------------------------------------------------
+# HTTP validator cache for RSS sources
+#----------------------------------------------------------------------------------------------------------------
+# one JSON file per series, keyed by feed url:
+#   {"<url>": {"etag": "...", "last_modified": "...", "content_hash": "<sha256>"}}
+#
+# the fetch sends If-None-Match / If-Modified-Since from here. A 304, or a 200 whose body hashes the same as last
+# time (servers without validators), means the source did not change and is skipped entirely.
+# New validators are only staged during the run and written by save() once the strapi config was updated,
+# so a failed run re-processes the same documents next time.
+FEED_CACHE_DIR = "rss"
+
+
+def content_hash(content: bytes) -> str:
+  return hashlib.sha256(content).hexdigest()
+
+
+class FeedValidatorCache:
+  """Persistent ETag / Last-Modified / content hash store for the feeds of one series."""
+
+  def __init__(self, is_f1_feed: bool, path: str | None = None):
+    self.path = path or os.path.join(get_cache_dir(FEED_CACHE_DIR), f"feed_validators_{'f1' if is_f1_feed else 'moto'}.json")
+    self._entries = self._load()
+    self._staged = {}
+    self._lock = threading.Lock()
+
+  def _load(self) -> dict:
+    try:
+      with open(self.path, "r", encoding="utf-8") as f:
+        return json.load(f)
+    except FileNotFoundError:
+      return {}
+    except (OSError, ValueError) as e:
+      logger.warning(f"ignoring unreadable feed validator cache {self.path}: {e}")
+      return {}
+
+  def request_headers(self, feed_url: str) -> dict:
+    """Conditional GET headers for ``feed_url`` (empty when nothing is cached yet)."""
+    entry = self._entries.get(feed_url) or {}
+    headers = {}
+    if entry.get("etag"):
+      headers["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"):
+      headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+  def is_unchanged(self, feed_url: str, status_code: int, content: bytes | None) -> bool:
+    """True for a 304, or for a 200 whose body is byte-identical to the last processed one."""
+    if status_code == 304:
+      return True
+    entry = self._entries.get(feed_url)
+    return bool(entry and content is not None and entry.get("content_hash") == content_hash(content))
+
+  def stage(self, feed_url: str, response_headers, content: bytes) -> None:
+    """Remember the validators of a changed document; written on save()."""
+    with self._lock:
+      self._staged[feed_url] = {
+        "etag": response_headers.get("ETag"),
+        "last_modified": response_headers.get("Last-Modified"),
+        "content_hash": content_hash(content),
+      }
+
+  def save(self) -> None:
+    """Commit the staged validators to disk (atomic replace)."""
+    with self._lock:
+      if not self._staged:
+        return
+      self._entries.update(self._staged)
+      self._staged = {}
+      entries = dict(self._entries)
+
+    directory = os.path.dirname(self.path)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".feed_validators_", suffix=".tmp")
+    try:
+      with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(entries, f, indent=2, sort_keys=True)
+      os.replace(tmp_path, self.path)
+    except OSError as e:
+      logger.error(f"failed to write feed validator cache {self.path}: {e}")
+      if os.path.exists(tmp_path):
+        os.remove(tmp_path)
@@ -0,0 +1,164 @@
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta, datetime, timezone
+
+import feedparser
+import requests
+from loguru import logger
+
+from cron.rss.feed_http_cache import FeedValidatorCache
+from cron.rss.feed_watermarks import FeedWatermarkStore, select_new_entries
+from cron.strapi_api.apis import get_config_for_feeds, update_config_for_feeds, build_feed_map, post_feed_map
+from cron.utils import get_feed_urls, url_to_id
+
+#----------------------------------------------------------------------------------------------------------------
+# async RSS ingestion pipeline
+#----------------------------------------------------------------------------------------------------------------
+#   conditional fetch (all sources concurrently) -> parse (thread pool) -> filter new entries
+#       -> [queue] enrich -> [queue] post (english first, then every locale translated and posted concurrently)
+#
+# every stage is connected by a bounded asyncio.Queue, so a slow source or a slow locale only holds up
+# its own items and a run takes about as long as the slowest feed instead of the sum of all feeds.
+# Sources that answer 304 / an identical body stop right after the fetch, and when no source changed the strapi
+# config is neither read nor written.
+FETCH_TIMEOUT = 20  # seconds
+PARSE_WORKERS = 4
+ENRICH_WORKERS = 4
+POST_WORKERS = 2
+# threads behind asyncio.to_thread (fetches, translations, strapi posts). asyncio's default is sized for CPU work
+# (cpu_count + 4), which serializes the per-locale fan-out on small CI runners.
+IO_THREADS = 32
+QUEUE_SIZE = 20
+
+FEED_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+}
+
+_STOP = object()
+_feed_session = requests.Session()
+
+
+def fetch_feed(feed_url: str, conditional_headers: dict | None = None) -> requests.Response | None:
+  """Download the raw feed document (runs in a worker thread). Returns the 200/304 response or None."""
+  headers = dict(FEED_HEADERS, **(conditional_headers or {}))
+  try:
+    response = _feed_session.get(feed_url, headers=headers, timeout=FETCH_TIMEOUT)
+  except requests.exceptions.RequestException as e:
+    logger.error(f"Failed to fetch feed: {feed_url} - {e}")
+    return None
+  if response.status_code not in (200, 304):
+    logger.error(f"Failed to fetch feed: {response.status_code} - {feed_url}")
+    return None
+  return response
+
+
+async def _drain(queue: asyncio.Queue, workers: int, handle, downstream: asyncio.Queue | None) -> None:
+  """Run ``workers`` consumers of ``queue`` until each one receives a stop marker."""
+  async def _worker():
+    while True:
+      item = await queue.get()
+      if item is _STOP:
+        return
+      try:
+        result = await handle(item)
+      except Exception as e:
+        logger.error(f"feed pipeline stage failed: {type(e).__name__}: {e}")
+        continue
+      if downstream is not None and result is not None:
+        await downstream.put(result)
+
+  await asyncio.gather(*(_worker() for _ in range(workers)))
+
+
+async def run_feed_pipeline(is_f1_feed: bool) -> dict:
+  """Fetch, filter, enrich, translate and post all configured feeds. Returns the new feed config map."""
+  loop = asyncio.get_running_loop()
+  loop.set_default_executor(ThreadPoolExecutor(max_workers=IO_THREADS, thread_name_prefix="feed-io"))
+  validator_cache = FeedValidatorCache(is_f1_feed)
+  watermarks = FeedWatermarkStore(is_f1_feed)
+  feed_update_map = {}
+  config_task = None
+
+  async def get_config() -> dict:
+    # loaded lazily by the first changed source, so a run where every source is unchanged never hits strapi
+    nonlocal config_task
+    if config_task is None:
+      config_task = asyncio.ensure_future(asyncio.to_thread(get_config_for_feeds, is_f1_feed))
+    return await config_task
+
+  enrich_queue: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+  post_queue: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+
+  async def produce(feed_url: str, parse_pool: ThreadPoolExecutor) -> None:
+    # get feed source and last feed time from config
+    feed_source = url_to_id[feed_url]
+    response = await asyncio.to_thread(fetch_feed, feed_url, validator_cache.request_headers(feed_url))
+    if response is None:
+      return
+    if validator_cache.is_unchanged(feed_url, response.status_code, response.content):
+      logger.info(f"source: {feed_source} - not modified ({response.status_code}), skipping")
+      return
+
+    config_date = (await get_config()).get(feed_source)
+    feeds = await loop.run_in_executor(parse_pool, feedparser.parse, response.content)
+
+    # Checks for None, empty string from server config, if null or empty then config date will be 1 day back
+    if not config_date:
+      config_date = (datetime.now(timezone.utc) - timedelta(days=1)).isoformat()
+    logger.info(f"source: {feed_source} - date: {config_date} - url: {feed_url} - size: {len(feeds.entries)}")
+
+    watermark = watermarks.get(feed_source, config_date, feeds.entries)
+    new_entries, feed_date = select_new_entries(list(feeds.entries), watermark)
+    logger.info(f"source: {feed_source} - new entries: {len(new_entries)}")
+    for feed in new_entries:
+      logger.info(f"processing feed title: {feed.title}")
+      await enrich_queue.put((feed, feed_source))
+    feed_update_map[feed_source] = feed_date
+    validator_cache.stage(feed_url, response.headers, response.content)
+
+  async def enrich(item):
+    feed, feed_source = item
+    return await asyncio.to_thread(build_feed_map, feed, feed_source)
+
+  async def post(feed_map):
+    await post_feed_map(is_f1_feed, feed_map)
+
+  async def producers(parse_pool: ThreadPoolExecutor) -> None:
+    feed_urls = get_feed_urls(is_f1_feed)
+    results = await asyncio.gather(*(produce(url, parse_pool) for url in feed_urls), return_exceptions=True)
+    for feed_url, result in zip(feed_urls, results):
+      if isinstance(result, Exception):
+        logger.error(f"Failed to process feed: {feed_url} - {type(result).__name__}: {result}")
+    for _ in range(ENRICH_WORKERS):
+      await enrich_queue.put(_STOP)
+
+  async def stage(queue, workers, handle, downstream, downstream_workers):
+    await _drain(queue, workers, handle, downstream)
+    if downstream is not None:
+      for _ in range(downstream_workers):
+        await downstream.put(_STOP)
+
+  with ThreadPoolExecutor(max_workers=PARSE_WORKERS, thread_name_prefix="feed-parse") as parse_pool:
+    await asyncio.gather(
+      producers(parse_pool),
+      stage(enrich_queue, ENRICH_WORKERS, enrich, post_queue, POST_WORKERS),
+      stage(post_queue, POST_WORKERS, post, None, 0),
+    )
+
+  if config_task is None:
+    logger.info("no feed source changed, strapi config left untouched")
+    return feed_update_map
+
+  # unchanged and failed sources keep their previous value, so the next run retries the failed ones
+  config = await config_task
+  feed_update_map = {
+    url_to_id[feed_url]: feed_update_map.get(url_to_id[feed_url], config.get(url_to_id[feed_url]))
+    for feed_url in get_feed_urls(is_f1_feed)
+  }
+
+  json_str = json.dumps(feed_update_map)
+  if await asyncio.to_thread(update_config_for_feeds, is_f1_feed, json_str):
+    validator_cache.save()
+    watermarks.save()
+  return feed_update_map
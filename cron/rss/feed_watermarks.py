@@ -0,0 +1,168 @@
+import json
+import os
+import tempfile
+import threading
+from collections import deque
+from datetime import datetime, timezone
+
+from loguru import logger
+
+from cron.utils import get_cache_dir, get_epoch, parse_datetime_string
+
+#----------------------------------------------------------------------------------------------------------------
+# per source watermark: last published epoch + recently seen guids
+#----------------------------------------------------------------------------------------------------------------
+# an entry is new when its guid was never seen and (for dated feeds) it is not older than the watermark.
+# The guid history is a bounded ring buffer with a set index, so the check is O(1) and an entry that was
+# already posted is never posted again, even when its date changes or the last stored guid drops off the feed.
+#
+# stored next to the feed validators (one JSON file per series). When a source has no local state yet
+# (first run, evicted CI cache) it is seeded from the value kept in the strapi config, which still gets the
+# last pubDate / guid exactly as before.
+WATERMARK_CACHE_DIR = "rss"
+WATERMARK_GUID_HISTORY = 1000
+
+
+class FeedWatermark:
+  """Last published epoch and the most recent ``max_guids`` guids of one source."""
+
+  def __init__(self, epoch: int = 0, guids=(), seeded_guid: str | None = None, max_guids: int = WATERMARK_GUID_HISTORY):
+    self.epoch = epoch
+    self._guids = deque(maxlen=max_guids)
+    self._index = set()
+    # guid from the strapi config of a source without local history (undated feeds only)
+    self.seeded_guid = seeded_guid
+    for guid in guids:
+      self.add(guid)
+
+  @classmethod
+  def from_config(cls, config_value: str | None, is_dated: bool) -> "FeedWatermark":
+    """Seed a watermark from the value stored in the strapi config (a pubDate or, for undated feeds, a guid)."""
+    if not config_value:
+      return cls()
+    if is_dated:
+      return cls(epoch=get_epoch(config_value))
+    return cls(seeded_guid=config_value)
+
+  def has_history(self) -> bool:
+    return bool(self._index)
+
+  def add(self, guid: str) -> None:
+    if guid in self._index:
+      return
+    if len(self._guids) == self._guids.maxlen:
+      self._index.discard(self._guids[0])
+    self._guids.append(guid)
+    self._index.add(guid)
+
+  def is_new(self, guid: str, epoch: int | None) -> bool:
+    if guid in self._index:
+      return False
+    if epoch is None:
+      return True
+    # same second as the watermark is only new when we can tell it apart by guid
+    return epoch > self.epoch or (epoch == self.epoch and self.has_history())
+
+  def to_json(self) -> dict:
+    return {"epoch": self.epoch, "guids": list(self._guids)}
+
+  @classmethod
+  def from_json(cls, data: dict) -> "FeedWatermark":
+    return cls(epoch=int(data.get("epoch") or 0), guids=data.get("guids") or [])
+
+
+def _entry_epoch(entry) -> int:
+  """The entry's date is parsed once and kept on it as ``published_dt`` (reused by build_feed_map)."""
+  if "published_dt" not in entry:
+    published = entry["published"] = entry["published"].replace("GMT", "+0000")
+    try:
+      entry["published_dt"] = parse_datetime_string(published)
+    except ValueError as e:
+      logger.warning(f"Failed to parse date: {published} - {e}")
+      entry["published_dt"] = datetime.now(timezone.utc)
+  return int(entry["published_dt"].timestamp())
+
+
+def is_dated_feed(entries: list) -> bool:
+  return all(entry.get("published") for entry in entries)
+
+
+def select_new_entries(entries: list, watermark: FeedWatermark) -> tuple[list, str]:
+  """
+  Pick the entries of one source that were not processed yet and advance ``watermark`` past them.
+
+  Dated entries come back sorted by publish time. Feeds without dates are assumed newest first and come back
+  oldest first, their entries get the current time as ``published`` like before.
+
+  Returns:
+    (new entries, value to store back in the strapi config: latest pubDate, or latest guid for undated feeds)
+  """
+  is_dated = is_dated_feed(entries)
+  if is_dated:
+    entries = sorted(entries, key=_entry_epoch)
+  else:
+    now = datetime.now(timezone.utc)
+    entries = list(reversed(entries))
+    for entry in entries:
+      entry["published"] = now.strftime("%a, %d %b %Y %H:%M:%S %z")
+      entry["published_dt"] = now
+
+  if not is_dated and not watermark.has_history():
+    # no local history yet: only what follows the guid kept in the strapi config is new (the old behaviour).
+    # Without any guid every current entry is taken as already seen, so a fresh cache never floods the feed.
+    guids = [entry.id for entry in entries]
+    start = guids.index(watermark.seeded_guid) + 1 if watermark.seeded_guid in guids else len(entries)
+    new_entries = entries[start:]
+  else:
+    new_entries = [entry for entry in entries if watermark.is_new(entry.id, _entry_epoch(entry) if is_dated else None)]
+
+  for entry in entries:
+    watermark.add(entry.id)
+  if not entries:
+    return new_entries, ""
+  if is_dated:
+    watermark.epoch = max(watermark.epoch, _entry_epoch(entries[-1]))
+    return new_entries, entries[-1].published
+  return new_entries, entries[-1].id
+
+
+class FeedWatermarkStore:
+  """Watermarks of every source of one series, persisted as JSON under the cache dir."""
+
+  def __init__(self, is_f1_feed: bool, path: str | None = None):
+    self.path = path or os.path.join(get_cache_dir(WATERMARK_CACHE_DIR), f"feed_watermarks_{'f1' if is_f1_feed else 'moto'}.json")
+    self._lock = threading.Lock()
+    self._watermarks = self._load()
+
+  def _load(self) -> dict[str, FeedWatermark]:
+    try:
+      with open(self.path, "r", encoding="utf-8") as f:
+        return {source: FeedWatermark.from_json(data) for source, data in json.load(f).items()}
+    except FileNotFoundError:
+      return {}
+    except (OSError, ValueError) as e:
+      logger.warning(f"ignoring unreadable feed watermarks {self.path}: {e}")
+      return {}
+
+  def get(self, feed_source: str, config_value: str | None, entries: list) -> FeedWatermark:
+    """Watermark of ``feed_source``, seeded from its strapi config value when there is no local state."""
+    with self._lock:
+      watermark = self._watermarks.get(feed_source)
+      if watermark is None:
+        watermark = FeedWatermark.from_config(config_value, is_dated_feed(entries))
+        self._watermarks[feed_source] = watermark
+        logger.info(f"source: {feed_source} - watermark seeded from config: {config_value}")
+      return watermark
+
+  def save(self) -> None:
+    with self._lock:
+      data = {source: watermark.to_json() for source, watermark in self._watermarks.items()}
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path), prefix=".feed_watermarks_", suffix=".tmp")
+    try:
+      with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+      os.replace(tmp_path, self.path)
+    except OSError as e:
+      logger.error(f"failed to write feed watermarks {self.path}: {e}")
+      if os.path.exists(tmp_path):
+        os.remove(tmp_path)
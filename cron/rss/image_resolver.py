@@ -0,0 +1,199 @@
+import codecs
+import html
+import os
+import re
+import sqlite3
+import threading
+import time
+
+import requests
+from loguru import logger
+
+from cron.utils import get_cache_dir
+
+#----------------------------------------------------------------------------------------------------------------
+# og:image resolver for feed entries without an image enclosure
+#----------------------------------------------------------------------------------------------------------------
+# fetch : streamed, reading stops as soon as the og:image meta tag or </head> has been seen (or after
+#         IMAGE_MAX_HEAD_BYTES), so only the first few KB of a 500 KB article are downloaded
+# scan  : regex over the <meta> tags of the head, no DOM is built
+# cache : sqlite url -> image url, misses (no og:image, 403, 404) are cached too with a shorter TTL.
+#         Timeouts, 429 and 5xx are never cached so the next run tries again.
+IMAGE_FETCH_TIMEOUT = 10  # seconds
+IMAGE_MAX_RETRIES = 3
+IMAGE_CHUNK_SIZE = 8 * 1024
+IMAGE_MAX_HEAD_BYTES = 256 * 1024
+IMAGE_CACHE_TTL = 30 * 24 * 3600  # seconds
+IMAGE_NEGATIVE_CACHE_TTL = 24 * 3600  # seconds
+IMAGE_CACHE_DIR = "rss"
+
+IMAGE_HEADERS = {
+  "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+  "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+  "Accept-Language": "en-US,en;q=0.5",
+  "Accept-Encoding": "gzip, deflate",
+  "DNT": "1",
+  "Connection": "keep-alive",
+  "Upgrade-Insecure-Requests": "1"
+}
+
+_META_RE = re.compile(r"<meta\b[^>]*>", re.IGNORECASE)
+_ATTR_RE = re.compile(r"""([\w:.-]+)\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))""")
+_HEAD_END_RE = re.compile(r"</head\s*>|<body\b", re.IGNORECASE)
+# <meta charset="x"> or <meta http-equiv="Content-Type" content="text/html; charset=x">
+_META_CHARSET_RE = re.compile(rb"<meta\b[^>]*?charset\s*=\s*[\"']?\s*([\w.:-]+)", re.IGNORECASE)
+
+_MISS = object()  # "resolved, no image" as opposed to "could not resolve"
+
+
+def find_og_image(markup: str, start: int = 0) -> str | None:
+  """Return the content of the first ``<meta property="og:image">`` tag found in ``markup[start:]``."""
+  for match in _META_RE.finditer(markup, start):
+    attrs = {}
+    for name, double_quoted, single_quoted, bare in _ATTR_RE.findall(match.group(0)):
+      attrs[name.lower()] = double_quoted or single_quoted or bare
+    if (attrs.get("property") or attrs.get("name", "")).lower() == "og:image" and attrs.get("content"):
+      return html.unescape(attrs["content"].strip())
+  return None
+
+
+class ImageCache:
+  """Persistent url -> og:image cache (sqlite), None values are cached misses."""
+
+  def __init__(self, path: str | None = None, ttl: int = IMAGE_CACHE_TTL, negative_ttl: int = IMAGE_NEGATIVE_CACHE_TTL):
+    self.path = path or os.path.join(get_cache_dir(IMAGE_CACHE_DIR), "og_images.sqlite3")
+    self.ttl = ttl
+    self.negative_ttl = negative_ttl
+    self._lock = threading.Lock()
+    self._conn = sqlite3.connect(self.path, check_same_thread=False)
+    self._conn.execute(
+      "CREATE TABLE IF NOT EXISTS og_images (url TEXT PRIMARY KEY, image_url TEXT, fetched_at REAL NOT NULL)"
+    )
+    self._conn.commit()
+
+  def get(self, url: str):
+    """Cached image url, None for a cached miss, or _MISS when the url is unknown / expired."""
+    with self._lock:
+      row = self._conn.execute("SELECT image_url, fetched_at FROM og_images WHERE url = ?", (url,)).fetchone()
+    if row is None:
+      return _MISS
+    image_url, fetched_at = row
+    ttl = self.ttl if image_url else self.negative_ttl
+    if time.time() - fetched_at > ttl:
+      return _MISS
+    return image_url
+
+  def put(self, url: str, image_url: str | None) -> None:
+    now = time.time()
+    with self._lock:
+      self._conn.execute("INSERT OR REPLACE INTO og_images VALUES (?, ?, ?)", (url, image_url, now))
+      self._conn.execute("DELETE FROM og_images WHERE fetched_at < ?", (now - max(self.ttl, self.negative_ttl),))
+      self._conn.commit()
+
+
+_session = requests.Session()
+_cache: ImageCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_image_cache() -> ImageCache:
+  global _cache
+  with _cache_lock:
+    if _cache is None:
+      _cache = ImageCache()
+    return _cache
+
+
+def _head_encoding(response: requests.Response, first_chunk: bytes) -> str:
+  """
+  Charset of the Content-Type header, else of a <meta> tag in the first chunk, else utf-8. requests falls back to
+  ISO-8859-1 for text/* without a charset, which would turn non-ASCII image urls into mojibake.
+  """
+  candidates = []
+  if "charset" in response.headers.get("Content-Type", "").lower():
+    candidates.append(response.encoding)
+  match = _META_CHARSET_RE.search(first_chunk)
+  if match:
+    candidates.append(match.group(1).decode("ascii"))
+  for encoding in candidates:
+    try:
+      return codecs.lookup(encoding).name
+    except (LookupError, TypeError):
+      logger.debug(f"unknown charset {encoding!r}")
+  return "utf-8"
+
+
+def _read_head_for_og_image(response: requests.Response) -> str | None:
+  """Stream the body until og:image or the end of <head> shows up."""
+  decoder = None
+  markup = ""
+  scan_from = 0
+  read = 0
+  for chunk in response.iter_content(chunk_size=IMAGE_CHUNK_SIZE):
+    if decoder is None:
+      # one decoder for the whole stream: a multibyte character split across two chunks is decoded once complete
+      decoder = codecs.getincrementaldecoder(_head_encoding(response, chunk))(errors="replace")
+    read += len(chunk)
+    markup += decoder.decode(chunk)
+
+    image_url = find_og_image(markup, scan_from)
+    if image_url:
+      logger.debug(f"og:image found after {read} bytes")
+      return image_url
+    if _HEAD_END_RE.search(markup, scan_from) or read >= IMAGE_MAX_HEAD_BYTES:
+      logger.debug(f"no og:image in the first {read} bytes")
+      return None
+    # restart the next scan at the last (possibly incomplete) tag
+    scan_from = max(markup.rfind("<", scan_from), scan_from)
+  return None
+
+
+def _fetch_og_image(url: str):
+  """Returns the image url, None when the page has none (cacheable) or _MISS on transient failures."""
+  retry_delay = 1
+  for attempt in range(IMAGE_MAX_RETRIES):
+    try:
+      logger.debug(f"Fetching primary image from {url} (attempt {attempt + 1}/{IMAGE_MAX_RETRIES})")
+      with _session.get(url, headers=IMAGE_HEADERS, timeout=IMAGE_FETCH_TIMEOUT, stream=True) as response:
+        logger.debug(f"Response status code: {response.status_code}")
+        if response.status_code == 403:
+          logger.warning(f"Access forbidden (403) for {url}. Skipping.")
+          return None
+        if response.status_code == 404:
+          logger.warning(f"Page not found (404) for {url}. Skipping.")
+          return None
+        if response.status_code == 429:
+          logger.warning(f"Rate limited (429) for {url}. Retrying in {retry_delay}s...")
+          if attempt < IMAGE_MAX_RETRIES - 1:
+            time.sleep(retry_delay)
+            retry_delay *= 2  # Exponential backoff
+            continue
+          return _MISS
+        response.raise_for_status()
+        return _read_head_for_og_image(response)
+
+    except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+      logger.warning(f"{type(e).__name__} fetching {url}: {e} (attempt {attempt + 1}/{IMAGE_MAX_RETRIES})")
+    except requests.exceptions.RequestException as e:
+      logger.error(f"Request error fetching primary image from {url}: {e}")
+      return _MISS
+    except Exception as e:
+      logger.error(f"Unexpected error fetching primary image from {url}: {e}")
+      return _MISS
+  return _MISS
+
+
+def resolve_primary_image(url: str) -> str | None:
+  """og:image of ``url`` (cached), or None if the page has none or could not be fetched."""
+  cache = get_image_cache()
+  cached = cache.get(url)
+  if cached is not _MISS:
+    logger.debug(f"og:image cache hit for {url}: {cached}")
+    return cached
+
+  image_url = _fetch_og_image(url)
+  if image_url is _MISS:
+    return None
+  cache.put(url, image_url)
+  logger.debug(f"Found primary image: {image_url}")
+  return image_url
@@ -1,10 +1,7 @@
 import asyncio
 
-import feedparser
-import json
-from datetime import timedelta, datetime, timezone
-from dateutil import parser as date_parser
-from cron.strapi_api.apis import *
+from cron.rss.feed_pipeline import run_feed_pipeline
+from cron.utils import f1_graphql_token, moto_graphql_token
 from dotenv import load_dotenv
 from loguru import logger
 
@@ -14,105 +11,10 @@ load_dotenv()
 logger.info(f"Using Token 1: {f1_graphql_token[:5]}*****")
 logger.info(f"Using Token 2: {moto_graphql_token[:5]}*****")
 
-def parse_date_safely(date_string):
-  """Safely parse date string with multiple format support"""
-  try:
-    # Try dateutil parser first as it handles most common formats
-    return date_parser.parse(date_string)
-  except (ValueError, TypeError) as e:
-    logger.error(f"Failed to parse date: {date_string} - {e}")
-    # Return current time as fallback
-    return datetime.now(timezone.utc)
-
 def fetch_and_process_feeds(is_f1_feed: bool):
-  # GET CONFIG
-  config = get_config_for_feeds(is_f1_feed)
-
-  feed_update_map = {}
-  # GET LAST FEED TIME
-  feed_urls = get_feed_urls(is_f1_feed)
-  for index, feed_url in enumerate(feed_urls):
-    feeds = feedparser.parse(feed_url)
-    logger.info(f"feed len: {len(feeds)}")
-    # in case xml is getting downloaded rather than shown in browser entries will be empty.
-    # in this case call the normal API like below to fetch the feeds
-    if len(feeds.entries) == 0:
-      headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-      }
-      response = requests.get(feed_url, headers=headers)
-      if response.status_code == 200:
-        feeds = feedparser.parse(response.content)
-      else:
-        logger.error(f"Failed to fetch feed: {response.status_code} - {feed_url}")
-
-    # get feed source and last feed time from config
-    feed_source = url_to_id[feed_url]
-    config_date = config[feed_source]
-
-    # Checks for None, empty string from server config, if null or empty then config date will be 1 day back
-    if not config_date:
-      config_date = (datetime.now(timezone.utc) - timedelta(days=1)).isoformat()
-
-    logger.info(f"source: {feed_source} - date: {config_date} - url: {feed_url}")
-
-    # date to fill in update config
-    feed_date = ""
-    is_published_date_present = True
-
-    # Check if 'published' exists, otherwise reverse and add current date-time
-    for entry in feeds.entries:
-      if "published" not in entry:
-        is_published_date_present = False
-        feeds.entries.reverse()
-        for e in feeds.entries:
-          e["published"] = datetime.now(timezone.utc).strftime("%a, %d %b %Y %H:%M:%S %z")
-        break  # Only reverse once when at least one entry lacks 'published'
-
-    # if date is GMT then
-    for entry in feeds.entries:
-      entry["published"] = entry["published"].replace("GMT", "+0000")
-
-    # Sort feeds by pubDate
-    entries = sorted(feeds.entries, key=lambda x: parse_date_safely(x["published"]))
-    logger.info(f"source: {feed_source} - size: {len(entries)}")
-
-    # if published date is present then parse based on date time
-    if is_published_date_present:
-      for feed in entries:
-        feed_date = feed.published
-        feed_epoch = get_epoch(feed_date)
-        config_epoch = get_epoch(config_date)
-        logger.debug(f"feed date: {feed_date}")
-        if feed_epoch > config_epoch:
-          logger.info(f"processing feed title: {feed.title}")
-          logger.debug(f"processing feed: {feed}")
-          process_feed(is_f1_feed, feed, feed_source)
-    else :
-      # parse based on guid
-      is_last_feed_found = False
-      for feed in entries:
-        feed_date = feed.id
-        logger.debug(f"feed guid: {feed_date}")
-        if feed_date == config_date:
-          is_last_feed_found = True
-          continue
-        else:
-          if not is_last_feed_found:
-            continue
-
-        if is_last_feed_found:
-          logger.info(f"guid processing feed title: {feed.title}")
-          logger.debug(f"guid processing feed: {feed}")
-          process_feed(is_f1_feed, feed, feed_source)
-
-    feed_update_map[feed_source] = feed_date
-
-  json_str = json.dumps(feed_update_map)
-  update_config_for_feeds(is_f1_feed, json_str)
-
-def process_feed(is_f1_feed: bool, feed, feed_source):
-  asyncio.run(post_feed(is_f1_feed, feed, feed_source))
+  # all sources are fetched concurrently and every new entry flows through
+  # enrich -> translate -> post, see cron/rss/feed_pipeline.py
+  asyncio.run(run_feed_pipeline(is_f1_feed))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,328 @@
+from operator import attrgetter
+
+import numpy as np
+import pandas as pd
+
+from cron.stats_calc.race_result_index import RaceResultIndex
+from cron.stats_calc.race_result_record import F1, MOTO_GP, iter_records
+
+#----------------------------------------------------------------------------------------------------------------
+# columnar stats engine
+#----------------------------------------------------------------------------------------------------------------
+# alternative to populate_driver_data / populate_moto_gp_driver_data for whole seasons (or the full history):
+#   1. every race result record is flattened once into typed columns (grid id, block, positions, points, flags)
+#   2. the rows are joined with the stats entities (a driver grid, a merged multi grid driver, a team: each one a
+#      set of season grid ids) and every counter / sum / min is computed in one groupby over (entity, block)
+#   3. the per entity dicts are assembled with the same keys, types and edge cases (-999, 0) as the dict
+#      builders, so both engines are interchangeable (python -m cron.stats_calc.columnar_stats_benchmark)
+DICT_ENGINE = "dict"
+COLUMNAR_ENGINE = "columnar"
+STATS_ENGINES = (DICT_ENGINE, COLUMNAR_ENGINE)
+
+# MotoGP quali block: every QNR2 row + the QNR1 rows with position > 2 (the combined grid)
+_MOTO_QUALI_BLOCK = "QNR"
+# results without a season grid still form their own (unnamed) grid, like in RaceResultIndex
+_NO_GRID = ""
+
+_SUM_COLUMNS = [
+    "n", "points", "wins", "top2", "top3", "top5", "top8", "top10", "fastest_lap", "dnf", "finished",
+    "finished_pos", "grid_pos", "sprint_grid_pos", "sprint_poles", "sprint_top3", "has_quali_pos",
+    "quali_pos_sum", "q3", "qnr2",
+]
+_MIN_COLUMNS = ["finished_min", "quali_pos_min"]
+
+# keys populate_*_driver_data appends after the stats
+STATS_META_KEYS = ("standings_id", "driver_season_grid_id", "is_primary_grid_id", "position")
+
+
+def _grid_key(grid_id):
+    return _NO_GRID if grid_id is None else grid_id
+
+
+_RECORD_FIELDS = attrgetter(
+    "grid_id", "race_type", "gp_id", "points", "pos", "sprint_grid_pos", "quali_pos", "has_quali_pos", "fastest_lap", "dnf"
+)
+
+
+def _f1_columns(rtype, points, pos, sprint_grid_pos, quali_pos, has_quali_pos) -> dict:
+    return {
+        "block": rtype,
+        "points": np.array(points, dtype=np.int64),
+        "quali_pos": quali_pos,
+        "has_quali_pos": has_quali_pos,
+        "q3": has_quali_pos & (pos <= 10),
+        "qnr2": np.zeros(len(pos), dtype=bool),
+    }
+
+
+def _moto_gp_columns(rtype, points, pos, sprint_grid_pos, quali_pos, has_quali_pos) -> dict:
+    rtype = np.array(rtype, dtype=object)
+    qnr2 = rtype == "QNR2"
+    # QNR1 riders that did not go through to QNR2, placed behind the QNR2 grid
+    qnr1_rest = (rtype == "QNR1") & (quali_pos > 2)
+    return {
+        "block": np.where(qnr2 | qnr1_rest, _MOTO_QUALI_BLOCK, rtype),
+        "points": np.array(points, dtype=np.float64),
+        "quali_pos": np.where(qnr1_rest, quali_pos + 10, np.where(qnr2, quali_pos, 0)),
+        "has_quali_pos": qnr1_rest | (qnr2 & has_quali_pos),
+        "q3": np.zeros(len(pos), dtype=bool),
+        "qnr2": qnr2,
+    }
+
+
+def flatten_race_results(race_results, series: str) -> pd.DataFrame:
+    """One row per race result with the typed columns the stats are computed from (series specific rules)."""
+    raw = list(zip(*map(_RECORD_FIELDS, iter_records(race_results, series))))
+    if not raw:
+        return pd.DataFrame(columns=["grid_id", "block", "gp_id", *_SUM_COLUMNS, *_MIN_COLUMNS])
+    grid_id, rtype, gp_id, points, pos, sprint_grid_pos, quali_pos, has_quali_pos, fastest_lap, dnf = raw
+    pos = np.array(pos, dtype=np.int64)
+    quali_pos = np.array(quali_pos, dtype=np.int64)
+    has_quali_pos = np.array(has_quali_pos, dtype=bool)
+    to_columns = _f1_columns if series == F1 else _moto_gp_columns
+    df = pd.DataFrame({
+        "grid_id": [_grid_key(g) for g in grid_id],
+        "gp_id": gp_id,
+        "pos": pos,
+        "sprint_grid_pos": np.array(sprint_grid_pos, dtype=np.int64),
+        "fastest_lap": np.array(fastest_lap, dtype=bool),
+        "dnf": np.array(dnf, dtype=bool),
+        **to_columns(rtype, points, pos, sprint_grid_pos, quali_pos, has_quali_pos),
+    })
+    pos = df["pos"]
+    sprint_grid_pos = df["sprint_grid_pos"]
+    df["n"] = 1
+    df["wins"] = pos == 1
+    df["top2"] = pos.between(1, 2)
+    df["top3"] = pos.between(1, 3)
+    df["top5"] = pos.between(1, 5)
+    df["top8"] = pos.between(1, 8)
+    df["top10"] = pos.between(1, 10)
+    df["finished"] = pos > 0
+    df["finished_pos"] = pos.where(pos > 0, 0)
+    df["finished_min"] = pos.where(pos > 0, np.nan)
+    df["grid_pos"] = pos
+    df["sprint_poles"] = sprint_grid_pos == 1
+    df["sprint_top3"] = sprint_grid_pos.between(1, 3)
+    df["quali_pos_sum"] = df["quali_pos"].where(df["has_quali_pos"], 0)
+    df["quali_pos_min"] = df["quali_pos"].where(df["has_quali_pos"], np.nan)
+    return df
+
+
+def entity_key(grid_ids) -> tuple:
+    """Grid id sets are looked up regardless of order and duplicates (like RaceResultIndex.for_grids)."""
+    return tuple(sorted({_grid_key(g) for g in grid_ids}, key=str))
+
+
+def stats_grid_id_sets(driver_standings, team_standings) -> list[list]:
+    """Every set of season grid ids update_f1_stats / update_moto_gp_stats compute stats for."""
+    def primary_grid_id(standing):
+        return standing.get("attributes", {}).get("seasonGrid", {}).get("data", {}).get("id")
+
+    grid_id_sets = []
+    for standing in driver_standings:
+        grid_id_sets.append([primary_grid_id(standing)])
+        grid_ids = [g.get("id") for g in standing.get("attributes", {}).get("grids", {}).get("data", [])]
+        grid_id_sets.extend([g] for g in grid_ids if g != primary_grid_id(standing))
+        if grid_ids:
+            grid_id_sets.append(grid_ids)
+    for standing in team_standings:
+        grid_id_sets.append([g.get("id") for g in standing.get("attributes", {}).get("seasonGrid", {}).get("data", [])])
+    return grid_id_sets
+
+
+class ColumnarStatsEngine:
+    """Computes the stats dicts of many grid id sets at once from the flattened race results."""
+
+    def __init__(self, race_results, series: str):
+        if series not in (F1, MOTO_GP):
+            raise ValueError(f"unknown series: {series}")
+        self.series = series
+        self.frame = flatten_race_results(race_results, series)
+        self._stats = {}
+
+    def prepare(self, grid_id_sets) -> None:
+        """Compute the stats of every grid id set in one pass (sets computed before are skipped)."""
+        keys = [k for k in dict.fromkeys(entity_key(g) for g in grid_id_sets) if k not in self._stats]
+        if not keys:
+            return
+        membership = pd.DataFrame(
+            [(i, grid_id) for i, key in enumerate(keys) for grid_id in key], columns=["entity", "grid_id"]
+        )
+        rows = membership.merge(self.frame, on="grid_id", how="inner")
+
+        grouped = rows.groupby(["entity", "block"], sort=False).agg(
+            {**{c: "sum" for c in _SUM_COLUMNS}, **{c: "min" for c in _MIN_COLUMNS}}
+        )
+        blocks = {}
+        for (entity, block), values in zip(grouped.index, grouped.to_dict("records")):
+            blocks.setdefault(entity, {})[block] = values
+        gp_counts = rows.dropna(subset=["gp_id"]).groupby("entity")["gp_id"].nunique().to_dict()
+
+        build = self._build_f1 if self.series == F1 else self._build_moto_gp
+        for i, key in enumerate(keys):
+            stats = build(blocks.get(i, {}))
+            stats["noOfGPs"] = int(gp_counts.get(i, 0))
+            self._stats[key] = stats
+
+    def stats(self, grid_ids) -> dict:
+        key = entity_key(grid_ids)
+        if key not in self._stats:
+            self.prepare([key])
+        return dict(self._stats[key])
+
+    def populate(self, standing_id, driver_season_grid_id, grid_ids, position, is_team=False, is_primary_grid_id=True) -> dict:
+        """Same dict as populate_driver_data / populate_moto_gp_driver_data on the results of ``grid_ids``."""
+        return _with_meta(self.stats(grid_ids), standing_id, driver_season_grid_id, position, is_primary_grid_id)
+
+    #
+    # -------- assembly: mirrors the dict builders, including their int / float types and -999 / 0 defaults --------
+    #
+    @staticmethod
+    def _race_data(m, b, empty_avg_points, keys, top_column, top5_key=None):
+        points_key, avg_points_key, wins_key, podiums_key, top_finish_key, fl_key, dnf_key, best_key, avg_key = keys
+        n = int(b["n"]) if b else 0
+        if not n:
+            b = dict.fromkeys(_SUM_COLUMNS, 0)
+        # points are summed as int (F1) or float (MotoGP), an empty sum stays int 0 in both builders
+        m[points_key] = type(empty_avg_points)(b["points"]) if n else 0
+        m[avg_points_key] = m[points_key] / n if n else empty_avg_points
+        m[wins_key] = int(b["wins"])
+        m[podiums_key] = int(b["top3"])
+        if top5_key:
+            m[top5_key] = int(b["top5"])
+        m[top_finish_key] = int(b[top_column])
+        m[fl_key] = int(b["fastest_lap"])
+        m[dnf_key] = int(b["dnf"])
+        finished = int(b["finished"])
+        m[best_key] = int(b["finished_min"]) if finished else 0
+        m[avg_key] = int(b["finished_pos"]) / n if finished else -999
+
+    def _populate_race_data(self, m, blocks, empty_avg_points):
+        self._race_data(m, blocks.get("Race"), empty_avg_points, (
+            "racePoints", "avgPointsPerRace", "raceWins", "racePodiums", "top10FinishInRace", "fastestLapsInRace",
+            "dnfInRace", "bestRaceFinish", "avgRaceFinishPosition"), "top10", "top5FinishInRace")
+        self._race_data(m, blocks.get("Sprint"), empty_avg_points, (
+            "sprintPoints", "avgPointsPerSprint", "sprintWins", "sprintPodiums", "top8FinishInSprint",
+            "fastestLapsInSprint", "dnfInSprint", "bestSprintFinish", "avgSprintFinishPosition"), "top8")
+        m["points"] = m["racePoints"] + m["sprintPoints"]
+
+    @staticmethod
+    def _quali_data(m, b, keys, pole_column, first_row_column, grid_pos_column, q3_appearances):
+        pole_key, first_row_key, q3_key, best_key, avg_key, start_pos_key, gained_key, avg_finish_key = keys
+        n = int(b["n"]) if b else 0
+        if not n:
+            b = dict.fromkeys(_SUM_COLUMNS, 0)
+        m[pole_key] = int(b[pole_column])
+        m[first_row_key] = int(b[first_row_column])
+        m[q3_key] = int(b["q3"]) if q3_appearances is None else q3_appearances
+        with_position = int(b["has_quali_pos"])
+        m[best_key] = int(b["quali_pos_min"]) if with_position else 0
+        m[avg_key] = int(b["quali_pos_sum"]) / n if with_position else -999
+        m[start_pos_key] = int(b[grid_pos_column]) / n if n else -999
+        m[gained_key] = -999 if m.get(avg_finish_key) == -999 else m[start_pos_key] - m[avg_finish_key]
+
+    def _build_f1(self, blocks: dict) -> dict:
+        m = {}
+        self._populate_race_data(m, blocks, 0)
+        self._quali_data(m, blocks.get("Q3"), (
+            "racePoles", "raceFirstRowStarts", "q3Appearances", "bestQualiPos", "avgRaceQualiPosition",
+            "avgRaceStartGridPosition", "avgRacePositionGained", "avgRaceFinishPosition"),
+            "wins", "top2", "grid_pos", None)
+        self._quali_data(m, blocks.get("SQ3"), (
+            "sprintPoles", "sprintFirstRowStarts", "sprintQ3Appearances", "bestSprintQualiPos",
+            "avgSprintQualiPosition", "avgSprintStartGridPosition", "avgSprintPositionGained",
+            "avgSprintFinishPosition"),
+            "wins", "top2", "grid_pos", None)
+        return m
+
+    def _build_moto_gp(self, blocks: dict) -> dict:
+        m = {}
+        self._populate_race_data(m, blocks, 0.0)
+        quali = blocks.get(_MOTO_QUALI_BLOCK)
+        qnr2 = int(quali["qnr2"]) if quali else 0
+        self._quali_data(m, quali, (
+            "racePoles", "raceFirstRowStarts", "q3Appearances", "bestQualiPos", "avgRaceQualiPosition",
+            "avgRaceStartGridPosition", "avgRacePositionGained", "avgRaceFinishPosition"),
+            "wins", "top3", "grid_pos", qnr2)
+        self._quali_data(m, quali, (
+            "sprintPoles", "sprintFirstRowStarts", "sprintQ3Appearances", "bestSprintQualiPos",
+            "avgSprintQualiPosition", "avgSprintStartGridPosition", "avgSprintPositionGained",
+            "avgSprintFinishPosition"),
+            "sprint_poles", "sprint_top3", "sprint_grid_pos", qnr2)
+        return m
+
+
+def stats_cache_key(grid_ids) -> str:
+    """JSON friendly form of entity_key (key of the stats caches kept between runs)."""
+    return "|".join(str(g) for g in entity_key(grid_ids))
+
+
+def _with_meta(stats, standing_id, driver_season_grid_id, position, is_primary_grid_id) -> dict:
+    m = dict(stats)
+    m["standings_id"] = standing_id
+    m["driver_season_grid_id"] = driver_season_grid_id
+    m["is_primary_grid_id"] = is_primary_grid_id
+    m["position"] = position
+    return m
+
+
+def _make_populator(race_results, populate_driver_data, series: str, engine: str, grid_id_sets):
+    if engine not in STATS_ENGINES:
+        raise ValueError(f"unknown stats engine: {engine}")
+    if isinstance(race_results, ColumnarStatsEngine):
+        race_results.prepare(grid_id_sets)
+        return race_results.populate
+    if engine == COLUMNAR_ENGINE:
+        columnar = ColumnarStatsEngine(race_results, series)
+        columnar.prepare(grid_id_sets)
+        return columnar.populate
+
+    index = race_results if isinstance(race_results, RaceResultIndex) else RaceResultIndex(race_results, series)
+
+    def populate(standing_id, driver_season_grid_id, grid_ids, position, is_team=False, is_primary_grid_id=True):
+        return populate_driver_data(
+            standing_id, driver_season_grid_id, index.for_grids(grid_ids), position,
+            is_team=is_team, is_primary_grid_id=is_primary_grid_id
+        )
+
+    return populate
+
+
+def make_stats_populator(race_results, populate_driver_data, series: str, engine: str = DICT_ENGINE, grid_id_sets=(),
+                         stats_cache: dict | None = None, dirty_grids=None):
+    """
+    ``populate(standing_id, driver_season_grid_id, grid_ids, position, is_team=False, is_primary_grid_id=True)``
+    backed by the series' dict builder on a RaceResultIndex, or by the columnar engine (``grid_id_sets`` are then
+    computed up front in one pass). ``race_results`` can also be a ColumnarStatsEngine shared by many seasons.
+
+    With a ``stats_cache`` ({stats_cache_key: stats without the meta keys}) a grid id set is only recomputed when
+    it is not cached yet or contains one of ``dirty_grids``, fresh stats are stored back into the cache.
+    """
+    if stats_cache is None:
+        return _make_populator(race_results, populate_driver_data, series, engine, grid_id_sets)
+
+    dirty_grids = {_grid_key(g) for g in dirty_grids or ()}
+    fresh = set()
+
+    def is_cached(grid_ids):
+        key = stats_cache_key(grid_ids)
+        return key in fresh or (key in stats_cache and dirty_grids.isdisjoint(entity_key(grid_ids)))
+
+    stale_sets = [grid_ids for grid_ids in grid_id_sets if not is_cached(grid_ids)]
+    compute = None
+
+    def populate(standing_id, driver_season_grid_id, grid_ids, position, is_team=False, is_primary_grid_id=True):
+        nonlocal compute
+        key = stats_cache_key(grid_ids)
+        if is_cached(grid_ids):
+            return _with_meta(stats_cache[key], standing_id, driver_season_grid_id, position, is_primary_grid_id)
+        if compute is None:
+            # the index / columnar frame is only built when something has to be recomputed
+            compute = _make_populator(race_results, populate_driver_data, series, engine, stale_sets)
+        m = compute(standing_id, driver_season_grid_id, grid_ids, position, is_team=is_team, is_primary_grid_id=is_primary_grid_id)
+        stats_cache[key] = {k: v for k, v in m.items() if k not in STATS_META_KEYS}
+        fresh.add(key)
+        return m
+
+    return populate
@@ -0,0 +1,122 @@
+import argparse
+import copy
+import json
+import random
+import time
+
+from cron.stats_calc.columnar_stats import COLUMNAR_ENGINE, DICT_ENGINE, F1, MOTO_GP, ColumnarStatsEngine, \
+    stats_grid_id_sets
+from cron.stats_calc.f1.f1_stats_update_utils import compute_f1_stats
+from cron.stats_calc.moto_gp.moto_gp_stats_update_utils import compute_moto_gp_stats
+from cron.stats_calc.synthetic_archive import generate_archive
+
+#----------------------------------------------------------------------------------------------------------------
+# dict builders vs columnar engine
+#----------------------------------------------------------------------------------------------------------------
+#   python -m cron.stats_calc.columnar_stats_benchmark --seasons 20 --series f1
+#   python -m cron.stats_calc.columnar_stats_benchmark --series moto_gp --record moto_2024.json --year 2024
+#   python -m cron.stats_calc.columnar_stats_benchmark --series moto_gp --recorded moto_2024.json
+#
+# runs compute_f1_stats / compute_moto_gp_stats with both engines on every season and checks the driver and team
+# lists are identical, down to the JSON encoding (int vs float, -999 defaults). The synthetic seasons are also
+# replayed with messy values (string / missing positions, half points, finalPos overrides, rows without a grid
+# or GP) to cover the edge cases of the dict builders. --record saves a real season from strapi to replay it.
+# The last line is a full history recompute: one engine (one flatten + one groupby) shared by every season.
+
+
+def _perturb(race_results: list, seed: int) -> list:
+    """Copy of ``race_results`` with the odd values strapi can hold."""
+    rnd = random.Random(seed)
+    rows = copy.deepcopy(race_results)
+    for r in rows:
+        a = r["attributes"]
+        roll = rnd.random()
+        if roll < 0.05:
+            a["position"] = None
+        elif roll < 0.10:
+            a["position"] = str(a["position"]) if a["position"] is not None else "x"
+        elif roll < 0.13:
+            a["finalPos"] = rnd.choice([0, 1, 2, 3, "4", None])
+        elif roll < 0.16:
+            a["sprintFinalPos"] = rnd.choice([1, 2, 5, "3"])
+        elif roll < 0.19:
+            a["points"] = rnd.choice([0.5, 1.5, "2", None, 12.5])
+        elif roll < 0.21:
+            a["fastestLap"] = rnd.choice([1, None])
+        elif roll < 0.22:
+            a["seasonGrid"] = {"data": None}
+        elif roll < 0.23:
+            a["race"]["data"]["attributes"]["grandPrix"] = {"data": None}
+    return rows
+
+
+def _compare(compute, season, race_results, driver_standings, team_standings) -> dict:
+    outputs, timings = {}, {}
+    for engine in (DICT_ENGINE, COLUMNAR_ENGINE):
+        start = time.perf_counter()
+        outputs[engine] = compute(season, race_results, driver_standings, team_standings, engine=engine)
+        timings[engine] = time.perf_counter() - start
+    expected, actual = (json.dumps(outputs[e], sort_keys=True) for e in (DICT_ENGINE, COLUMNAR_ENGINE))
+    if expected != actual:
+        for want, got in zip(outputs[DICT_ENGINE][0] + outputs[DICT_ENGINE][1], outputs[COLUMNAR_ENGINE][0] + outputs[COLUMNAR_ENGINE][1]):
+            diff = {k: (want.get(k), got.get(k)) for k in want.keys() | got.keys() if json.dumps(want.get(k)) != json.dumps(got.get(k))}
+            if diff:
+                raise AssertionError(f"season {season}: stats differ for {want.get('standings_id')}: {diff}")
+        raise AssertionError(f"season {season}: stats differ")
+    return timings
+
+
+def _record(path: str, is_f1_feed: bool, year: str) -> None:
+    from cron.strapi_api.apis import fetch_all_race_results, fetch_driver_team_standings_for_season
+    race_results = fetch_all_race_results(is_f1_feed=is_f1_feed, season=year)
+    driver_standings, team_standings = fetch_driver_team_standings_for_season(is_f1_feed, year)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({year: [race_results, driver_standings, team_standings]}, f)
+    print(f"recorded {len(race_results)} race results of {year} to {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the columnar stats engine with the dict builders")
+    parser.add_argument("--seasons", type=int, default=20)
+    parser.add_argument("--series", choices=[F1, MOTO_GP], default=F1)
+    parser.add_argument("--recorded", help="JSON file written by --record, replayed instead of the synthetic archive")
+    parser.add_argument("--record", help="save a season from strapi to this JSON file and exit")
+    parser.add_argument("--year", help="season to --record")
+    args = parser.parse_args()
+
+    is_f1_feed = args.series == F1
+    if args.record:
+        _record(args.record, is_f1_feed, args.year)
+        return
+
+    compute = compute_f1_stats if is_f1_feed else compute_moto_gp_stats
+    if args.recorded:
+        with open(args.recorded, "r", encoding="utf-8") as f:
+            archive = {season: tuple(data) for season, data in json.load(f).items()}
+    else:
+        archive = generate_archive(seasons=args.seasons, is_f1_feed=is_f1_feed)
+    print(f"{args.series}: {len(archive)} seasons, {sum(len(r) for r, _, _ in archive.values())} race results")
+
+    timings = {DICT_ENGINE: 0.0, COLUMNAR_ENGINE: 0.0}
+    for season, (race_results, driver_standings, team_standings) in archive.items():
+        for name, value in _compare(compute, season, race_results, driver_standings, team_standings).items():
+            timings[name] += value
+        if not args.recorded:
+            _compare(compute, season, _perturb(race_results, int(season)), driver_standings, team_standings)
+
+    start = time.perf_counter()
+    history = ColumnarStatsEngine([r for race_results, _, _ in archive.values() for r in race_results], args.series)
+    history.prepare([g for _, drivers, teams in archive.values() for g in stats_grid_id_sets(drivers, teams)])
+    history_outputs = {season: compute(season, history, drivers, teams, engine=COLUMNAR_ENGINE) for season, (_, drivers, teams) in archive.items()}
+    timings["history"] = time.perf_counter() - start
+    for season, (race_results, drivers, teams) in archive.items():
+        assert history_outputs[season] == compute(season, race_results, drivers, teams), f"season {season}: history stats differ"
+
+    for name, seconds in timings.items():
+        print(f"{name:>9}: {seconds * 1000:9.1f} ms total, {seconds * 1000 / len(archive):7.2f} ms / season")
+    print(f"speedup: {timings[DICT_ENGINE] / timings[COLUMNAR_ENGINE]:.1f}x per season, "
+          f"{timings[DICT_ENGINE] / timings['history']:.1f}x full history (identical stats)")
+
+
+if __name__ == "__main__":
+    main()
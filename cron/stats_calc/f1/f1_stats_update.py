@@ -4,17 +4,17 @@ from datetime import datetime, timezone
 from loguru import logger
 
 from cron.race_schedule.moto_gp.moto_gp_schedule_utils import valid_year
-from cron.stats_calc.f1.f1_stats_update_utils import update_f1_stats
-from cron.strapi_api.apis import fetch_all_race_results, fetch_driver_team_standings_for_season, update_config_for_stats
+from cron.stats_calc.columnar_stats import DICT_ENGINE, STATS_ENGINES
+from cron.stats_calc.incremental_stats import update_stats_incrementally
+from cron.strapi_api.apis import update_config_for_stats
 
 
-def process_update_f1_stats(season_year: str):
+def process_update_f1_stats(season_year: str, engine: str = DICT_ENGINE, changed_races: dict | None = None,
+                            force_write: bool = False):
+    """``changed_races``: {race id: race type} uploaded in this run, None recomputes the whole season."""
     logger.info("Processing F1 stats update...")
-    race_results = fetch_all_race_results(is_f1_feed=True, season=season_year)
-    logger.info(f"Fetched {len(race_results)}")
-    driver_standings, team_standings = fetch_driver_team_standings_for_season(True, season_year)
-    update_f1_stats(season_year, race_results, driver_standings, team_standings)
-    update_config_for_stats(is_f1_feed=True, season_year=season_year)
+    if update_stats_incrementally(True, season_year, changed_races, engine=engine, force_write=force_write):
+        update_config_for_stats(is_f1_feed=True, season_year=season_year)
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Download MotoGP GP events by season year")
@@ -24,6 +24,17 @@ if __name__ == "__main__":
         default=datetime.now(timezone.utc).year,
         help="Season year (e.g. 2024)"
     )
+    parser.add_argument(
+        "--engine",
+        choices=STATS_ENGINES,
+        default=DICT_ENGINE,
+        help="Stats engine: per driver dict builder or columnar (pandas)"
+    )
+    parser.add_argument(
+        "--force-write",
+        action="store_true",
+        help="Upload every standing, not only the ones that differ from the stored values"
+    )
     args = parser.parse_args()
     year = str(args.year)
-    process_update_f1_stats(season_year = year)
\ No newline at end of file
+    process_update_f1_stats(season_year = year, engine=args.engine, force_write=args.force_write)
\ No newline at end of file
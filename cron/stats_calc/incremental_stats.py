@@ -0,0 +1,167 @@
+import json
+import os
+import tempfile
+import time
+from typing import Iterable
+
+from loguru import logger
+
+from cron.stats_calc.columnar_stats import DICT_ENGINE
+from cron.stats_calc.f1.f1_stats_update_utils import compute_f1_stats, upload_f1_stats
+from cron.stats_calc.moto_gp.moto_gp_stats_update_utils import compute_moto_gp_stats, upload_moto_gp_stats
+from cron.stats_calc.race_result_index import race_result_grid_id, race_result_race_id
+from cron.strapi_api.apis import iter_race_results, fetch_race_results_for_races, read_season_dataset, \
+    count_race_results
+from cron.strapi_api.season_snapshots import SEASON_SNAPSHOT_MAX_AGE, STANDINGS
+from cron.utils import get_cache_dir
+
+#----------------------------------------------------------------------------------------------------------------
+# incremental stats update
+#----------------------------------------------------------------------------------------------------------------
+# a full update downloads every race result of the season and rewrites every standing. With a warm snapshot
+# (race results + per grid set stats of the season, kept under the cache dir):
+#   - only the race results of the races that were just uploaded are fetched and swapped into the snapshot
+#   - only the grid sets (driver, merged driver, team) containing a grid of those rows are recomputed
+#   - only the standings whose values differ from the stored ones are uploaded (see standings_sync)
+# uploads of sessions the stats never read (FP1..FP3, Q1, Q2, ...) are skipped without any request.
+# Without a snapshot (first run, evicted CI cache) the season is fetched in full and the snapshot is seeded.
+# A snapshot is only trusted while it is younger than STATS_SNAPSHOT_MAX_AGE (edits made directly in strapi) and,
+# once the changed races are swapped in, holds as many rows as strapi counts for the season (a CI cache restored
+# from before a failed run misses the races that run uploaded). Otherwise the season is fetched in full.
+STATS_SNAPSHOT_DIR = "stats"
+# same race types as the query_race_results_all filter
+STATS_RACE_TYPES = ("Race", "Q3", "Sprint", "SQ3", "QNR1", "QNR2")
+SNAPSHOT_VERSION = 1
+STATS_SNAPSHOT_MAX_AGE = SEASON_SNAPSHOT_MAX_AGE  # seconds
+
+
+class StatsSnapshot:
+    """Race results and per grid set stats of one season, persisted as JSON."""
+
+    def __init__(self, is_f1_feed: bool, season: str, path: str | None = None,
+                 max_age: float = STATS_SNAPSHOT_MAX_AGE):
+        series = "f1" if is_f1_feed else "moto_gp"
+        self.path = path or os.path.join(get_cache_dir(STATS_SNAPSHOT_DIR), f"{series}_{season}.json")
+        self.max_age = max_age
+        self.race_results = {}
+        self.entity_stats = {}
+        self.saved_at = 0.0
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"ignoring unreadable stats snapshot {self.path}: {e}")
+            return
+        if data.get("version") != SNAPSHOT_VERSION:
+            logger.info(f"stats snapshot {self.path} has an old format, starting cold")
+            return
+        self.race_results = {r["id"]: r for r in data.get("race_results", [])}
+        self.entity_stats = data.get("entity_stats", {})
+        self.saved_at = data.get("saved_at", 0.0)
+
+    def is_warm(self) -> bool:
+        """Holds race results that are recent enough to be updated incrementally."""
+        if not self.race_results:
+            return False
+        if self.max_age and time.time() - self.saved_at > self.max_age:
+            logger.info(f"stats snapshot {self.path} is older than {self.max_age}s, starting cold")
+            return False
+        return True
+
+    def reset(self, race_results: Iterable) -> None:
+        """Start over from a full season fetch (a list or the iter_race_results stream), every grid set gets recomputed."""
+        self.race_results = {r["id"]: r for r in race_results}
+        self.entity_stats = {}
+
+    def replace_races(self, race_ids, race_results: list) -> set:
+        """
+        Swap the rows of ``race_ids`` for ``race_results``.
+
+        Returns:
+            the season grid ids whose results changed (rows removed, added or modified)
+        """
+        race_ids = {str(race_id) for race_id in race_ids}
+        old = {row_id: r for row_id, r in self.race_results.items() if str(race_result_race_id(r)) in race_ids}
+        new = {r["id"]: r for r in race_results}
+        dirty_grids = set()
+        for row_id in old.keys() | new.keys():
+            if old.get(row_id) != new.get(row_id):
+                dirty_grids.update(race_result_grid_id(r) for r in (old.get(row_id), new.get(row_id)) if r is not None)
+        for row_id in old:
+            del self.race_results[row_id]
+        self.race_results.update(new)
+        return dirty_grids
+
+    def save(self) -> None:
+        data = {
+            "version": SNAPSHOT_VERSION,
+            "saved_at": time.time(),
+            "race_results": list(self.race_results.values()),
+            "entity_stats": self.entity_stats,
+        }
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path), prefix=".stats_snapshot_", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.error(f"failed to write stats snapshot {self.path}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+def affects_stats(changed_races: dict | None) -> bool:
+    """``changed_races`` is {race id: race type or None when unknown}, None means a full update."""
+    if changed_races is None:
+        return True
+    return any(rtype is None or rtype in STATS_RACE_TYPES for rtype in changed_races.values())
+
+
+def update_stats_incrementally(is_f1_feed: bool, season_year: str, changed_races: dict | None = None,
+                               engine: str = DICT_ENGINE, force_write: bool = False,
+                               snapshot: StatsSnapshot | None = None) -> bool:
+    """
+    Update the driver and team standings of ``season_year`` after ``changed_races`` were uploaded
+    ({race id: race type}, None recomputes the whole season). ``force_write`` uploads every standing, even
+    the ones that match the stored values.
+
+    Returns:
+        True when at least one standing was written
+    """
+    if not affects_stats(changed_races):
+        logger.info(f"stats: skipping, no stats session in {changed_races}")
+        return False
+
+    snapshot = snapshot or StatsSnapshot(is_f1_feed, season_year)
+    dirty_grids = None
+    if changed_races is not None and snapshot.is_warm():
+        race_ids = [race_id for race_id, rtype in changed_races.items() if rtype is None or rtype in STATS_RACE_TYPES]
+        dirty_grids = snapshot.replace_races(race_ids, fetch_race_results_for_races(is_f1_feed, race_ids))
+        total = count_race_results(is_f1_feed, season_year)
+        if total != len(snapshot.race_results):
+            # rows of other races are missing or gone: the snapshot does not match strapi any more
+            logger.warning(f"stats: snapshot holds {len(snapshot.race_results)} race results, strapi {total}, "
+                           f"refetching {season_year}")
+            dirty_grids = None
+        else:
+            logger.info(f"stats: races {race_ids} changed the results of grids {sorted(map(str, dirty_grids))}")
+    if dirty_grids is None:
+        logger.info(f"stats: full fetch for {season_year}")
+        snapshot.reset(iter_race_results(is_f1_feed, season_year))
+
+    driver_standings, team_standings = read_season_dataset(is_f1_feed, season_year, STANDINGS)
+    compute = compute_f1_stats if is_f1_feed else compute_moto_gp_stats
+    drivers_list, teams_list = compute(
+        season_year, list(snapshot.race_results.values()), driver_standings, team_standings, engine=engine,
+        stats_cache=snapshot.entity_stats, dirty_grids=dirty_grids if dirty_grids is not None else ()
+    )
+
+    upload = upload_f1_stats if is_f1_feed else upload_moto_gp_stats
+    written_ids = upload(drivers_list, teams_list, driver_standings, team_standings, force=force_write)
+    snapshot.save()
+    return bool(written_ids)
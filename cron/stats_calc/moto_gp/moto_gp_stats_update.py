@@ -5,20 +5,20 @@ from loguru import logger
 
 from cron.moto_gp.moto_gp_api import fetch_season, fetch_constructor_standings
 from cron.race_schedule.moto_gp.moto_gp_schedule_utils import valid_year, contains_season
-from cron.stats_calc.moto_gp.moto_gp_stats_update_utils import update_moto_gp_stats
-from cron.strapi_api.apis import fetch_all_race_results, fetch_driver_team_standings_for_season, \
-    update_config_for_stats, fetch_constructor_standings_for_season_moto_gp, \
+from cron.stats_calc.columnar_stats import DICT_ENGINE, STATS_ENGINES
+from cron.stats_calc.incremental_stats import update_stats_incrementally
+from cron.strapi_api.apis import update_config_for_stats, fetch_constructor_standings_for_season_moto_gp, \
     update_constructor_standings_for_season_moto_gp, create_constructor_standings_for_season_moto_gp
 
 
-def process_update_moto_gp_stats(season_year: str):
+def process_update_moto_gp_stats(season_year: str, engine: str = DICT_ENGINE, changed_races: dict | None = None,
+                                 force_write: bool = False):
+    """``changed_races``: {race id: race type} uploaded in this run, None recomputes the whole season."""
     logger.info("Processing MotoGP stats update...")
-    race_results = fetch_all_race_results(is_f1_feed=False, season=season_year)
-    logger.info(f"Fetched {len(race_results)}")
-    driver_standings, team_standings = fetch_driver_team_standings_for_season(is_f1_feed=False, season=season_year)
-    update_moto_gp_stats(season_year, race_results, driver_standings, team_standings)
+    written = update_stats_incrementally(False, season_year, changed_races, engine=engine, force_write=force_write)
     process_constructor_stats_update(season_year)
-    update_config_for_stats(is_f1_feed=False, season_year=season_year)
+    if written:
+        update_config_for_stats(is_f1_feed=False, season_year=season_year)
 
 def process_constructor_stats_update(season_year: str):
     logger.info(f"Processing MotoGP constructor stats update... for season: {season_year}")
@@ -75,6 +75,17 @@ if __name__ == "__main__":
         default=datetime.now(timezone.utc).year,
         help="Season year (e.g. 2024)"
     )
+    parser.add_argument(
+        "--engine",
+        choices=STATS_ENGINES,
+        default=DICT_ENGINE,
+        help="Stats engine: per driver dict builder or columnar (pandas)"
+    )
+    parser.add_argument(
+        "--force-write",
+        action="store_true",
+        help="Upload every standing, not only the ones that differ from the stored values"
+    )
     args = parser.parse_args()
     year = str(args.year)
-    process_update_moto_gp_stats(season_year=year)
\ No newline at end of file
+    process_update_moto_gp_stats(season_year=year, engine=args.engine, force_write=args.force_write)
\ No newline at end of file
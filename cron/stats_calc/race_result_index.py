@@ -0,0 +1,140 @@
+from collections import defaultdict
+from typing import Iterable
+
+from cron.stats_calc.race_result_record import RaceResultRecord, iter_records, normalise_race_results
+
+#----------------------------------------------------------------------------------------------------------------
+# indexed race results for the stats passes
+#----------------------------------------------------------------------------------------------------------------
+# fetch_all_race_results returns a flat list of strapi raceResult nodes. The stats passes used to filter that
+# list again for every standing, every extra grid, every merged driver and every team (O(standings x results),
+# with a deep .get() chain per row and per pass). RaceResultIndex reads the keys of every row once and keeps
+# the rows bucketed by season grid, by (season grid, race type), by race type and by race, so every lookup is a
+# dict access. Rows keep their fetch order inside every bucket. The index holds RaceResultRecords (strapi nodes
+# are normalised on the way in), the helpers below read the raw nodes.
+
+
+def _get_val(obj, path, default=None):
+    """Safe nested dict lookup via a list of keys."""
+    for key in path:
+        if not isinstance(obj, dict):
+            return default
+        obj = obj.get(key)
+        if obj is None:
+            return default
+    return obj
+
+
+def race_result_grid_id(r):
+    return _get_val(r, ["attributes", "seasonGrid", "data", "id"])
+
+
+def race_result_type(r):
+    return _get_val(r, ["attributes", "race", "data", "attributes", "type"])
+
+
+def race_result_race_id(r):
+    return _get_val(r, ["attributes", "race", "data", "id"])
+
+
+def race_result_grand_prix_id(r):
+    return _get_val(r, ["attributes", "race", "data", "attributes", "grandPrix", "data", "id"])
+
+
+class RaceResultGroup:
+    """
+    The race result records of one or more season grids, with O(1) access per race type.
+
+    The stats builders (populate_driver_data / populate_moto_gp_driver_data) take one of these, a plain list
+    (strapi nodes or records) is normalised and wrapped on the fly.
+    """
+
+    def __init__(self, results: list[RaceResultRecord], by_type: dict | None = None):
+        self.results = results
+        if by_type is None:
+            by_type = defaultdict(list)
+            for r in results:
+                by_type[r.race_type].append(r)
+        self._by_type = by_type
+
+    @classmethod
+    def of(cls, race_results, series: str) -> "RaceResultGroup":
+        if isinstance(race_results, RaceResultGroup):
+            return race_results
+        return cls(normalise_race_results(race_results, series))
+
+    def of_type(self, rtype) -> list[RaceResultRecord]:
+        return self._by_type.get(rtype, [])
+
+    def grand_prix_ids(self) -> set:
+        return {r.gp_id for r in self.results if r.gp_id is not None}
+
+    def __iter__(self):
+        return iter(self.results)
+
+    def __len__(self):
+        return len(self.results)
+
+
+class RaceResultIndex:
+    """All race results of a season (or archive) as records, bucketed once by season grid, race type and race."""
+
+    def __init__(self, race_results: Iterable, series: str):
+        self.series = series
+        self._results = []
+        self._seq = {}
+        self._by_grid = defaultdict(list)
+        self._by_grid_type = defaultdict(lambda: defaultdict(list))
+        self._by_type = defaultdict(list)
+        self._by_race = defaultdict(list)
+        self.extend(race_results)
+
+    def add(self, r: RaceResultRecord) -> None:
+        self._seq[id(r)] = len(self._results)
+        self._results.append(r)
+        self._by_grid[r.grid_id].append(r)
+        self._by_grid_type[r.grid_id][r.race_type].append(r)
+        self._by_type[r.race_type].append(r)
+        self._by_race[r.race_id].append(r)
+
+    def extend(self, race_results: Iterable) -> None:
+        """Add strapi nodes or records (e.g. streamed page by page from iter_race_results)."""
+        for r in iter_records(race_results, self.series):
+            self.add(r)
+
+    def for_grid(self, grid_id) -> RaceResultGroup:
+        return RaceResultGroup(self._by_grid.get(grid_id, []), self._by_grid_type.get(grid_id, {}))
+
+    def for_grids(self, grid_ids) -> RaceResultGroup:
+        """Results of every grid in ``grid_ids`` (duplicates ignored), in fetch order."""
+        grid_ids = list(dict.fromkeys(grid_ids))
+        if len(grid_ids) == 1:
+            return self.for_grid(grid_ids[0])
+
+        def merged(buckets):
+            rows = [r for bucket in buckets for r in bucket]
+            rows.sort(key=lambda r: self._seq[id(r)])
+            return rows
+
+        grid_types = [self._by_grid_type.get(g, {}) for g in grid_ids]
+        rtypes = dict.fromkeys(rtype for types in grid_types for rtype in types)
+        by_type = {rtype: merged(types.get(rtype, []) for types in grid_types) for rtype in rtypes}
+        return RaceResultGroup(merged(self._by_grid.get(g, []) for g in grid_ids), by_type)
+
+    def of_type(self, rtype) -> list:
+        return self._by_type.get(rtype, [])
+
+    def for_race(self, race_id) -> list:
+        return self._by_race.get(race_id, [])
+
+    def grid_ids(self) -> list:
+        return list(self._by_grid)
+
+    def race_ids(self) -> list:
+        return list(self._by_race)
+
+    def __iter__(self):
+        return iter(self._results)
+
+    def __len__(self):
+        return len(self._results)
@@ -0,0 +1,56 @@
+import argparse
+import time
+
+from cron.stats_calc.columnar_stats import stats_grid_id_sets
+from cron.stats_calc.f1.f1_stats_update_utils import populate_driver_data
+from cron.stats_calc.moto_gp.moto_gp_stats_update_utils import populate_moto_gp_driver_data
+from cron.stats_calc.race_result_index import RaceResultIndex, race_result_grid_id
+from cron.stats_calc.synthetic_archive import generate_archive
+
+#----------------------------------------------------------------------------------------------------------------
+# full scan vs RaceResultIndex on a synthetic archive
+#----------------------------------------------------------------------------------------------------------------
+#   python -m cron.stats_calc.race_result_index_benchmark --seasons 20
+#
+# runs the lookups of update_f1_stats / update_moto_gp_stats (every standing, extra grid, merged driver and team)
+# once with the old list comprehensions over all race results and once on the index, feeds both into the same
+# stats builder and checks the stats are identical.
+
+
+def run_scan(all_race_results, lookups, populate, series):
+    return [populate("", "", [r for r in all_race_results if race_result_grid_id(r) in grid_ids], 0) for grid_ids in lookups]
+
+
+def run_index(all_race_results, lookups, populate, series):
+    index = RaceResultIndex(all_race_results, series)
+    return [populate("", "", index.for_grids(grid_ids), 0) for grid_ids in lookups]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark RaceResultIndex against full scans")
+    parser.add_argument("--seasons", type=int, default=20)
+    parser.add_argument("--series", choices=["f1", "moto_gp"], default="f1")
+    args = parser.parse_args()
+
+    is_f1_feed = args.series == "f1"
+    populate = populate_driver_data if is_f1_feed else populate_moto_gp_driver_data
+    archive = generate_archive(seasons=args.seasons, is_f1_feed=is_f1_feed)
+    print(f"{args.series}: {args.seasons} seasons, {sum(len(r) for r, _, _ in archive.values())} race results")
+
+    timings = {"scan": 0.0, "index": 0.0}
+    for season, (race_results, driver_standings, team_standings) in archive.items():
+        lookups = stats_grid_id_sets(driver_standings, team_standings)
+        results = {}
+        for name, run in (("scan", run_scan), ("index", run_index)):
+            start = time.perf_counter()
+            results[name] = run(race_results, lookups, populate, args.series)
+            timings[name] += time.perf_counter() - start
+        assert results["scan"] == results["index"], f"stats differ for season {season}"
+
+    for name, seconds in timings.items():
+        print(f"{name:>6}: {seconds * 1000:9.1f} ms total, {seconds * 1000 / len(archive):7.2f} ms / season")
+    print(f"speedup: {timings['scan'] / timings['index']:.1f}x (identical stats)")
+
+
+if __name__ == "__main__":
+    main()
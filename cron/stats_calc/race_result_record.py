@@ -0,0 +1,102 @@
+from dataclasses import dataclass
+from typing import Iterable, Iterator
+
+#----------------------------------------------------------------------------------------------------------------
+# compact race result records for the stats passes
+#----------------------------------------------------------------------------------------------------------------
+# a strapi raceResult node is a tree of ~15 dicts (race -> grandPrix, seasonGrid -> driver / chassis -> team,
+# classification...) and the stats builders used to walk it again with get_val / safe_int closures for every
+# counter of every standing. Every node is now read once into a RaceResultRecord (slots, no per row dict) holding
+# only what the stats read, already parsed with the series rules:
+#   F1    : pos = finalPos or position, points int(), fastest lap / dnf compared with == True
+#   MotoGP: pos = finalPos ?? position, points float(), sprint grid = sprintFinalPos ?? pos, flags `is True`
+# the dict builders, the RaceResultIndex and the columnar engine all read these records.
+F1 = "f1"
+MOTO_GP = "moto_gp"
+
+
+@dataclass(slots=True)
+class RaceResultRecord:
+    id: str | None
+    race_id: str | None
+    race_type: str | None
+    gp_id: str | None
+    grid_id: str | None
+    points: int | float
+    # finishing / grid position (series rule above), 0 when unknown
+    pos: int
+    sprint_grid_pos: int
+    # qualifying position (`position` only) and whether the row has one
+    quali_pos: int
+    has_quali_pos: bool
+    fastest_lap: bool
+    dnf: bool
+
+
+def _safe_int(v, default=0):
+    try:
+        return int(v)
+    except (TypeError, ValueError):
+        return default
+
+
+def _safe_float(v, default=0.0):
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return default
+
+
+def _raw(r) -> tuple:
+    a = r.get("attributes") or {}
+    race_node = (a.get("race") or {}).get("data") or {}
+    race = race_node.get("attributes") or {}
+    grand_prix = (race.get("grandPrix") or {}).get("data") or {}
+    grid = (a.get("seasonGrid") or {}).get("data") or {}
+    classification = ((a.get("classification") or {}).get("data") or {}).get("attributes") or {}
+    return a, race_node.get("id"), race.get("type"), grand_prix.get("id"), grid.get("id"), classification.get("type")
+
+
+def f1_record(r) -> RaceResultRecord:
+    a, race_id, rtype, gp_id, grid_id, classification = _raw(r)
+    position = a.get("position")
+    pos = _safe_int(a.get("finalPos") or position)
+    return RaceResultRecord(
+        r.get("id"), race_id, rtype, gp_id, grid_id,
+        _safe_int(a.get("points"), 0),
+        pos,
+        pos,
+        _safe_int(position) if position else 0,
+        bool(position),
+        a.get("fastestLap") == True,  # noqa: E712  (1 counts too)
+        a.get("dnf") == True or classification is not None,  # noqa: E712
+    )
+
+
+def moto_gp_record(r) -> RaceResultRecord:
+    a, race_id, rtype, gp_id, grid_id, classification = _raw(r)
+    position = a.get("position")
+    final_pos = a.get("finalPos")
+    sprint_final_pos = a.get("sprintFinalPos")
+    pos = _safe_int(final_pos) if final_pos is not None else _safe_int(position)
+    return RaceResultRecord(
+        r.get("id"), race_id, rtype, gp_id, grid_id,
+        _safe_float(a.get("points"), 0.0),
+        pos,
+        _safe_int(sprint_final_pos) if sprint_final_pos is not None else pos,
+        _safe_int(position),
+        position is not None,
+        a.get("fastestLap") is True,
+        a.get("dnf") is True or classification is not None,
+    )
+
+
+def iter_records(race_results: Iterable, series: str) -> Iterator[RaceResultRecord]:
+    """Strapi raceResult nodes (records are kept as they are) as RaceResultRecords, in the same order."""
+    to_record = f1_record if series == F1 else moto_gp_record
+    for r in race_results:
+        yield r if isinstance(r, RaceResultRecord) else to_record(r)
+
+
+def normalise_race_results(race_results: Iterable, series: str) -> list[RaceResultRecord]:
+    return list(iter_records(race_results, series))
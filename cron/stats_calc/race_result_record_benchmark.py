@@ -0,0 +1,91 @@
+import argparse
+import hashlib
+import json
+import resource
+import subprocess
+import sys
+import time
+
+from loguru import logger
+
+from cron.stats_calc.columnar_stats import F1, MOTO_GP
+from cron.stats_calc.f1.f1_stats_update_utils import compute_f1_stats
+from cron.stats_calc.moto_gp.moto_gp_stats_update_utils import compute_moto_gp_stats
+from cron.stats_calc.synthetic_archive import generate_season
+
+#----------------------------------------------------------------------------------------------------------------
+# strapi nodes vs RaceResultRecord: peak RSS and runtime of a full history load
+#----------------------------------------------------------------------------------------------------------------
+#   python -m cron.stats_calc.race_result_record_benchmark --seasons 75 --series f1
+#
+# every mode runs in its own process (peak RSS is per process):
+#   dicts  : the seasons are kept as strapi raceResult nodes and the stats are computed from them
+#   records: every season is normalised into RaceResultRecords as soon as it is loaded and the nodes are dropped
+# the seasons are loaded one by one (like a paginated fetch), then compute_f1_stats / compute_moto_gp_stats runs
+# on every season with the dict builder. Prints one JSON line per mode and checks the stats are identical.
+MODES = ("dicts", "records")
+
+
+def _load(seasons: int, is_f1_feed: bool, mode: str) -> dict:
+    series = F1 if is_f1_feed else MOTO_GP
+    archive = {}
+    for i, year in enumerate(range(1950, 1950 + seasons)):
+        race_results, driver_standings, team_standings = generate_season(year, is_f1_feed=is_f1_feed, id_offset=i * 10_000_000)
+        if mode == "records":
+            from cron.stats_calc.race_result_record import normalise_race_results
+            race_results = normalise_race_results(race_results, series)
+        archive[str(year)] = (race_results, driver_standings, team_standings)
+    return archive
+
+
+def run_mode(seasons: int, is_f1_feed: bool, mode: str) -> dict:
+    start = time.perf_counter()
+    archive = _load(seasons, is_f1_feed, mode)
+    load_seconds = time.perf_counter() - start
+    loaded_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    compute = compute_f1_stats if is_f1_feed else compute_moto_gp_stats
+    start = time.perf_counter()
+    stats = {season: compute(season, *data) for season, data in archive.items()}
+    compute_seconds = time.perf_counter() - start
+    return {
+        "mode": mode,
+        "rows": sum(len(r) for r, _, _ in archive.values()),
+        "load_s": round(load_seconds, 3),
+        "compute_s": round(compute_seconds, 3),
+        "peak_rss_mb_loaded": round(loaded_rss / 1024, 1),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "stats_hash": hashlib.sha1(json.dumps(stats, sort_keys=True).encode()).hexdigest(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Peak RSS / runtime of strapi nodes vs RaceResultRecords")
+    parser.add_argument("--seasons", type=int, default=75)
+    parser.add_argument("--series", choices=[F1, MOTO_GP], default=F1)
+    parser.add_argument("--mode", choices=MODES, help="run one mode in this process (used by the parent run)")
+    args = parser.parse_args()
+
+    is_f1_feed = args.series == F1
+    if args.mode:
+        logger.remove()
+        print(json.dumps(run_mode(args.seasons, is_f1_feed, args.mode)))
+        return
+
+    results = []
+    for mode in MODES:
+        out = subprocess.run(
+            [sys.executable, "-m", "cron.stats_calc.race_result_record_benchmark", "--seasons", str(args.seasons),
+             "--series", args.series, "--mode", mode],
+            check=True, capture_output=True, text=True,
+        )
+        results.append(json.loads(out.stdout.strip().splitlines()[-1]))
+        print(json.dumps(results[-1]))
+    assert len({r["stats_hash"] for r in results}) == 1, "stats differ between the modes"
+    dicts, records = results
+    print(f"{args.series}: {dicts['rows']} race results, peak RSS {dicts['peak_rss_mb']} -> {records['peak_rss_mb']} MB, "
+          f"stats {dicts['compute_s']} -> {records['compute_s']} s (identical stats)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import math
+
+from loguru import logger
+
+from cron.strapi_api.apis import update_driver_standings_batch, update_team_standings_batch
+
+#----------------------------------------------------------------------------------------------------------------
+# diff based standings sync
+#----------------------------------------------------------------------------------------------------------------
+# the stats update used to send one mutation per driver and team standing, every run, changed or not. The
+# standings were already fetched (fetch_driver_team_standings_for_season) to know which grids to compute, so the
+# stored values are compared field by field with the new stats and only the changed fields of the changed rows
+# are sent, batched into aliased mutations (run_batched_mutation). After a practice session or a re-run nothing
+# differs and nothing is written.
+#   - numbers compare by value (strapi returns 12 for a Float field written as 12.0)
+#   - relations (season, chassis, seasonGrid) are stored as {data: {id}} / {data: [{id}]} and sent as ids
+#   - a standing that is missing from the stored list is sent in full
+STANDINGS_META_KEYS = ("standings_id", "driver_season_grid_id", "is_primary_grid_id")
+FLOAT_TOLERANCE = 1e-6
+
+
+def _stored_value(value):
+    """Strapi relation {data: ...} as the id (or the ids) the mutation takes, any other value as is."""
+    if isinstance(value, dict) and "data" in value:
+        data = value["data"]
+        if isinstance(data, list):
+            return [node.get("id") for node in data if node]
+        return data.get("id") if data else None
+    return value
+
+
+def _same_value(stored, new) -> bool:
+    stored = _stored_value(stored)
+    if isinstance(new, bool) or isinstance(stored, bool):
+        return stored is new
+    if isinstance(new, (int, float)) and isinstance(stored, (int, float)):
+        return math.isclose(stored, new, rel_tol=0, abs_tol=FLOAT_TOLERANCE)
+    if isinstance(new, list) and isinstance(stored, list):
+        # relation lists have no order in strapi
+        return sorted(map(str, stored)) == sorted(map(str, new))
+    if isinstance(new, (int, str)) and isinstance(stored, (int, str)):
+        return str(stored) == str(new)
+    return stored == new
+
+
+def field_diff(stored_attributes: dict | None, stats: dict) -> dict:
+    """The fields of ``stats`` (meta keys left out) whose value differs from ``stored_attributes``."""
+    payload = {k: v for k, v in stats.items() if k not in STANDINGS_META_KEYS}
+    if stored_attributes is None:
+        return payload
+    return {k: v for k, v in payload.items() if k not in stored_attributes or not _same_value(stored_attributes[k], v)}
+
+
+def _changed_rows(stats_list: list, stored_standings: list, force: bool) -> list[tuple[dict, str]]:
+    stored = {str(s.get("id")): s.get("attributes") or {} for s in stored_standings or []}
+    rows = []
+    for stats in stats_list:
+        standings_id = stats.get("standings_id")
+        if force:
+            changed = field_diff(None, stats)
+        else:
+            changed = field_diff(stored.get(str(standings_id)), stats)
+        if changed:
+            logger.debug(f"standings {standings_id} changed: {sorted(changed)}")
+            rows.append((changed, standings_id))
+    return rows
+
+
+def plan_standings_sync(drivers_list: list, teams_list: list, driver_standings: list, team_standings: list,
+                        force: bool = False) -> tuple[list, list]:
+    """
+    The (changed fields, standings id) rows to write, drivers of non primary grids are never written.
+    ``force`` sends every field of every standing.
+    """
+    drivers = [d for d in drivers_list if d.get("is_primary_grid_id") is True]
+    return _changed_rows(drivers, driver_standings, force), _changed_rows(teams_list, team_standings, force)
+
+
+def sync_standings(is_f1_feed: bool, drivers_list: list, teams_list: list, driver_standings: list,
+                   team_standings: list, force: bool = False) -> set:
+    """
+    Write the changed fields of the changed standings to strapi.
+
+    Returns:
+        ("driver" | "team", standings id) of every standing strapi accepted
+    """
+    driver_rows, team_rows = plan_standings_sync(drivers_list, teams_list, driver_standings, team_standings, force)
+    n_drivers = sum(1 for d in drivers_list if d.get("is_primary_grid_id") is True)
+    logger.info(f"standings sync: {len(driver_rows)}/{n_drivers} driver and "
+                f"{len(team_rows)}/{len(teams_list)} team standings changed")
+
+    written = set()
+    if driver_rows:
+        ids = update_driver_standings_batch(is_f1_feed, driver_rows)
+        written.update(("driver", row_id) for (_, row_id), updated in zip(driver_rows, ids) if updated is not None)
+    if team_rows:
+        ids = update_team_standings_batch(is_f1_feed, team_rows)
+        written.update(("team", row_id) for (_, row_id), updated in zip(team_rows, ids) if updated is not None)
+    return written
@@ -0,0 +1,235 @@
+import argparse
+import json
+import os
+import tempfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+
+from loguru import logger
+
+from cron.race_schedule.moto_gp.moto_gp_schedule_utils import valid_year
+from cron.stats_calc.columnar_stats import DICT_ENGINE, F1, MOTO_GP, STATS_ENGINES
+from cron.stats_calc.f1.f1_stats_update_utils import compute_f1_stats, upload_f1_stats
+from cron.stats_calc.moto_gp.moto_gp_stats_update_utils import compute_moto_gp_stats, upload_moto_gp_stats
+from cron.strapi_api.apis import get_config, read_season_dataset, update_config_for_stats
+from cron.strapi_api.season_snapshots import RACE_RESULTS, STANDINGS
+from cron.utils import get_cache_dir
+
+#----------------------------------------------------------------------------------------------------------------
+# multi season stats backfill
+#----------------------------------------------------------------------------------------------------------------
+#   python -m cron.stats_calc.stats_backfill --from-year 1950 --to-year 2024 --series f1 moto_gp
+#   python -m cron.stats_calc.stats_backfill --from-year 2010 --to-year 2012 --dry-run stats_2010_2012.jsonl
+#
+# recomputes the driver and team standings of every (series, season) of the range:
+#   - fetch  : race results + stored standings of a few seasons at a time (thread pool, network bound), read
+#              through the season snapshots
+#   - compute: compute_f1_stats / compute_moto_gp_stats in a process pool (CPU bound)
+#   - write  : from the main process through the diff based standings sync (changed rows only, batched),
+#              or with --dry-run every computed standing as one JSON line for auditing
+# every finished season is recorded in a checkpoint under the cache dir, a re-run with the same engine and
+# --force-write skips those (--restart ignores it). The checkpoint is deleted once every season of the run is done,
+# so a later backfill of the same range starts over. The MotoGP constructor standings come from the MotoGP API and
+# are not part of the backfill.
+BACKFILL_CHECKPOINT_DIR = "stats"
+DEFAULT_FETCH_WORKERS = 2
+DEFAULT_COMPUTE_WORKERS = os.cpu_count() or 2
+
+
+def _checkpoint_params(engine: str, dry_run: bool, force_write: bool) -> dict:
+    # a checkpoint only applies to a run with the same parameters
+    return {"engine": engine, "dry_run": dry_run, "force_write": force_write}
+
+
+def _checkpoint_path(params: dict) -> str:
+    name = f"backfill{'_dry_run' if params['dry_run'] else ''}_{params['engine']}" \
+           f"{'_force_write' if params['force_write'] else ''}_checkpoint.json"
+    return os.path.join(get_cache_dir(BACKFILL_CHECKPOINT_DIR), name)
+
+
+def load_checkpoint(path: str, params: dict) -> set:
+    """The finished "series:season" keys, empty when there is no (readable, matching ``params``) checkpoint."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            checkpoint = json.load(f)
+    except FileNotFoundError:
+        return set()
+    except (OSError, ValueError) as e:
+        logger.warning(f"ignoring unreadable backfill checkpoint {path}: {e}")
+        return set()
+    if checkpoint.get("params") != params:
+        logger.warning(f"ignoring backfill checkpoint {path} of another run: {checkpoint.get('params')} != {params}")
+        return set()
+    return set(checkpoint.get("done", []))
+
+
+def save_checkpoint(path: str, params: dict, done: set) -> None:
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".backfill_", suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump({"params": params, "done": sorted(done)}, f)
+    os.replace(tmp_path, path)
+
+
+def clear_checkpoint(path: str) -> None:
+    try:
+        os.remove(path)
+        logger.info(f"backfill complete, checkpoint {path} removed")
+    except FileNotFoundError:
+        pass
+
+
+def _key(series: str, season: str) -> str:
+    return f"{series}:{season}"
+
+
+def _fetch(series: str, season: str) -> tuple:
+    is_f1_feed = series == F1
+    # read through the season snapshots, a resumed or repeated backfill does not download the seasons again
+    config = get_config(is_f1_feed=is_f1_feed)
+    race_results = read_season_dataset(is_f1_feed, season, RACE_RESULTS, config=config)
+    driver_standings, team_standings = read_season_dataset(is_f1_feed, season, STANDINGS, config=config)
+    return race_results, driver_standings, team_standings
+
+
+def _compute(series: str, season: str, race_results: list, driver_standings: list, team_standings: list,
+             engine: str) -> tuple[list, list]:
+    # runs in a worker process
+    compute = compute_f1_stats if series == F1 else compute_moto_gp_stats
+    return compute(season, race_results, driver_standings, team_standings, engine=engine)
+
+
+def _write(series: str, season: str, drivers_list: list, teams_list: list, driver_standings: list,
+           team_standings: list, force_write: bool) -> int:
+    is_f1_feed = series == F1
+    upload = upload_f1_stats if is_f1_feed else upload_moto_gp_stats
+    written = upload(drivers_list, teams_list, driver_standings, team_standings, force=force_write)
+    if written:
+        update_config_for_stats(is_f1_feed=is_f1_feed, season_year=season)
+    return len(written)
+
+
+def _dump(out, series: str, season: str, drivers_list: list, teams_list: list) -> int:
+    for kind, standings in (("driver", drivers_list), ("team", teams_list)):
+        for stats in standings:
+            out.write(json.dumps({"series": series, "season": season, "kind": kind, "stats": stats}, sort_keys=True) + "\n")
+    out.flush()
+    return len(drivers_list) + len(teams_list)
+
+
+def run_backfill(
+        seasons: list[tuple[str, str]],
+        engine: str = DICT_ENGINE,
+        dry_run: str | None = None,
+        force_write: bool = False,
+        fetch_workers: int = DEFAULT_FETCH_WORKERS,
+        compute_workers: int = DEFAULT_COMPUTE_WORKERS,
+        checkpoint_path: str | None = None,
+        restart: bool = False,
+) -> dict:
+    """
+    Recompute the stats of every (series, season) in ``seasons``, skipping the ones of the checkpoint (of a run
+    with the same engine / dry run / force_write). The checkpoint is removed when every season is done.
+
+    Returns:
+        {"series:season": written standings (dry run: dumped standings)} of the seasons done in this run
+    """
+    params = _checkpoint_params(engine, dry_run is not None, force_write)
+    checkpoint_path = checkpoint_path or _checkpoint_path(params)
+    done = set() if restart else load_checkpoint(checkpoint_path, params)
+    todo = [(series, season) for series, season in seasons if _key(series, season) not in done]
+    logger.info(f"backfill: {len(todo)} seasons to do, {len(seasons) - len(todo)} already in {checkpoint_path}")
+    results = {}
+    if not todo:
+        clear_checkpoint(checkpoint_path)
+        return results
+
+    out = open(dry_run, "a", encoding="utf-8") if dry_run else None
+    try:
+        with ThreadPoolExecutor(max_workers=fetch_workers) as fetch_pool, \
+                ProcessPoolExecutor(max_workers=compute_workers) as compute_pool:
+            queue = iter(todo)
+            fetching, computing = {}, {}
+
+            def fetch_next():
+                # a bounded number of fetched seasons waits for the process pool, not the whole range
+                while len(fetching) + len(computing) < fetch_workers + compute_workers:
+                    item = next(queue, None)
+                    if item is None:
+                        return
+                    fetching[fetch_pool.submit(_fetch, *item)] = item
+
+            fetch_next()
+            while fetching or computing:
+                finished, _ = wait(list(fetching) + list(computing), return_when=FIRST_COMPLETED)
+                for future in finished:
+                    if future in fetching:
+                        series, season = fetching.pop(future)
+                        race_results, driver_standings, team_standings = future.result()
+                        if not driver_standings and not team_standings:
+                            logger.info(f"backfill {series} {season}: no standings, skipped")
+                            done.add(_key(series, season))
+                            save_checkpoint(checkpoint_path, params, done)
+                            continue
+                        compute_future = compute_pool.submit(
+                            _compute, series, season, race_results, driver_standings, team_standings, engine
+                        )
+                        computing[compute_future] = (series, season, driver_standings, team_standings)
+                    else:
+                        series, season, driver_standings, team_standings = computing.pop(future)
+                        drivers_list, teams_list = future.result()
+                        if out is not None:
+                            count = _dump(out, series, season, drivers_list, teams_list)
+                        else:
+                            count = _write(series, season, drivers_list, teams_list, driver_standings,
+                                           team_standings, force_write)
+                        results[_key(series, season)] = count
+                        done.add(_key(series, season))
+                        save_checkpoint(checkpoint_path, params, done)
+                        logger.info(f"backfill {series} {season}: {count} standings "
+                                    f"{'dumped' if out is not None else 'written'}")
+                fetch_next()
+        # only reached when no season failed: every season of todo is in done
+        clear_checkpoint(checkpoint_path)
+    finally:
+        if out is not None:
+            out.close()
+    return results
+
+
+if __name__ == "__main__":
+    current_year = datetime.now(timezone.utc).year
+    parser = argparse.ArgumentParser(description="Recompute driver and team stats for a range of seasons")
+    parser.add_argument("--from-year", type=valid_year, default=current_year, help="First season (e.g. 1950)")
+    parser.add_argument("--to-year", type=valid_year, default=current_year, help="Last season, included")
+    parser.add_argument("--series", nargs="+", choices=[F1, MOTO_GP], default=[F1, MOTO_GP])
+    parser.add_argument(
+        "--engine",
+        choices=STATS_ENGINES,
+        default=DICT_ENGINE,
+        help="Stats engine: per driver dict builder or columnar (pandas)"
+    )
+    parser.add_argument("--dry-run", metavar="JSONL", help="Append the computed standings to this file, write nothing")
+    parser.add_argument(
+        "--force-write",
+        action="store_true",
+        help="Upload every standing, not only the ones that differ from the stored values"
+    )
+    parser.add_argument("--fetch-workers", type=int, default=DEFAULT_FETCH_WORKERS)
+    parser.add_argument("--compute-workers", type=int, default=DEFAULT_COMPUTE_WORKERS)
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: under the cache dir)")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and redo every season")
+    args = parser.parse_args()
+
+    if args.from_year > args.to_year:
+        parser.error("--from-year is after --to-year")
+    backfill_seasons = [(series, str(year)) for year in range(args.from_year, args.to_year + 1) for series in args.series]
+    run_backfill(
+        backfill_seasons,
+        engine=args.engine,
+        dry_run=args.dry_run,
+        force_write=args.force_write,
+        fetch_workers=args.fetch_workers,
+        compute_workers=args.compute_workers,
+        checkpoint_path=args.checkpoint,
+        restart=args.restart,
+    )
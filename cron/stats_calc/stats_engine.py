@@ -0,0 +1,329 @@
+import argparse
+import json
+import os
+from dataclasses import dataclass
+from functools import partial
+from typing import Callable
+
+from loguru import logger
+
+from cron.stats_calc.columnar_stats import DICT_ENGINE, F1, MOTO_GP, STATS_ENGINES, make_stats_populator, \
+    stats_grid_id_sets
+from cron.stats_calc.race_result_index import RaceResultGroup
+
+#----------------------------------------------------------------------------------------------------------------
+# stats engine shared by F1 and MotoGP
+#----------------------------------------------------------------------------------------------------------------
+# compute_f1_stats / compute_moto_gp_stats and their dict builders were two copies of the same passes that only
+# differ in a few scoring rules. The passes live here once, the series differences are a StatsRules plug-in:
+#   - the qualifying sessions the grid comes from (F1: Q3 / SQ3, MotoGP: QNR2 + the QNR1 riders that did not go
+#     through, placed +10 behind, both grids from the same sessions) and the size of the first row (2 / 3)
+#   - the average points of a driver without a race (int 0 / float 0.0, points are int / float)
+#   - the extra relations written on the team standings (F1: seasonGrid, season, chassis)
+# the standings are read once, every stats lookup goes through make_stats_populator (RaceResultIndex or the
+# columnar engine, stats caches) and every race / sprint block is aggregated in a single loop over its records.
+#
+#   python -m cron.stats_calc.stats_engine            # both engines against the golden stats (stats_golden.json)
+#   python -m cron.stats_calc.stats_engine --write    # regenerate the golden file (only for an intended change)
+GOLDEN_PATH = os.path.join(os.path.dirname(__file__), "stats_golden.json")
+# (series, season, drivers, rounds) of the synthetic seasons in the golden file
+GOLDEN_CASES = ((F1, 2012, 20, 8), (F1, 2023, 12, 6), (MOTO_GP, 2012, 20, 8), (MOTO_GP, 2023, 12, 6))
+
+
+@dataclass(slots=True)
+class QualiRows:
+    """The qualifying rows of one grid (race or sprint) as the series rules read them."""
+    quali_positions: list
+    n_qualis: int
+    grid_positions: list
+    q3_appearances: int
+
+
+@dataclass(frozen=True)
+class StatsRules:
+    series: str
+    race_type: str
+    sprint_type: str
+    empty_avg_points: int | float
+    first_row_size: int
+    # (race results of the standing, is_sprint) -> QualiRows
+    quali: Callable[[RaceResultGroup, bool], QualiRows]
+    # (team standing, grid ids) -> extra fields of the team stats
+    team_fields: Callable[[dict, list], dict]
+
+
+def _f1_quali(race_results: RaceResultGroup, is_sprint: bool) -> QualiRows:
+    qualis = race_results.of_type("SQ3" if is_sprint else "Q3")
+    return QualiRows(
+        [r.quali_pos for r in qualis if r.has_quali_pos],
+        len(qualis),
+        [r.pos for r in qualis],
+        sum(1 for r in qualis if r.has_quali_pos and r.pos <= 10),
+    )
+
+
+def _moto_gp_quali(race_results: RaceResultGroup, is_sprint: bool) -> QualiRows:
+    # QNR1: only the riders behind the two that went through to QNR2 (mirrors the Dart populateQualiData)
+    qnr1_rest = [r for r in race_results.of_type("QNR1") if r.quali_pos > 2]
+    qnr2 = race_results.of_type("QNR2")
+    # sprint grid: sprintFinalPos ?? finalPos ?? position, race grid: finalPos ?? position
+    return QualiRows(
+        [r.quali_pos for r in qnr2 if r.has_quali_pos] + [r.quali_pos + 10 for r in qnr1_rest],
+        len(qnr2) + len(qnr1_rest),
+        [r.sprint_grid_pos if is_sprint else r.pos for r in qnr1_rest + qnr2],
+        len(qnr2),
+    )
+
+
+def _f1_team_fields(standing: dict, grid_ids: list) -> dict:
+    attributes = standing["attributes"]
+    return {
+        "seasonGrid": grid_ids,
+        "season": attributes["season"]["data"]["id"],
+        "chassis": attributes["chassis"]["data"]["id"],
+    }
+
+
+F1_RULES = StatsRules(F1, "Race", "Sprint", 0, 2, _f1_quali, _f1_team_fields)
+MOTO_GP_RULES = StatsRules(MOTO_GP, "Race", "Sprint", 0.0, 3, _moto_gp_quali, lambda standing, grid_ids: {})
+
+
+def rules_for(series: str) -> StatsRules:
+    if series == F1:
+        return F1_RULES
+    if series == MOTO_GP:
+        return MOTO_GP_RULES
+    raise ValueError(f"unknown series: {series}")
+
+
+#
+# -------- dict builder --------
+#
+def _populate_race_data(m, races, rules, keys, top_limit, top5_key=None):
+    points_key, avg_points_key, wins_key, podiums_key, top_finish_key, fl_key, dnf_key, best_key, avg_key = keys
+    points = wins = podiums = top5 = top_finish = fastest_laps = dnfs = 0
+    positions = []
+    for r in races:
+        points += r.points
+        pos = r.pos
+        if pos > 0:
+            positions.append(pos)
+            if pos <= 3:
+                podiums += 1
+                wins += pos == 1
+            if pos <= 5:
+                top5 += 1
+            if pos <= top_limit:
+                top_finish += 1
+        fastest_laps += r.fastest_lap
+        dnfs += r.dnf
+
+    m[points_key] = points
+    m[avg_points_key] = points / len(races) if races else rules.empty_avg_points
+    m[wins_key] = wins
+    m[podiums_key] = podiums
+    if top5_key:
+        m[top5_key] = top5
+    m[top_finish_key] = top_finish
+    m[fl_key] = fastest_laps
+    m[dnf_key] = dnfs
+    m[best_key] = min(positions) if positions else 0
+    m[avg_key] = sum(positions) / len(races) if positions else -999
+
+
+def _populate_quali_data(m, rows: QualiRows, rules, keys):
+    pole_key, first_row_key, q3_key, best_key, avg_key, start_pos_key, gained_key, avg_finish_key = keys
+    grid_positions = rows.grid_positions
+    m[pole_key] = sum(1 for p in grid_positions if p == 1)
+    m[first_row_key] = sum(1 for p in grid_positions if 1 <= p <= rules.first_row_size)
+    m[q3_key] = rows.q3_appearances
+
+    quali_positions = rows.quali_positions
+    m[best_key] = min(quali_positions) if quali_positions else 0
+    m[avg_key] = sum(quali_positions) / rows.n_qualis if quali_positions else -999
+    m[start_pos_key] = sum(grid_positions) / len(grid_positions) if grid_positions else -999
+    m[gained_key] = -999 if m.get(avg_finish_key) == -999 else m[start_pos_key] - m[avg_finish_key]
+
+
+def populate_stats(
+        rules: StatsRules,
+        standing_id,
+        driver_season_grid_id,
+        race_results,
+        position: int,
+        is_team: bool = False,
+        is_primary_grid_id: bool = True
+) -> dict:
+    """
+    Stats dict of a driver (or team) from its race results: strapi nodes, RaceResultRecords or a RaceResultGroup.
+    Mirrors the Dart populateDriverData().
+    """
+    race_results = RaceResultGroup.of(race_results, rules.series)
+    m = {}
+
+    _populate_race_data(m, race_results.of_type(rules.race_type), rules, (
+        "racePoints", "avgPointsPerRace", "raceWins", "racePodiums", "top10FinishInRace", "fastestLapsInRace",
+        "dnfInRace", "bestRaceFinish", "avgRaceFinishPosition"), 10, "top5FinishInRace")
+    _populate_race_data(m, race_results.of_type(rules.sprint_type), rules, (
+        "sprintPoints", "avgPointsPerSprint", "sprintWins", "sprintPodiums", "top8FinishInSprint",
+        "fastestLapsInSprint", "dnfInSprint", "bestSprintFinish", "avgSprintFinishPosition"), 8)
+    m["points"] = m["racePoints"] + m["sprintPoints"]
+
+    _populate_quali_data(m, rules.quali(race_results, False), rules, (
+        "racePoles", "raceFirstRowStarts", "q3Appearances", "bestQualiPos", "avgRaceQualiPosition",
+        "avgRaceStartGridPosition", "avgRacePositionGained", "avgRaceFinishPosition"))
+    _populate_quali_data(m, rules.quali(race_results, True), rules, (
+        "sprintPoles", "sprintFirstRowStarts", "sprintQ3Appearances", "bestSprintQualiPos",
+        "avgSprintQualiPosition", "avgSprintStartGridPosition", "avgSprintPositionGained",
+        "avgSprintFinishPosition"))
+
+    m["noOfGPs"] = len(race_results.grand_prix_ids())
+
+    m["standings_id"] = standing_id
+    m["driver_season_grid_id"] = driver_season_grid_id
+    m["is_primary_grid_id"] = is_primary_grid_id
+    m["position"] = position
+    return m
+
+
+#
+# -------- season pass --------
+#
+def _primary_grid_id(standing):
+    return standing.get("attributes", {}).get("seasonGrid", {}).get("data", {}).get("id")
+
+
+def _rank(stats_list: list) -> list:
+    stats_list.sort(key=lambda x: (-x["points"], x["bestRaceFinish"], x["position"]))
+    for i, stats in enumerate(stats_list):
+        stats["position"] = i + 1
+    return stats_list
+
+
+def compute_season_stats(rules: StatsRules, season, all_race_results, driver_standings, team_standings,
+                         engine=DICT_ENGINE, stats_cache=None, dirty_grids=None) -> tuple[list, list]:
+    """
+    Stats of every driver and team of the season, sorted and with their final positions (nothing is uploaded).
+
+    ``engine`` picks the dict builder (populate_stats) or the columnar engine, both give the same dicts.
+    ``stats_cache`` / ``dirty_grids`` reuse the stats of the grids that did not change (see make_stats_populator).
+    """
+    logger.info(f"## updateStats: {rules.series} {season} (engine: {engine})")
+    populate = make_stats_populator(
+        all_race_results, partial(populate_stats, rules), rules.series, engine,
+        grid_id_sets=stats_grid_id_sets(driver_standings, team_standings),
+        stats_cache=stats_cache, dirty_grids=dirty_grids
+    )
+
+    grid_stats = {}
+    multi_grid_stats = {}
+
+    # driver standings: primary grid, then every other grid of drivers who changed team
+    multi_grid_standings = []
+    for standing in driver_standings:
+        standings_id = standing.get("id")
+        if standings_id is None:
+            logger.warning("## driverStanding: driver id null")
+            continue
+        grid_id = _primary_grid_id(standing)
+        position = standing.get("attributes", {}).get("position", 0)
+        grid_stats[grid_id] = populate(standings_id, grid_id, [grid_id], position)
+
+        grid_ids = [g.get("id") for g in standing.get("attributes", {}).get("grids", {}).get("data", [])]
+        if grid_ids:
+            multi_grid_standings.append((standing, grid_id, grid_ids, position))
+            for other_grid_id in grid_ids:
+                if other_grid_id != grid_id:
+                    grid_stats[other_grid_id] = populate(
+                        standings_id, other_grid_id, [other_grid_id], position, is_primary_grid_id=False
+                    )
+
+    # merged stats of the drivers with multiple grids
+    for standing, grid_id, grid_ids, position in multi_grid_standings:
+        multi_grid_stats[grid_id] = populate(standing.get("id"), "", grid_ids, position, is_team=True)
+
+    drivers_list = []
+    for standing in driver_standings:
+        grid_id = _primary_grid_id(standing)
+        drivers_list.append(multi_grid_stats.get(grid_id) or grid_stats.get(grid_id))
+
+    # team standings, the averages are the sums of the driver averages
+    teams_list = []
+    for standing in team_standings:
+        grid_ids = [g.get("id") for g in standing.get("attributes", {}).get("seasonGrid", {}).get("data", [])]
+        avg_points_per_race = 0.0
+        avg_points_per_sprint = 0.0
+        for grid_id in grid_ids:
+            stats = grid_stats.get(grid_id)
+            if stats is None:
+                team_name = (
+                    standing.get("attributes", {}).get("chassis", {}).get("data", {})
+                    .get("attributes", {}).get("name", "unknown")
+                )
+                logger.warning(f"driverMap: null for {grid_id} : team: {team_name}")
+                continue
+            avg_points_per_race += stats.get("avgPointsPerRace", 0)
+            avg_points_per_sprint += stats.get("avgPointsPerSprint", 0)
+
+        position = standing.get("attributes", {}).get("position", 0)
+        stats = populate(standing.get("id"), "", grid_ids, position, is_team=True)
+        stats["avgPointsPerRace"] = avg_points_per_race
+        stats["avgPointsPerSprint"] = avg_points_per_sprint
+        stats.update(rules.team_fields(standing, grid_ids))
+        teams_list.append(stats)
+
+    return _rank(drivers_list), _rank(teams_list)
+
+
+#
+# -------- golden stats --------
+#
+def golden_stats(engine: str = DICT_ENGINE) -> dict:
+    """{"series:season": {"drivers": [...], "teams": [...]}} of the GOLDEN_CASES synthetic seasons."""
+    from cron.stats_calc.synthetic_archive import generate_season
+
+    out = {}
+    for series, season, n_drivers, n_rounds in GOLDEN_CASES:
+        race_results, driver_standings, team_standings = generate_season(
+            season, is_f1_feed=series == F1, n_drivers=n_drivers, n_rounds=n_rounds
+        )
+        drivers_list, teams_list = compute_season_stats(
+            rules_for(series), str(season), race_results, driver_standings, team_standings, engine=engine
+        )
+        out[f"{series}:{season}"] = {"drivers": drivers_list, "teams": teams_list}
+    return out
+
+
+def _golden_json(stats: dict) -> str:
+    # int 0 and float 0.0 are told apart, like in the stored standings
+    return json.dumps(stats, sort_keys=True, indent=1) + "\n"
+
+
+def check_golden(path: str = GOLDEN_PATH) -> bool:
+    with open(path, "r", encoding="utf-8") as f:
+        expected = json.load(f)
+    ok = True
+    for engine in STATS_ENGINES:
+        actual = json.loads(_golden_json(golden_stats(engine)))
+        for case in sorted(set(expected) | set(actual)):
+            if _golden_json(actual.get(case)) != _golden_json(expected.get(case)):
+                logger.error(f"golden stats differ: {case} (engine: {engine})")
+                ok = False
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check (or regenerate) the golden stats of both series")
+    parser.add_argument("--write", action="store_true", help="Rewrite the golden file with the current output")
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(lambda message: print(message, end=""), level="WARNING")
+    if args.write:
+        with open(GOLDEN_PATH, "w", encoding="utf-8") as f:
+            f.write(_golden_json(golden_stats()))
+        print(f"golden stats written: {GOLDEN_PATH}")
+    elif check_golden():
+        print(f"golden stats match ({len(GOLDEN_CASES)} seasons, engines: {', '.join(STATS_ENGINES)})")
+    else:
+        raise SystemExit(1)
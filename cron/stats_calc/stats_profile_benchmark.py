@@ -0,0 +1,287 @@
+import argparse
+import json
+import math
+import os
+import platform
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from loguru import logger
+
+from cron.stats_calc.columnar_stats import DICT_ENGINE, F1, MOTO_GP, STATS_ENGINES
+from cron.stats_calc.race_result_index import RaceResultIndex
+from cron.stats_calc.standings_sync import plan_standings_sync
+from cron.stats_calc.stats_engine import compute_season_stats, rules_for
+from cron.strapi_api.api_queries import query_driver_and_team_standings, query_race_results_all
+from cron.strapi_api.apis import fetch_driver_team_standings_for_season, iter_race_results, \
+    update_driver_standings_batch, update_team_standings_batch
+from cron.strapi_api.graphql_client import close_graphql_clients, configure_graphql_client
+from cron.strapi_api.graphql_pagination import DEFAULT_PAGE_SIZE
+from cron.strapi_api.graphql_replay import GraphQLRecording, ReplayServerProcess, server_url, start_replay_server
+from cron.utils import get_graphql_endpoint, get_graphql_token
+
+#----------------------------------------------------------------------------------------------------------------
+# stats update profiler: recorded strapi responses replayed by a local stub
+#----------------------------------------------------------------------------------------------------------------
+#   python -m cron.stats_calc.stats_profile_benchmark --series f1 --season 2024 --repeat 20 --output before.json
+#   python -m cron.stats_calc.stats_profile_benchmark --series f1 --season 2024 --compare before.json
+#   python -m cron.stats_calc.stats_profile_benchmark --series f1 --season 2024 --record f1_2024.json
+#   python -m cron.stats_calc.stats_profile_benchmark --recording f1_2024.json --latency-ms 40
+#
+# one stats update of a season split in the phases it spends its time in:
+#   fetch    : race results (paginated) + driver / team standings from strapi
+#   index    : RaceResultIndex of the race results
+#   aggregate: compute_season_stats on the index (dict builder or columnar engine)
+#   diff     : plan_standings_sync against the fetched standings
+#   write    : the batched standings mutations (answered by the stub, nothing leaves the machine)
+# the responses come from a recording (--record saves one from the configured strapi, queries only) or from a
+# synthetic season (synthetic_archive). The stub runs in a child process, --latency-ms adds a round trip to every
+# request. Every phase is timed over --repeat runs (p50 / p95), then one more run under tracemalloc gives the
+# allocations per phase. The JSON result (--output) can be compared with the one of another commit (--compare).
+PHASES = ("fetch", "index", "aggregate", "diff", "write")
+DEFAULT_REPEAT = 10
+DEFAULT_REGRESSION_THRESHOLD = 1.2
+
+
+def synthetic_recording(series: str, season: str, page_size: int = DEFAULT_PAGE_SIZE) -> GraphQLRecording:
+    """The responses of the fetch phase for a synthetic season (same shapes as strapi)."""
+    from cron.stats_calc.synthetic_archive import generate_season
+
+    race_results, driver_standings, team_standings = generate_season(int(season), is_f1_feed=series == F1)
+    recording = GraphQLRecording(meta={"series": series, "season": season, "page_size": page_size, "source": "synthetic"})
+    for start in range(0, max(len(race_results), 1), page_size):
+        recording.add(query_race_results_all, {"season": season, "start": start, "limit": page_size}, {"data": {
+            "raceResults": {
+                "data": race_results[start:start + page_size],
+                "meta": {"pagination": {"total": len(race_results)}},
+            }
+        }})
+    recording.add(query_driver_and_team_standings, {"season": season}, {"data": {
+        "driverStandings": {"data": driver_standings},
+        "teamStandings": {"data": team_standings},
+    }})
+    return recording
+
+
+#
+# -------- phases --------
+#
+def _fetch(is_f1_feed: bool, season: str, page_size: int) -> dict:
+    race_results = list(iter_race_results(is_f1_feed, season, page_size))
+    driver_standings, team_standings = fetch_driver_team_standings_for_season(is_f1_feed, season)
+    return {"race_results": race_results, "driver_standings": driver_standings, "team_standings": team_standings}
+
+
+def _run_phases(is_f1_feed: bool, season: str, engine: str, page_size: int, timer) -> dict:
+    """One stats update, ``timer(phase)`` wraps every phase. Returns the sizes of what went through."""
+    series = F1 if is_f1_feed else MOTO_GP
+    with timer("fetch"):
+        data = _fetch(is_f1_feed, season, page_size)
+    with timer("index"):
+        index = RaceResultIndex(data["race_results"], series)
+    with timer("aggregate"):
+        drivers_list, teams_list = compute_season_stats(
+            rules_for(series), season, index, data["driver_standings"], data["team_standings"], engine=engine
+        )
+    with timer("diff"):
+        driver_rows, team_rows = plan_standings_sync(
+            drivers_list, teams_list, data["driver_standings"], data["team_standings"]
+        )
+    with timer("write"):
+        if driver_rows:
+            update_driver_standings_batch(is_f1_feed, driver_rows)
+        if team_rows:
+            update_team_standings_batch(is_f1_feed, team_rows)
+    return {
+        "race_results": len(data["race_results"]),
+        "standings": len(drivers_list) + len(teams_list),
+        "written": len(driver_rows) + len(team_rows),
+    }
+
+
+class _PhaseTimer:
+    def __init__(self):
+        self.seconds = {}
+
+    def __call__(self, phase):
+        timer = self
+
+        class _Phase:
+            def __enter__(self):
+                self.start = time.perf_counter()
+
+            def __exit__(self, *exc):
+                timer.seconds[phase] = time.perf_counter() - self.start
+
+        return _Phase()
+
+
+class _PhaseAllocations:
+    """Allocations of every phase (tracemalloc must be tracing): net blocks / KB still alive and the peak."""
+
+    def __init__(self):
+        self.allocations = {}
+
+    def __call__(self, phase):
+        allocations = self.allocations
+
+        class _Phase:
+            def __enter__(self):
+                tracemalloc.reset_peak()
+                self.before = tracemalloc.take_snapshot()
+                self.current, _ = tracemalloc.get_traced_memory()
+
+            def __exit__(self, *exc):
+                _, peak = tracemalloc.get_traced_memory()
+                diff = tracemalloc.take_snapshot().compare_to(self.before, "filename")
+                allocations[phase] = {
+                    "alloc_blocks": sum(stat.count_diff for stat in diff),
+                    "alloc_kb": round(sum(stat.size_diff for stat in diff) / 1024, 1),
+                    "peak_kb": round((peak - self.current) / 1024, 1),
+                }
+
+        return _Phase()
+
+
+def percentile(values: list, q: float) -> float:
+    """Nearest rank percentile (``q`` in 0..100)."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=10,
+                             cwd=os.path.dirname(os.path.abspath(__file__)))
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def profile_stats_update(recording: GraphQLRecording, engine: str = DICT_ENGINE, repeat: int = DEFAULT_REPEAT,
+                         latency_ms: float = 0) -> dict:
+    """Phase timings (p50 / p95 / mean in ms), allocations and request counts of ``repeat`` replayed updates."""
+    series, season = recording.meta["series"], str(recording.meta["season"])
+    page_size = int(recording.meta.get("page_size", DEFAULT_PAGE_SIZE))
+    is_f1_feed = series == F1
+
+    with ReplayServerProcess(recording, latency_ms) as server:
+        configure_graphql_client(is_f1_feed, end_point=server.url, token="replay")
+        try:
+            samples = {phase: [] for phase in PHASES}
+            sizes = {}
+            for _ in range(repeat):
+                timer = _PhaseTimer()
+                sizes = _run_phases(is_f1_feed, season, engine, page_size, timer)
+                for phase in PHASES:
+                    samples[phase].append(timer.seconds[phase] * 1000)
+            requests_per_run = {op: count // repeat for op, count in server.stats().items()}
+
+            allocations = _PhaseAllocations()
+            tracemalloc.start()
+            try:
+                _run_phases(is_f1_feed, season, engine, page_size, allocations)
+            finally:
+                tracemalloc.stop()
+        finally:
+            configure_graphql_client(is_f1_feed)
+            close_graphql_clients()
+
+    phases = {}
+    for phase in PHASES:
+        values = samples[phase]
+        phases[phase] = {
+            "p50_ms": round(percentile(values, 50), 3),
+            "p95_ms": round(percentile(values, 95), 3),
+            "mean_ms": round(sum(values) / len(values), 3),
+            **allocations.allocations[phase],
+        }
+    total = [sum(samples[phase][i] for phase in PHASES) for i in range(repeat)]
+    return {
+        "commit": _git_commit(),
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "series": series,
+        "season": season,
+        "engine": engine,
+        "source": recording.meta.get("source", "recording"),
+        "repeat": repeat,
+        "latency_ms": latency_ms,
+        **sizes,
+        "requests_per_run": requests_per_run,
+        "total": {"p50_ms": round(percentile(total, 50), 3), "p95_ms": round(percentile(total, 95), 3)},
+        "phases": phases,
+    }
+
+
+def record(series: str, season: str, path: str, page_size: int = DEFAULT_PAGE_SIZE) -> GraphQLRecording:
+    """Run the fetch phase against the configured strapi through the recording server (queries only)."""
+    is_f1_feed = series == F1
+    recording = GraphQLRecording(meta={"series": series, "season": season, "page_size": page_size, "source": "recording"})
+    server = start_replay_server(recording, upstream=get_graphql_endpoint(is_f1_feed), token=get_graphql_token(is_f1_feed))
+    configure_graphql_client(is_f1_feed, end_point=server_url(server), token="replay")
+    try:
+        _fetch(is_f1_feed, season, page_size)
+    finally:
+        server.shutdown()
+        configure_graphql_client(is_f1_feed)
+    recording.save(path)
+    return recording
+
+
+def compare(result: dict, baseline: dict, threshold: float = DEFAULT_REGRESSION_THRESHOLD) -> list[str]:
+    """Print the p50 of every phase next to ``baseline``, returns the phases slower than ``threshold`` x baseline."""
+    regressions = []
+    print(f"{'phase':>10} {'baseline':>12} {'current':>12} {'ratio':>7}   (p50, ms; baseline {baseline.get('commit')})")
+    for phase in PHASES + ("total",):
+        old = (baseline.get("phases", {}).get(phase) or baseline.get(phase) or {}).get("p50_ms")
+        new = (result["phases"].get(phase) or result.get(phase) or {}).get("p50_ms")
+        if old is None or new is None:
+            continue
+        ratio = new / old if old else float("inf")
+        flag = "  REGRESSION" if ratio > threshold and new - old > 1 else ""
+        print(f"{phase:>10} {old:12.3f} {new:12.3f} {ratio:6.2f}x{flag}")
+        if flag:
+            regressions.append(phase)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile the stats update phases against replayed strapi responses")
+    parser.add_argument("--series", choices=[F1, MOTO_GP], default=F1)
+    parser.add_argument("--season", default="2023")
+    parser.add_argument("--recording", help="Recorded responses (default: a synthetic season)")
+    parser.add_argument("--record", metavar="PATH", help="Record the fetch phase from the configured strapi and exit")
+    parser.add_argument("--engine", choices=STATS_ENGINES, default=DICT_ENGINE)
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--latency-ms", type=float, default=0, help="Simulated round trip per request")
+    parser.add_argument("--output", help="Write the result JSON to this file")
+    parser.add_argument("--compare", metavar="BASELINE", help="Result JSON of another commit to compare with")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_REGRESSION_THRESHOLD,
+                        help="p50 ratio above which a phase counts as a regression (exit code 1)")
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(lambda message: print(message, end=""), level="WARNING")
+    if args.record:
+        recording = record(args.series, args.season, args.record)
+        print(f"recorded {len(recording)} responses to {args.record}")
+        return
+
+    recording = GraphQLRecording.load(args.recording) if args.recording else synthetic_recording(args.series, args.season)
+    result = profile_stats_update(recording, engine=args.engine, repeat=max(1, args.repeat), latency_ms=args.latency_ms)
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(result, baseline, args.threshold):
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+import random
+
+#----------------------------------------------------------------------------------------------------------------
+# synthetic strapi archive for the stats benchmarks
+#----------------------------------------------------------------------------------------------------------------
+# builds race results, driver standings and team standings with the same node shape as query_race_results_all /
+# query_driver_and_team_standings, so the stats code can be exercised without a strapi instance.
+# Every season has a couple of drivers who changed team mid-season (multi grid standings).
+F1_POINTS = [25, 18, 15, 12, 10, 8, 6, 4, 2, 1]
+F1_SPRINT_POINTS = [8, 7, 6, 5, 4, 3, 2, 1]
+MOTO_POINTS = [25, 20, 16, 13, 11, 10, 9, 8, 7, 6, 5, 4, 3, 2, 1]
+MOTO_SPRINT_POINTS = [12, 9, 7, 6, 5, 4, 3, 2, 1]
+
+
+def _node(node_id, attributes):
+    return {"id": str(node_id), "attributes": attributes}
+
+
+def _race_result(result_id, race_id, rtype, gp_id, gp_round, grid, position, points, dnf=False, fastest_lap=False,
+                 final_pos=None, sprint_final_pos=None):
+    return _node(result_id, {
+        "race": {"data": _node(race_id, {
+            "type": rtype,
+            "grandPrix": {"data": _node(gp_id, {"round": gp_round, "name": f"GP {gp_round}"})},
+        })},
+        "seasonGrid": {"data": _node(grid["id"], {
+            "driver": {"data": _node(grid["driver"], {"initials": f"D{grid['driver']}"})},
+            "chassis": {"data": {"attributes": {"team": {"data": _node(grid["team"], {"name": f"Team {grid['team']}"})}}}},
+        })},
+        "laps": 50,
+        "points": points,
+        "time": None,
+        "position": position,
+        "finalPos": final_pos,
+        "fastestLap": fastest_lap,
+        "dnf": dnf,
+        "fantasyPts": None,
+        "sprintFinalPos": sprint_final_pos,
+        "classification": {"data": _node(1, {"type": "DNF"}) if dnf else None},
+    })
+
+
+def generate_season(year: int, is_f1_feed: bool = True, n_drivers: int = 20, n_rounds: int = 22,
+                    id_offset: int = 0, seed: int | None = None) -> tuple[list, list, list]:
+    """
+    One synthetic season.
+
+    Returns:
+        (race_results, driver_standings, team_standings) shaped like the strapi responses
+    """
+    rnd = random.Random(seed if seed is not None else year)
+    ids = iter(range(id_offset + 1, id_offset + 10_000_000))
+    n_teams = n_drivers // 2
+
+    # one grid per seat, the last two drivers swap in a replacement (second grid) half way through
+    grids = [{"id": str(next(ids)), "driver": id_offset + d, "team": id_offset + d // 2} for d in range(n_drivers)]
+    swap_grids = {
+        d: {"id": str(next(ids)), "driver": id_offset + d, "team": id_offset + (d + 2) % n_teams}
+        for d in range(n_drivers - 2, n_drivers)
+    }
+
+    if is_f1_feed:
+        sessions = [("Q3", None), ("Race", F1_POINTS)]
+        sprint_sessions = [("SQ3", None), ("Sprint", F1_SPRINT_POINTS)]
+        sprint_rounds = set(rnd.sample(range(1, n_rounds + 1), 6))
+    else:
+        sessions = [("QNR1", None), ("QNR2", None), ("Race", MOTO_POINTS)]
+        sprint_sessions = [("Sprint", MOTO_SPRINT_POINTS)]
+        sprint_rounds = set(range(1, n_rounds + 1))
+
+    race_results = []
+    for gp_round in range(1, n_rounds + 1):
+        gp_id = next(ids)
+        round_grids = [swap_grids[d] if d in swap_grids and gp_round > n_rounds // 2 else g for d, g in enumerate(grids)]
+        for rtype, points_table in sessions + (sprint_sessions if gp_round in sprint_rounds else []):
+            race_id = next(ids)
+            order = list(round_grids)
+            rnd.shuffle(order)
+            if rtype in ("QNR1", "QNR2"):
+                order = order[:12]
+            fastest = rnd.randrange(len(order))
+            for i, grid in enumerate(order):
+                position = i + 1
+                dnf = points_table is not None and rnd.random() < 0.06
+                points = points_table[i] if points_table and i < len(points_table) and not dnf else 0
+                race_results.append(_race_result(
+                    next(ids), race_id, rtype, gp_id, gp_round, grid, None if dnf else position, points,
+                    dnf=dnf, fastest_lap=points_table is not None and i == fastest,
+                    final_pos=position if points_table is None and rnd.random() < 0.5 else None,
+                ))
+
+    season = _node(id_offset, {"year": str(year)})
+    driver_standings = []
+    for d, grid in enumerate(grids):
+        attributes = {
+            "season": {"data": season},
+            "seasonGrid": {"data": _node(grid["id"], {"driver": {"data": _node(grid["driver"], {"initials": f"D{d}"})}})},
+            "position": d + 1,
+            "points": 0,
+            "grids": {"data": [_node(grid["id"], {}), _node(swap_grids[d]["id"], {})] if d in swap_grids else []},
+        }
+        driver_standings.append(_node(next(ids), attributes))
+
+    team_standings = []
+    for t in range(n_teams):
+        team_grids = [g for g in grids if g["team"] == id_offset + t] + [g for g in swap_grids.values() if g["team"] == id_offset + t]
+        team_standings.append(_node(next(ids), {
+            "season": {"data": season},
+            "chassis": {"data": _node(id_offset + t, {"name": f"Team {t}"})},
+            "seasonGrid": {"data": [_node(g["id"], {}) for g in team_grids]},
+            "position": t + 1,
+            "points": 0,
+        }))
+    return race_results, driver_standings, team_standings
+
+
+def generate_archive(seasons: int = 20, is_f1_feed: bool = True, first_year: int = 2006, **kwargs) -> dict:
+    """{year: (race_results, driver_standings, team_standings)} for ``seasons`` consecutive years."""
+    return {
+        str(year): generate_season(year, is_f1_feed=is_f1_feed, id_offset=i * 10_000_000, **kwargs)
+        for i, year in enumerate(range(first_year, first_year + seasons))
+    }
@@ -80,11 +80,11 @@ mutation_update_feed = """
         }
 """
 query_old_feeds = """
-        query GetOldFeeds($cutoffDate: DateTime!, $limit: Int!, $start: Int!, $locale: I18NLocaleCode) {
+        query GetOldFeeds($cutoffDate: DateTime!, $limit: Int!, $afterId: ID!, $locale: I18NLocaleCode) {
               feeds(
-                    filters: { pubDate: { lte: $cutoffDate } }
-                    pagination: { limit: $limit, start: $start }
-                    sort: ["pubDate:asc", "id:asc"],
+                    filters: { pubDate: { lte: $cutoffDate }, id: { gt: $afterId } }
+                    pagination: { limit: $limit }
+                    sort: ["id:asc"],
                     locale: $locale
               ) {
                     data {
@@ -94,11 +94,11 @@ query_old_feeds = """
         }
 """
 query_old_votes = """
-        query GetOldVotes($cutoffDate: DateTime!, $limit: Int!, $start: Int!) {
+        query GetOldVotes($cutoffDate: DateTime!, $limit: Int!, $afterId: ID!) {
             votes(
-                filters: { updatedAt: { lte: $cutoffDate } }
-                pagination: { limit: $limit, start: $start }
-                sort: ["updatedAt:asc", "id:asc"]
+                filters: { updatedAt: { lte: $cutoffDate }, id: { gt: $afterId } }
+                pagination: { limit: $limit }
+                sort: ["id:asc"]
             ) {
                 data {
                     id
@@ -108,11 +108,11 @@ query_old_votes = """
 """
 
 query_old_vote_counts = """
-        query GetOldVoteCounts($cutoffDate: DateTime!, $limit: Int!, $start: Int!) {
+        query GetOldVoteCounts($cutoffDate: DateTime!, $limit: Int!, $afterId: ID!) {
             voteCounts(
-                filters: { updatedAt: { lte: $cutoffDate } }
-                pagination: { limit: $limit, start: $start }
-                sort: ["updatedAt:asc", "id:asc"]
+                filters: { updatedAt: { lte: $cutoffDate }, id: { gt: $afterId } }
+                pagination: { limit: $limit }
+                sort: ["id:asc"]
             ) {
                 data {
                     id
@@ -298,8 +298,8 @@ query_get_tracks = """
         """
 
 query_get_grand_prixes_for_year = """
-        query GetGrandPrixRacesQuery($season:String!) {
-            grandPrixes(filters: { season: { year: { eq: $season} } }, sort: "startDate:asc", pagination: {limit: 100}) {
+        query GetGrandPrixesQuery($season:String!, $limit: Int, $start: Int) {
+            grandPrixes(filters: { season: { year: { eq: $season} } }, sort: ["startDate:asc", "id:asc"], pagination: {start: $start, limit: $limit}) {
                 data {
                     id
                     attributes {
@@ -322,8 +322,18 @@ query_get_grand_prixes_for_year = """
                         }
                     }
                 }
+                meta {
+                    pagination {
+                        total
+                    }
+                }
             }
-            races(filters: { grandPrix: {season: { year: { eq: $season} } } }, sort: "startTime:asc", pagination: {limit: 500}) {
+        }
+        """
+
+query_get_races_for_year = """
+        query GetRacesQuery($season:String!, $limit: Int, $start: Int) {
+            races(filters: { grandPrix: {season: { year: { eq: $season} } } }, sort: ["startTime:asc", "id:asc"], pagination: {start: $start, limit: $limit}) {
                 data {
                     id
                     attributes {
@@ -338,6 +348,11 @@ query_get_grand_prixes_for_year = """
                         }
                     }
                 }
+                meta {
+                    pagination {
+                        total
+                    }
+                }
             }
         }
         """
@@ -553,6 +568,7 @@ query_race_results_all = """
                     limit: $limit,
                     start: $start
                 }
+                sort: "id:asc"
                 filters: {
                     race: {
                         grandPrix: {
@@ -573,6 +589,7 @@ query_race_results_all = """
                     attributes {
                         race {
                             data {
+                                id
                                 attributes {
                                     type
                                     grandPrix {
@@ -635,6 +652,107 @@ query_race_results_all = """
                         }
                     }
                 }
+                meta {
+                    pagination {
+                        total
+                    }
+                }
+            }
+        }
+"""
+
+query_race_results_for_races = """
+        query GetRaceResultsForRaces($raceIds: [ID]!,$limit: Int, $start: Int) {
+            raceResults(
+                pagination: {
+                    limit: $limit,
+                    start: $start
+                }
+                sort: "id:asc"
+                filters: {
+                    race: {
+                        id: {
+                            in: $raceIds
+                        }
+                        type:{
+                            in: ["Race", "Q3","Sprint","SQ3", "QNR1", "QNR2"]
+                        }
+                    }
+                }
+            ) {
+                data {
+                    id
+                    attributes {
+                        race {
+                            data {
+                                id
+                                attributes {
+                                    type
+                                    grandPrix {
+                                        data {
+                                            id
+                                            attributes {
+                                                round
+                                                name
+                                            }
+                                        }
+                                    }
+                                }
+                            }
+                        }
+                        seasonGrid {
+                            data {
+                                id
+                                attributes {
+                                    driver {
+                                        data {
+                                            id
+                                            attributes {
+                                                initials
+                                            }
+                                        }
+                                    }
+                                    chassis {
+                                        data {
+                                            attributes {
+                                                team {
+                                                    data {
+                                                        id
+                                                        attributes {
+                                                            name
+                                                        }
+                                                    }
+                                                }
+                                            }
+                                        }
+                                    }
+                                }
+                            }
+                        }
+                        laps
+                        points
+                        time
+                        position
+                        finalPos
+                        fastestLap
+                        dnf
+                        fantasyPts
+                        sprintFinalPos
+                        classification {
+                            data {
+                                id
+                                attributes {
+                                    type
+                                }
+                            }
+                        }
+                    }
+                }
+                meta {
+                    pagination {
+                        total
+                    }
+                }
             }
         }
 """
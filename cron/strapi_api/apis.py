@@ -1,20 +1,26 @@
-from bs4 import BeautifulSoup
-from googletrans import Translator
-
+from cron.rss.desc_sanitizer import sanitize_description
+from cron.rss.image_resolver import resolve_primary_image
 from cron.strapi_api.api_queries import query_get_latest_grand_prixes, mutation_post_feed, \
     mutation_update_config_for_feeds, \
     query_get_config, mutation_post_weather, mutation_update_race_with_weather, mutation_update_weather, \
     query_old_feeds, mutation_delete_feed, query_old_votes, mutation_delete_vote, \
     query_old_vote_counts, mutation_delete_vote_count, query_get_seasons, query_get_grand_prixes_for_year, \
+    query_get_races_for_year, \
     mutation_post_season, mutation_update_config_for_season, query_get_tracks, mutation_post_grand_prix, \
     mutation_post_race, mutation_update_race_with_time, mutation_update_config_for_gp, \
     mutation_get_latest_past_race_entry, query_race_results_for_race_event, query_season_grid, \
-    mutation_post_race_result, query_race_results_all, query_driver_and_team_standings, mutation_update_driver_standing, \
+    mutation_post_race_result, query_race_results_all, query_race_results_for_races, query_driver_and_team_standings, mutation_update_driver_standing, \
     mutation_update_team_standing, mutation_update_config_for_stats, mutation_update_race_result, \
     mutation_update_config_for_race_result, query_fastest_laps_for_gp, mutation_post_fastest_lap, \
     mutation_update_constructor_standing_moto_gp, query_get_constructor_standing_moto_gp, \
     mutation_create_constructor_standing_moto_gp
+from cron.strapi_api.graphql_batch import run_batched_mutation, DEFAULT_BATCH_SIZE
+from cron.strapi_api.graphql_client import get_graphql_client
+from cron.strapi_api.graphql_pagination import count_rows, iter_rows, DEFAULT_PAGE_SIZE
+from cron.strapi_api.season_snapshots import get_season_snapshot_store, RACE_RESULTS, STANDINGS, SEASON_GRID
+from cron.translation.translation_service import get_translation_service
 from cron.utils import *
+import asyncio
 import requests
 import re
 import json
@@ -23,39 +29,23 @@ from datetime import datetime, timezone
 from cron.weather.weather_utils import convert_weather_api_json_to_strapi_json
 from loguru import logger
 
-#----------------------------------------------------------------------------------------------------------------
-# common code
-#----------------------------------------------------------------------------------------------------------------
-def get_headers(is_f1_feed: bool) -> dict[str, str]:
-    token = get_graphql_token(is_f1_feed)
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {token}"
-    }
-    return headers
-
 #----------------------------------------------------------------------------------------------------------------
 # Config relate code
 #----------------------------------------------------------------------------------------------------------------
 def get_config(is_f1_feed: bool) -> str:
-    end_point = get_graphql_endpoint(is_f1_feed)
-    response = requests.post(end_point, json={'query': query_get_config}, headers=get_headers(is_f1_feed))
+    response = get_graphql_client(is_f1_feed).post({'query': query_get_config})
     config_json = response.json()['data']['config']['data']['attributes']
     logger.debug(f"config_json: {config_json}")
     return config_json
 
 def get_config_for_feeds(is_f1_feed: bool) -> str:
-    end_point = get_graphql_endpoint(is_f1_feed)
-
-    response = requests.post(end_point, json={'query': query_get_config}, headers=get_headers(is_f1_feed))
+    response = get_graphql_client(is_f1_feed).post({'query': query_get_config})
     logger.debug(f"get_config_for_feeds response: {response.json()}")
     config_json = response.json()['data']['config']['data']['attributes']['feedJson']
     logger.debug(f"config_json: {config_json}")
     return config_json
 
-def update_config_for_feeds(is_f1_feed, config_json_str) -> None:
-    end_point = get_graphql_endpoint(is_f1_feed)
-
+def update_config_for_feeds(is_f1_feed, config_json_str) -> bool:
     # Define new values for feedJson
     variables = f"""
     {{
@@ -67,29 +57,32 @@ def update_config_for_feeds(is_f1_feed, config_json_str) -> None:
     logger.info(f"update_config_for_feeds config_json_str: {config_json_str}")
     logger.debug(f"update_config_for_feeds variables: {variables}")
 
-    response = requests.post(end_point, json={"query": mutation_update_config_for_feeds, "variables": variables}, headers=get_headers(is_f1_feed))
+    response = get_graphql_client(is_f1_feed).post({"query": mutation_update_config_for_feeds, "variables": variables})
     logger.debug(f"update_config_for_feeds response: {response.json()}")
+    if response.status_code != 200 or response.json().get("errors"):
+        logger.error(f"update_config_for_feeds failed: {response.status_code} - {response.text}")
+        return False
+    return True
 
 #----------------------------------------------------------------------------------------------------------------
 # RSS FEEDs relate code
 #----------------------------------------------------------------------------------------------------------------
-async def post_feed(is_f1_feed, feed, feed_source):
-    logger.info(f"posting feed to strapi: {feed.title}")
-    end_point = get_graphql_endpoint(is_f1_feed)
-
+def build_feed_map(feed, feed_source) -> dict:
+    """Enrich a feedparser entry into the strapi FeedInput map (clean description, ISO date, image)."""
     feed_map = {'title': feed.title}
     summary = process_feed_desc(feed.summary)
     feed_map['description'] = summary
     feed_map['guid'] = feed.id
 
-    # Convert to datetime object
-    dt = parse_datetime_string(feed.published)
+    # Convert to datetime object (already parsed when the entry was selected by the feed pipeline)
+    dt = feed.get('published_dt') or parse_datetime_string(feed.published)
     # Convert datetime to ISO format string
     json_date = dt.isoformat()
     feed_map['pubDate'] = json_date
 
     feed_map['source'] = feed_source + ".com"
     feed_map['link'] = feed.link
+    feed_map['imageUrl'] = None
 
     # if feed has image urls then get that
     if feed.links:
@@ -103,66 +96,96 @@ async def post_feed(is_f1_feed, feed, feed_source):
         if primary_image:
             feed_map['imageUrl'] = primary_image
 
-    # Define new values for feedJson
-    variables = {"input": feed_map, "locale": "en"}
-    # print(f"------> variables: {variables}")
+    return feed_map
 
-    # Send the request
-    response = requests.post(end_point, json={"query": mutation_post_feed, "variables": variables}, headers=get_headers(is_f1_feed))
+# number of locales translated / posted at the same time for one article
+LOCALE_CONCURRENCY = 9
+
+async def _post_feed_input(is_f1_feed, feed_input: dict, locale: str) -> dict | None:
+    """Create one feed entry for ``locale``, returns createFeed.data or None (errors are logged)."""
+    variables = {"input": feed_input, "locale": locale}
+    # the pooled session is blocking, so every request runs in a worker thread and locales overlap
+    response = await asyncio.to_thread(
+        get_graphql_client(is_f1_feed).post, {"query": mutation_post_feed, "variables": variables}
+    )
     result = response.json()
-    logger.debug(f"post_feed result: {result}")
+    logger.debug(f"post_feed [{locale}] result: {result}")
 
     # Check for GraphQL errors
     if "errors" in result:
-        logger.error(f"GraphQL errors: {result['errors']}")
-        return
+        logger.error(f"GraphQL errors [{locale}]: {result['errors']}")
+        return None
 
     # Check that createFeed->data exists
-    feed_data = result.get("data", {}).get("createFeed", {}).get("data")
+    feed_data = (result.get("data") or {}).get("createFeed", {}).get("data")
     if not feed_data:
-        logger.error(f"No feed data in response: {result}")
-        return
+        logger.error(f"No feed data in response [{locale}]: {result}")
+        return None
+    return feed_data
 
-    feed_id = feed_data["id"]
-    logger.info(f"feed_id : {feed_id}")
+async def post_feed_map(is_f1_feed, feed_map: dict, concurrency: int = LOCALE_CONCURRENCY) -> dict[str, bool]:
+    """
+    Post the english feed and one translated copy per locale.
 
-    # Initialize translator
-    translator = Translator()
+    Every locale is an independent task (translate, then post once the english feed exists), at most
+    ``concurrency`` of them run at a time and a failing locale never affects the others.
 
-    # Translate title and description for other locales
-    for locale in locales:
-        try:
-            translated_title_obj = await translator.translate(feed_map["title"], dest=locale)
-            translated_desc_obj = await translator.translate(feed_map["description"], dest=locale)
-
-            translated_title = translated_title_obj.text
-            translated_desc = translated_desc_obj.text
-            logger.debug(f"{locale} : title: {translated_title}")
-
-            updated_map = feed_map.copy()
-            updated_map['title'] = translated_title
-            updated_map['description'] = translated_desc
-            updated_map['guid'] = feed_map['guid'] + locale
-
-            variables_update = {"input": updated_map, "locale": locale}
-            # variables_update = {"input": updated_map, "locale": locale, "feedId": feed_id}
-            # print(f"variable : {variables_update}")
-            update_response = requests.post(
-                end_point,
-                json={"query": mutation_post_feed, "variables": variables_update},
-                # json={"query": mutation_update_feed, "variables": variables_update},
-                headers=get_headers(is_f1_feed),
+    Returns:
+        {locale: posted} including "en"
+    """
+    logger.info(f"posting feed to strapi: {feed_map['title']}")
+    translation_service = get_translation_service()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _post_english() -> bool:
+        feed_data = await _post_feed_input(is_f1_feed, feed_map, "en")
+        if feed_data:
+            logger.info(f"feed_id : {feed_data['id']}")
+        return feed_data is not None
+
+    english_task = asyncio.create_task(_post_english())
+
+    async def _post_locale(locale: str) -> bool:
+        async with semaphore:
+            translated_title, translated_desc = await asyncio.to_thread(
+                translation_service.translate_texts, [feed_map["title"], feed_map["description"]], locale
             )
-            logger.info(f"Update Feed [{locale}] Response: {update_response.json()}")
-        except Exception as e:
-            logger.warning(f"Translation failed for locale {locale}: {e}")
-            logger.warning(f"Skipping {locale} translation for this feed")
+        logger.debug(f"{locale} : title: {translated_title}")
+        # translated copies are only created once the english feed exists
+        if not await english_task:
+            return False
+
+        updated_map = feed_map.copy()
+        updated_map['title'] = translated_title
+        updated_map['description'] = translated_desc
+        updated_map['guid'] = feed_map['guid'] + locale
+        async with semaphore:
+            return await _post_feed_input(is_f1_feed, updated_map, locale) is not None
+
+    feed_locales = sorted(locales)
+    results = await asyncio.gather(*(_post_locale(locale) for locale in feed_locales), return_exceptions=True)
+
+    summary = {"en": await english_task}
+    for locale, result in zip(feed_locales, results):
+        if isinstance(result, Exception):
+            logger.warning(f"Translating / posting feed failed for locale {locale}: {type(result).__name__}: {result}")
+        summary[locale] = result is True
+
+    posted = [locale for locale, ok in summary.items() if ok]
+    failed = [locale for locale, ok in summary.items() if not ok]
+    logger.info(f"feed '{feed_map['title']}' posted for {posted}" + (f", failed for {failed}" if failed else ""))
+    return summary
+
+async def post_feed(is_f1_feed, feed, feed_source) -> dict[str, bool]:
+    feed_map = await asyncio.to_thread(build_feed_map, feed, feed_source)
+    return await post_feed_map(is_f1_feed, feed_map)
 
 # Fetch primary image from feed.link if feed.links is empty
 def fetch_primary_image(url: str):
     """
     Fetch the primary image (og:image meta tag) from a URL.
-    Includes retry logic and browser-like headers to bypass common bot detection.
+    Only the <head> of the page is downloaded and results (including misses) are cached,
+    see cron/rss/image_resolver.py.
 
     Args:
         url: The URL to fetch the image from
@@ -170,158 +193,69 @@ def fetch_primary_image(url: str):
     Returns:
         Image URL from og:image meta tag, or None if not found or error occurs
     """
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-        "Accept-Language": "en-US,en;q=0.5",
-        "Accept-Encoding": "gzip, deflate",
-        "DNT": "1",
-        "Connection": "keep-alive",
-        "Upgrade-Insecure-Requests": "1"
-    }
+    return resolve_primary_image(url)
 
-    max_retries = 3
-    retry_delay = 1
-
-    for attempt in range(max_retries):
-        try:
-            logger.debug(f"Fetching primary image from {url} (attempt {attempt + 1}/{max_retries})")
-            response = requests.get(url, headers=headers, timeout=10)
-
-            # Log the status code for debugging
-            logger.debug(f"Response status code: {response.status_code}")
-
-            # Handle 403 and 429 (rate limiting) gracefully
-            if response.status_code == 403:
-                logger.warning(f"Access forbidden (403) for {url}. Skipping.")
-                return None
-            elif response.status_code == 429:
-                logger.warning(f"Rate limited (429) for {url}. Retrying in {retry_delay}s...")
-                if attempt < max_retries - 1:
-                    import time
-                    time.sleep(retry_delay)
-                    retry_delay *= 2  # Exponential backoff
-                    continue
-                else:
-                    return None
-            elif response.status_code == 404:
-                logger.warning(f"Page not found (404) for {url}. Skipping.")
-                return None
-
-            response.raise_for_status()
-
-            soup = BeautifulSoup(response.content, "html.parser")
-            img_tag = soup.find("meta", property="og:image")
-            if img_tag and img_tag.get("content"):
-                image_url = img_tag["content"]
-                logger.debug(f"Found primary image: {image_url}")
-                return image_url
-            else:
-                logger.debug(f"No og:image meta tag found for {url}")
-                return None
-
-        except requests.exceptions.Timeout:
-            logger.warning(f"Timeout fetching {url} (attempt {attempt + 1}/{max_retries})")
-            if attempt < max_retries - 1:
-                continue
-            else:
-                return None
-        except requests.exceptions.ConnectionError as e:
-            logger.warning(f"Connection error fetching {url}: {e} (attempt {attempt + 1}/{max_retries})")
-            if attempt < max_retries - 1:
-                continue
-            else:
-                return None
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Request error fetching primary image from {url}: {e}")
-            return None
-        except Exception as e:
-            logger.error(f"Unexpected error fetching primary image from {url}: {e}")
-            return None
-
-    return None
-
-def fetch_old_feeds(is_f1_feed: bool, cutoff_date_str: str, start=0, limit=50, lang: str = "en"):
-    end_point = get_graphql_endpoint(is_f1_feed)
-    variables = {"cutoffDate": cutoff_date_str, "limit": limit, "start": start, "locale": lang}
-    resp = requests.post(end_point, json={"query": query_old_feeds, "variables": variables}, headers=get_headers(is_f1_feed))
+def fetch_old_feeds(is_f1_feed: bool, cutoff_date_str: str, after_id=0, limit=50, lang: str = "en"):
+    variables = {"cutoffDate": cutoff_date_str, "limit": limit, "afterId": after_id, "locale": lang}
+    resp = get_graphql_client(is_f1_feed).post({"query": query_old_feeds, "variables": variables})
     resp.raise_for_status()
     return resp.json()["data"]["feeds"]["data"]
 
-def fetch_old_votes(is_f1_feed: bool, cutoff_date_str: str, start=0, limit=50):
-    end_point = get_graphql_endpoint(is_f1_feed)
-    variables = {"cutoffDate": cutoff_date_str, "limit": limit, "start": start}
-    resp = requests.post(end_point, json={"query": query_old_votes, "variables": variables}, headers=get_headers(is_f1_feed))
+def fetch_old_votes(is_f1_feed: bool, cutoff_date_str: str, after_id=0, limit=50):
+    variables = {"cutoffDate": cutoff_date_str, "limit": limit, "afterId": after_id}
+    resp = get_graphql_client(is_f1_feed).post({"query": query_old_votes, "variables": variables})
     resp.raise_for_status()
     logger.debug(f"fetch_old_votes response: {resp.json()}")
     return resp.json()["data"]["votes"]["data"]
 
-def fetch_old_vote_counts(is_f1_feed: bool, cutoff_date_str: str, start=0, limit=50):
-    end_point = get_graphql_endpoint(is_f1_feed)
-    variables = {"cutoffDate": cutoff_date_str, "limit": limit, "start": start}
-    resp = requests.post(end_point, json={"query": query_old_vote_counts, "variables": variables}, headers=get_headers(is_f1_feed))
+def fetch_old_vote_counts(is_f1_feed: bool, cutoff_date_str: str, after_id=0, limit=50):
+    variables = {"cutoffDate": cutoff_date_str, "limit": limit, "afterId": after_id}
+    resp = get_graphql_client(is_f1_feed).post({"query": query_old_vote_counts, "variables": variables})
     resp.raise_for_status()
     logger.debug(f"fetch_old_vote_counts response: {resp.json()}")
     return resp.json()["data"]["voteCounts"]["data"]
 
 def delete_feed(is_f1_feed: bool, feed_id):
-    end_point = get_graphql_endpoint(is_f1_feed)
     variables = {"id": feed_id}
-    resp = requests.post(end_point, json={"query": mutation_delete_feed, "variables": variables}, headers=get_headers(is_f1_feed))
+    resp = get_graphql_client(is_f1_feed).post({"query": mutation_delete_feed, "variables": variables})
     resp.raise_for_status()
     return resp.json()
 
 def delete_vote(is_f1_feed: bool, feed_id):
-    end_point = get_graphql_endpoint(is_f1_feed)
     variables = {"id": feed_id}
-    resp = requests.post(end_point, json={"query": mutation_delete_vote, "variables": variables}, headers=get_headers(is_f1_feed))
+    resp = get_graphql_client(is_f1_feed).post({"query": mutation_delete_vote, "variables": variables})
     resp.raise_for_status()
     return resp.json()
 
 def delete_vote_count(is_f1_feed: bool, feed_id):
-    end_point = get_graphql_endpoint(is_f1_feed)
     variables = {"id": feed_id}
-    resp = requests.post(end_point, json={"query": mutation_delete_vote_count, "variables": variables}, headers=get_headers(is_f1_feed))
+    resp = get_graphql_client(is_f1_feed).post({"query": mutation_delete_vote_count, "variables": variables})
     resp.raise_for_status()
     return resp.json()
 
 def process_feed_desc(description: str) -> str:
     """
-    Removes <img> and <br> tags (in any case or format) from the given text.
+    Plain text of a feed summary: tags and link text removed, whitespace collapsed, truncated to
+    DESC_MAX_LENGTH (see cron/rss/desc_sanitizer.py).
     """
-    if not description:
-        return ""
-
-    # Remove all <img ...> tags
-    description = re.sub(r'<img[^>]*>', '', description, flags=re.IGNORECASE)
-
-    # Remove all <br>, <br/>, <br /> (case-insensitive)
-    description = re.sub(r'<br\s*/?>', '', description, flags=re.IGNORECASE)
-
-    # Remove <a ...>...</a> including inner text
-    description = re.sub(r'<a\b[^>]*>.*?</a>', '', description, flags=re.IGNORECASE | re.DOTALL)
-
-    return description.strip()
+    return sanitize_description(description)
 
 #----------------------------------------------------------------------------------------------------------------
 # weather relate code
 #----------------------------------------------------------------------------------------------------------------
 def get_upcoming_races(is_f1_feed) -> str:
-    end_point = get_graphql_endpoint(is_f1_feed)
     current_date_str =  current_datetime_iso()
     variables = {
         "currentDate": current_date_str,
     }
     logger.info(f"get_upcoming_races variables: {variables}")
 
-    response = requests.post(end_point, json={'query': query_get_latest_grand_prixes, "variables": variables}, headers=get_headers(is_f1_feed))
+    response = get_graphql_client(is_f1_feed).post({'query': query_get_latest_grand_prixes, "variables": variables})
     data = response.json()
     logger.debug(f"get_upcoming_races response: {data}")
     return response.json()
 
 def create_weather(is_f1_feed: bool, weather_json: str, race_id: str, lat: float, lon: float) -> str:
-    # Define GraphQL endpoint
-    end_point = get_graphql_endpoint(is_f1_feed)
     json_str = convert_weather_api_json_to_strapi_json(weather_json, race_id, lat, lon)
     variables = f"""
       {{
@@ -330,7 +264,7 @@ def create_weather(is_f1_feed: bool, weather_json: str, race_id: str, lat: float
       """
 
     logger.info(f"create_weather variables: {variables}")
-    response = requests.post(end_point, json={'query': mutation_post_weather, "variables": variables}, headers=get_headers(is_f1_feed))
+    response = get_graphql_client(is_f1_feed).post({'query': mutation_post_weather, "variables": variables})
     data = response.json()
     logger.debug(f"create_weather response: {data}")
     weather_id = data['data']['createWeather']['data']['id']
@@ -338,20 +272,18 @@ def create_weather(is_f1_feed: bool, weather_json: str, race_id: str, lat: float
     return weather_id
 
 def update_weather_in_race(is_f1_feed: bool, weather_id: str, race_id: str) -> str:
-    end_point = get_graphql_endpoint(is_f1_feed)
     variables = {
         "weatherId": weather_id,
         "raceId": race_id,
     }
     logger.info(f"update_weather_in_race variables: {variables}")
-    response = requests.post(end_point, json={'query': mutation_update_race_with_weather, "variables": variables}, headers=get_headers(is_f1_feed))
+    response = get_graphql_client(is_f1_feed).post({'query': mutation_update_race_with_weather, "variables": variables})
     data = response.json()
     logger.debug(f"update_weather_in_race response: {data}")
     return response.json()
 
 
 def update_weather(is_f1_feed: bool, weather_id: str, weather_json: str, race_id: str, lat: float, lon: float) -> str:
-    end_point = get_graphql_endpoint(is_f1_feed)
     json_str = convert_weather_api_json_to_strapi_json(weather_json, race_id, lat, lon)
     variables = f"""
       {{
@@ -360,7 +292,7 @@ def update_weather(is_f1_feed: bool, weather_id: str, weather_json: str, race_id
       }}
       """
     logger.info(f"update_weather variables: {variables}")
-    response = requests.post(end_point, json={'query': mutation_update_weather, "variables": variables}, headers=get_headers(is_f1_feed))
+    response = get_graphql_client(is_f1_feed).post({'query': mutation_update_weather, "variables": variables})
     data = response.json()
     logger.debug(f"update_weather response: {data}")
     return response.json()
@@ -370,37 +302,30 @@ def update_weather(is_f1_feed: bool, weather_id: str, weather_json: str, race_id
 # schedule relate code - for moto gp
 #----------------------------------------------------------------------------------------------------------------
 def get_seasons(is_f1_feed: bool) -> str:
-    end_point = get_graphql_endpoint(is_f1_feed)
     logger.info("fetching seasons")
-    response = requests.post(end_point, json={'query': query_get_seasons}, headers=get_headers(is_f1_feed))
+    response = get_graphql_client(is_f1_feed).post({'query': query_get_seasons})
     logger.debug(f"get_seasons response: {response.json()}")
     return response.json()
 
 def get_tracks(is_f1_feed: bool) -> str:
-    end_point = get_graphql_endpoint(is_f1_feed)
     logger.info("fetching tracks")
-    response = requests.post(end_point, json={'query': query_get_tracks}, headers=get_headers(is_f1_feed))
+    response = get_graphql_client(is_f1_feed).post({'query': query_get_tracks})
     # logger.debug(f"get_tracks response: {response.json()}")
     return response.json()
 
-def get_grand_prix_races_for_year(is_f1_feed: bool, year: str):
-    end_point = get_graphql_endpoint(is_f1_feed)
+def get_grand_prix_races_for_year(is_f1_feed: bool, year: str, page_size: int = DEFAULT_PAGE_SIZE):
     variables = {
         "season": year,
     }
     logger.info(f"get_grand_prix_races_for_year variables: {variables}")
 
-    response = requests.post(end_point, json={'query': query_get_grand_prixes_for_year, "variables": variables}, headers=get_headers(is_f1_feed))
-    data = response.json()
-    grand_prixes = data.get("data", {}).get("grandPrixes", {}).get("data", [])
-    races = data.get("data", {}).get("races", {}).get("data", [])
+    grand_prixes = list(iter_rows(is_f1_feed, query_get_grand_prixes_for_year, variables, "grandPrixes", page_size))
+    races = list(iter_rows(is_f1_feed, query_get_races_for_year, variables, "races", page_size))
     logger.info(f"grand_prixes count: {len(grand_prixes)}")
     logger.info(f"races count: {len(races)}")
     return grand_prixes, races
 
 def create_season(is_f1_feed: bool, season_year: str) -> str:
-    # Define GraphQL endpoint
-    end_point = get_graphql_endpoint(is_f1_feed)
     season = {
         "year": season_year,
         "name": f"{season_year} Season"
@@ -413,7 +338,7 @@ def create_season(is_f1_feed: bool, season_year: str) -> str:
       """
 
     logger.info(f"create_season variables: {variables}")
-    response = requests.post(end_point, json={'query': mutation_post_season, "variables": variables}, headers=get_headers(is_f1_feed))
+    response = get_graphql_client(is_f1_feed).post({'query': mutation_post_season, "variables": variables})
     data = response.json()
     logger.debug(f"create_season response: {data}")
     season_id = data['data']['createSeason']['data']['id']
@@ -422,8 +347,6 @@ def create_season(is_f1_feed: bool, season_year: str) -> str:
 
 
 def update_config_for_season(is_f1_feed: bool, driver_standings_json_str: str, team_standings_json_str: str) -> None:
-    end_point = get_graphql_endpoint(is_f1_feed)
-
     # Define new values for feedJson
     variables = f"""
     {{
@@ -436,12 +359,10 @@ def update_config_for_season(is_f1_feed: bool, driver_standings_json_str: str, t
   """
     logger.info(f"update_config_for_season variables: {variables}")
 
-    response = requests.post(end_point, json={"query": mutation_update_config_for_season, "variables": variables}, headers=get_headers(is_f1_feed))
+    response = get_graphql_client(is_f1_feed).post({"query": mutation_update_config_for_season, "variables": variables})
     logger.debug(f"update_config_for_season response: {response.json()}")
 
 def update_config_for_gp(is_f1_feed: bool) -> None:
-    end_point = get_graphql_endpoint(is_f1_feed)
-
     # Define new values for feedJson
     variables = f"""
     {{
@@ -452,12 +373,10 @@ def update_config_for_gp(is_f1_feed: bool) -> None:
   """
     logger.info(f"update_config_for_gp variables: {variables}")
 
-    response = requests.post(end_point, json={"query": mutation_update_config_for_gp, "variables": variables}, headers=get_headers(is_f1_feed))
+    response = get_graphql_client(is_f1_feed).post({"query": mutation_update_config_for_gp, "variables": variables})
     logger.debug(f"update_config_for_gp response: {response.json()}")
 
 def create_grand_prix(is_f1_feed: bool, json_str: str) -> str:
-    # Define GraphQL endpoint
-    end_point = get_graphql_endpoint(is_f1_feed)
     variables = f"""
       {{
         "input": {json_str}
@@ -465,7 +384,7 @@ def create_grand_prix(is_f1_feed: bool, json_str: str) -> str:
       """
 
     logger.info(f"create_grand_prix variables: {variables}")
-    response = requests.post(end_point, json={'query': mutation_post_grand_prix, "variables": variables}, headers=get_headers(is_f1_feed))
+    response = get_graphql_client(is_f1_feed).post({'query': mutation_post_grand_prix, "variables": variables})
     logger.debug(f"create_grand_prix response object: {response}")
     data = response.json()
     logger.debug(f"create_grand_prix response data: {data}")
@@ -474,8 +393,6 @@ def create_grand_prix(is_f1_feed: bool, json_str: str) -> str:
     return gp_id
 
 def create_race(is_f1_feed: bool, json_str: str) -> str:
-    # Define GraphQL endpoint
-    end_point = get_graphql_endpoint(is_f1_feed)
     variables = f"""
       {{
         "input": {json_str}
@@ -483,7 +400,7 @@ def create_race(is_f1_feed: bool, json_str: str) -> str:
       """
 
     logger.info(f"create_race variables: {variables}")
-    response = requests.post(end_point, json={'query': mutation_post_race, "variables": variables}, headers=get_headers(is_f1_feed))
+    response = get_graphql_client(is_f1_feed).post({'query': mutation_post_race, "variables": variables})
     data = response.json()
     logger.debug(f"create_race response: {data}")
     race_id = data['data']['createRace']['data']['id']
@@ -491,14 +408,13 @@ def create_race(is_f1_feed: bool, json_str: str) -> str:
     return race_id
 
 def update_time_in_race(is_f1_feed: bool, start_time: str, race_id: str, site_event_id: str) -> str:
-    end_point = get_graphql_endpoint(is_f1_feed)
     variables = {
         "startTime": start_time,
         "raceId": race_id,
         "siteEventId": site_event_id
     }
     logger.info(f"update_time_in_race variables: {variables}")
-    response = requests.post(end_point, json={'query': mutation_update_race_with_time, "variables": variables}, headers=get_headers(is_f1_feed))
+    response = get_graphql_client(is_f1_feed).post({'query': mutation_update_race_with_time, "variables": variables})
     data = response.json()
     logger.debug(f"update_time_in_race response: {data}")
     return response.json()
@@ -507,7 +423,6 @@ def update_time_in_race(is_f1_feed: bool, start_time: str, race_id: str, site_ev
 # data upload relate code
 #----------------------------------------------------------------------------------------------------------------
 def get_latest_past_race(is_f1_feed: bool) -> str:
-    end_point = get_graphql_endpoint(is_f1_feed)
     current_date_str =  current_datetime_iso()
     # current_date_str = "2026-03-11T06:06:48.000Z"
     logger.info(f" current_date_str: {current_date_str}")
@@ -516,40 +431,37 @@ def get_latest_past_race(is_f1_feed: bool) -> str:
     }
     logger.info(f"get_latest_past_race variables: {variables}")
 
-    response = requests.post(end_point, json={'query': mutation_get_latest_past_race_entry, "variables": variables}, headers=get_headers(is_f1_feed))
+    response = get_graphql_client(is_f1_feed).post({'query': mutation_get_latest_past_race_entry, "variables": variables})
     data = response.json()
     logger.debug(f"get_latest_past_race response: {data}")
     return response.json()
 
 def get_race_results_for_race_event(is_f1_feed: bool, race_id: str) -> str:
-    end_point = get_graphql_endpoint(is_f1_feed)
     variables = {
         "raceId": race_id
     }
     logger.info(f"get_race_results_for_race_event variables: {variables}")
-    response = requests.post(end_point, json={'query': query_race_results_for_race_event, "variables": variables}, headers=get_headers(is_f1_feed))
+    response = get_graphql_client(is_f1_feed).post({'query': query_race_results_for_race_event, "variables": variables})
     data = response.json()
     logger.debug(f"get_race_results_for_race_event response: {data}")
     return data
 
 def get_fastest_laps_for_gp(is_f1_feed: bool, gp_id: str) -> str:
-    end_point = get_graphql_endpoint(is_f1_feed)
     variables = {
         "grandPrixId": gp_id
     }
     logger.info(f"get_fastest_laps_for_gp variables: {variables}")
-    response = requests.post(end_point, json={'query': query_fastest_laps_for_gp, "variables": variables}, headers=get_headers(is_f1_feed))
+    response = get_graphql_client(is_f1_feed).post({'query': query_fastest_laps_for_gp, "variables": variables})
     data = response.json()
     logger.debug(f"get_fastest_laps_for_gp response: {data}")
     return data
 
 def get_season_grid_map(is_f1_feed: bool, season: str):
-    end_point = get_graphql_endpoint(is_f1_feed)
     variables = {
         "season": season
     }
     logger.info(f"get_season_grid variables: {variables}")
-    response = requests.post(end_point, json={'query': query_season_grid, "variables": variables}, headers=get_headers(is_f1_feed))
+    response = get_graphql_client(is_f1_feed).post({'query': query_season_grid, "variables": variables})
     data = response.json()
     # logger.debug(f"get_season_grid response: {data}")
     result = {}
@@ -574,14 +486,12 @@ def get_season_grid_map(is_f1_feed: bool, season: str):
     return result
 
 def create_race_result(is_f1_feed: bool, json_str: str) -> str:
-    # Define GraphQL endpoint
-    end_point = get_graphql_endpoint(is_f1_feed)
     variables = {
         "input": json.loads(json_str)
     }
 
     logger.info(f"create_race_result variables: {variables}")
-    response = requests.post(end_point, json={'query': mutation_post_race_result, "variables": variables}, headers=get_headers(is_f1_feed))
+    response = get_graphql_client(is_f1_feed).post({'query': mutation_post_race_result, "variables": variables})
     data = response.json()
     logger.debug(f"create_race_result response: {data}")
     race_id = data['data']['createRaceResult']['data']['id']
@@ -589,14 +499,12 @@ def create_race_result(is_f1_feed: bool, json_str: str) -> str:
     return race_id
 
 def create_fastest_lap(is_f1_feed: bool, json_str: str) -> str:
-    # Define GraphQL endpoint
-    end_point = get_graphql_endpoint(is_f1_feed)
     variables = {
         "input": json.loads(json_str)
     }
 
     logger.info(f"create_fastest_lap variables: {variables}")
-    response = requests.post(end_point, json={'query': mutation_post_fastest_lap, "variables": variables}, headers=get_headers(is_f1_feed))
+    response = get_graphql_client(is_f1_feed).post({'query': mutation_post_fastest_lap, "variables": variables})
     data = response.json()
     logger.debug(f"create_fastest_lap response: {data}")
     race_id = data['data']['createFastestLap']['data']['id']
@@ -604,66 +512,81 @@ def create_fastest_lap(is_f1_feed: bool, json_str: str) -> str:
     return race_id
 
 def update_race_result(is_f1_feed: bool, json_str: str, row_id: str) -> str:
-    # Define GraphQL endpoint
-    end_point = get_graphql_endpoint(is_f1_feed)
     variables = {
         "input": json.loads(json_str),
         "id": row_id
     }
 
     logger.info(f"update_race_result variables: {variables}")
-    response = requests.post(end_point, json={'query': mutation_update_race_result, "variables": variables}, headers=get_headers(is_f1_feed))
+    response = get_graphql_client(is_f1_feed).post({'query': mutation_update_race_result, "variables": variables})
     data = response.json()
     logger.debug(f"update_race_result response: {data}")
     race_id = data['data']['updateRaceResult']['data']['id']
     logger.info(f"race result ID: {race_id}")
     return race_id
 
+def _ids_from_batch(results: list) -> list:
+    return [(r.get("data") or {}).get("id") if r else None for r in results]
+
+def create_race_results(is_f1_feed: bool, rows: list[dict], batch_size: int = DEFAULT_BATCH_SIZE) -> list:
+    """Create all race result rows with batched aliased mutations. Returns the new ids (None for failed rows)."""
+    logger.info(f"create_race_results: {len(rows)} rows, batch size {batch_size}")
+    results = run_batched_mutation(
+        is_f1_feed, mutation_post_race_result, [{"input": row} for row in rows], batch_size, idempotent=False
+    )
+    ids = _ids_from_batch(results)
+    logger.info(f"race result IDs: {ids}")
+    return ids
+
+def create_fastest_laps(is_f1_feed: bool, rows: list[dict], batch_size: int = DEFAULT_BATCH_SIZE) -> list:
+    """Create all fastest lap rows with batched aliased mutations. Returns the new ids (None for failed rows)."""
+    logger.info(f"create_fastest_laps: {len(rows)} rows, batch size {batch_size}")
+    results = run_batched_mutation(
+        is_f1_feed, mutation_post_fastest_lap, [{"input": row} for row in rows], batch_size, idempotent=False
+    )
+    ids = _ids_from_batch(results)
+    logger.info(f"fastest lap IDs: {ids}")
+    return ids
+
+def update_race_results(is_f1_feed: bool, rows_with_ids: list[tuple[dict, str]], batch_size: int = DEFAULT_BATCH_SIZE) -> list:
+    """Update (row, row_id) pairs with batched aliased mutations. Returns the updated ids (None for failed rows)."""
+    logger.info(f"update_race_results: {len(rows_with_ids)} rows, batch size {batch_size}")
+    variables_list = [{"input": row, "id": row_id} for row, row_id in rows_with_ids]
+    results = run_batched_mutation(is_f1_feed, mutation_update_race_result, variables_list, batch_size)
+    ids = _ids_from_batch(results)
+    logger.info(f"race result IDs: {ids}")
+    return ids
+
 #----------------------------------------------------------------------------------------------------------------
 # stats update relate code
 #----------------------------------------------------------------------------------------------------------------
-def fetch_all_race_results(is_f1_feed: bool, season: str):
-    end_point = get_graphql_endpoint(is_f1_feed)
-    race_results = []
-    chunk_size = 50
-    start = 0
-    while True:
-        variables = {
-            "season": season,
-            "limit": chunk_size,
-            "start": start
-        }
-        logger.debug(f"fetch_all_race_results variables: {variables}")
-        response = requests.post(end_point, json={'query': query_race_results_all, "variables": variables}, headers=get_headers(is_f1_feed))
-        response.raise_for_status()
-        data = response.json()
-
-        races = (
-            data.get("data", {})
-            .get("raceResults", {})
-            .get("data", [])
-        )
-
-        logger.info(f"fetched {len(races)} races")
+def iter_race_results(is_f1_feed: bool, season: str, page_size: int = DEFAULT_PAGE_SIZE):
+    """Stream the stats race results of ``season`` page by page (pages fetched concurrently, rows in id order)."""
+    return iter_rows(is_f1_feed, query_race_results_all, {"season": season}, "raceResults", page_size)
 
-        # 🛑 Stop when no more data
-        if not races:
-            break
+def count_race_results(is_f1_feed: bool, season: str) -> int | None:
+    """Number of stats race results of ``season`` (same filter as iter_race_results), one row fetched."""
+    return count_rows(is_f1_feed, query_race_results_all, {"season": season}, "raceResults")
 
-        # ✅ Add items, not list
-        race_results.extend(races)
+def fetch_all_race_results(is_f1_feed: bool, season: str, page_size: int = DEFAULT_PAGE_SIZE):
+    race_results = list(iter_race_results(is_f1_feed, season, page_size))
+    logger.info(f"fetched {len(race_results)} race results for {season}")
+    return race_results
 
-        start += chunk_size
+def fetch_race_results_for_races(is_f1_feed: bool, race_ids: list, page_size: int = DEFAULT_PAGE_SIZE):
+    """Stats fields of the race results of ``race_ids`` only (same shape as fetch_all_race_results)."""
+    variables = {"raceIds": list(race_ids)}
+    race_results = list(iter_rows(is_f1_feed, query_race_results_for_races, variables, "raceResults", page_size))
+    logger.info(f"fetched {len(race_results)} race results for races {list(race_ids)}")
     return race_results
 
 def fetch_driver_team_standings_for_season(is_f1_feed: bool, season: str) :
-    end_point = get_graphql_endpoint(is_f1_feed)
     variables = {
         "season": season,
     }
     logger.info(f"fetch_driver_team_standings_for_season variables: {variables}")
 
-    response = requests.post(end_point, json={'query': query_driver_and_team_standings, "variables": variables}, headers=get_headers(is_f1_feed))
+    response = get_graphql_client(is_f1_feed).post({'query': query_driver_and_team_standings, "variables": variables})
     response.raise_for_status()
     result = response.json()
 
@@ -686,7 +609,6 @@ def fetch_driver_team_standings_for_season(is_f1_feed: bool, season: str) :
 
 
 def update_driver_standings(is_f1_feed: bool, driver_map, row_id: str) -> str:
-    end_point = get_graphql_endpoint(is_f1_feed)
     driver_map.pop('standings_id', None)  # remove standings_id field if present
     driver_map.pop('driver_season_grid_id', None)
     driver_map.pop('is_primary_grid_id', None)
@@ -697,14 +619,13 @@ def update_driver_standings(is_f1_feed: bool, driver_map, row_id: str) -> str:
       }}
       """
     logger.info(f"update_driver_standings variables: {variables}")
-    response = requests.post(end_point, json={'query': mutation_update_driver_standing, "variables": variables}, headers=get_headers(is_f1_feed))
+    response = get_graphql_client(is_f1_feed).post({'query': mutation_update_driver_standing, "variables": variables})
     data = response.json()
     logger.debug(f"update_driver_standings response: {data}")
     return response.json()
 
 
 def update_team_standings(is_f1_feed: bool, team_map, row_id: str) -> str:
-    end_point = get_graphql_endpoint(is_f1_feed)
     team_map.pop('standings_id', None)  # remove standings_id field if present
     team_map.pop('driver_season_grid_id', None)
     team_map.pop('is_primary_grid_id', None)
@@ -716,11 +637,29 @@ def update_team_standings(is_f1_feed: bool, team_map, row_id: str) -> str:
       """
 
     logger.info(f"update_team_standings variables: {variables}")
-    response = requests.post(end_point, json={'query': mutation_update_team_standing, "variables": variables}, headers=get_headers(is_f1_feed))
+    response = get_graphql_client(is_f1_feed).post({'query': mutation_update_team_standing, "variables": variables})
     data = response.json()
     logger.debug(f"update_team_standings response: {data}")
     return data
 
+def update_driver_standings_batch(is_f1_feed: bool, rows_with_ids: list[tuple[dict, str]], batch_size: int = DEFAULT_BATCH_SIZE) -> list:
+    """Update (driver standing fields, row_id) pairs with batched aliased mutations. Returns the updated ids (None for failed rows)."""
+    logger.info(f"update_driver_standings_batch: {len(rows_with_ids)} rows, batch size {batch_size}")
+    variables_list = [{"driverStandingInput": row, "rowId": row_id} for row, row_id in rows_with_ids]
+    results = run_batched_mutation(is_f1_feed, mutation_update_driver_standing, variables_list, batch_size)
+    ids = _ids_from_batch(results)
+    logger.info(f"driver standing IDs: {ids}")
+    return ids
+
+def update_team_standings_batch(is_f1_feed: bool, rows_with_ids: list[tuple[dict, str]], batch_size: int = DEFAULT_BATCH_SIZE) -> list:
+    """Update (team standing fields, row_id) pairs with batched aliased mutations. Returns the updated ids (None for failed rows)."""
+    logger.info(f"update_team_standings_batch: {len(rows_with_ids)} rows, batch size {batch_size}")
+    variables_list = [{"teamStandingInput": row, "rowId": row_id} for row, row_id in rows_with_ids]
+    results = run_batched_mutation(is_f1_feed, mutation_update_team_standing, variables_list, batch_size)
+    ids = _ids_from_batch(results)
+    logger.info(f"team standing IDs: {ids}")
+    return ids
+
 def update_config_for_stats(is_f1_feed: bool, season_year: str):
     config = get_config(is_f1_feed=is_f1_feed)
 
@@ -746,7 +685,6 @@ def update_config_for_stats(is_f1_feed: bool, season_year: str):
     team_standings_json_str[season_year] = epoch
     driver_standings_json_str[season_year] = epoch
 
-    end_point = get_graphql_endpoint(is_f1_feed)
     variables = f"""
     {{
         "input": {{
@@ -757,8 +695,9 @@ def update_config_for_stats(is_f1_feed: bool, season_year: str):
     """
     logger.info(f"update_config_for_stats variables: {variables}")
 
-    response = requests.post(end_point, json={"query": mutation_update_config_for_stats, "variables": variables}, headers=get_headers(is_f1_feed))
+    response = get_graphql_client(is_f1_feed).post({"query": mutation_update_config_for_stats, "variables": variables})
     logger.debug(f"update_config_for_stats response: {response.json()}")
+    get_season_snapshot_store().invalidate(is_f1_feed, season=season_year, dataset=STANDINGS)
 
 
 def update_config_for_race_result(is_f1_feed: bool, gp_id: str):
@@ -777,7 +716,6 @@ def update_config_for_race_result(is_f1_feed: bool, gp_id: str):
     epoch = get_current_epoch()
     gp_json[gp_id] = epoch
 
-    end_point = get_graphql_endpoint(is_f1_feed)
     variables = f"""
     {{
         "input": {{
@@ -787,19 +725,74 @@ def update_config_for_race_result(is_f1_feed: bool, gp_id: str):
     """
     logger.info(f"update_config_for_race_result variables: {variables}")
 
-    response = requests.post(end_point, json={"query": mutation_update_config_for_race_result, "variables": variables}, headers=get_headers(is_f1_feed))
+    response = get_graphql_client(is_f1_feed).post({"query": mutation_update_config_for_race_result, "variables": variables})
     logger.debug(f"update_config_for_race_result response: {response}")
     # logger.debug(f"update_config_for_race_result response: {response.json()}")
+    # the season of gp_id is not known here, drop the race results of every season of the series
+    get_season_snapshot_store().invalidate(is_f1_feed, dataset=RACE_RESULTS)
+
+
+#----------------------------------------------------------------------------------------------------------------
+# season snapshots (see season_snapshots.py)
+#----------------------------------------------------------------------------------------------------------------
+def _config_json(config: dict, key: str) -> dict:
+    value = config.get(key)
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return {}
+    return value if isinstance(value, dict) else {}
+
+def _max_epoch(values) -> str | None:
+    epochs = [int(v) for v in values if str(v).isdigit()]
+    return str(max(epochs)) if epochs else None
+
+def season_snapshot_epoch(config: dict, season: str, dataset: str) -> str | None:
+    """The config epoch a snapshot of ``dataset`` is valid for."""
+    if dataset == RACE_RESULTS:
+        return _max_epoch(_config_json(config, "raceResultFastestLapForGrandPrixJson").values())
+    if dataset == STANDINGS:
+        return _max_epoch([
+            _config_json(config, "driverStandingsForSeasonJson").get(str(season)),
+            _config_json(config, "teamStandingsForSeasonJson").get(str(season)),
+        ])
+    if dataset == SEASON_GRID:
+        value = config.get("chassisSeasonGrid")
+        return json.dumps(value, sort_keys=True) if value is not None else None
+    raise ValueError(f"unknown season snapshot dataset: {dataset}")
+
+def read_season_dataset(is_f1_feed: bool, season: str, dataset: str, config: dict | None = None, refresh: bool = False):
+    """
+    Read-through access to the season datasets, same values as the fetch functions:
+      race_results -> fetch_all_race_results, standings -> fetch_driver_team_standings_for_season,
+      season_grid -> get_season_grid_map
+    ``config`` saves the get_config request when the caller already has it, ``refresh`` skips the snapshot.
+    """
+    config = config if config is not None else get_config(is_f1_feed=is_f1_feed)
+    epoch = season_snapshot_epoch(config, season, dataset)
+    store = get_season_snapshot_store()
+    if refresh:
+        store.invalidate(is_f1_feed, season=season, dataset=dataset)
+    if dataset == RACE_RESULTS:
+        return store.read_through(is_f1_feed, season, dataset, epoch, lambda: fetch_all_race_results(is_f1_feed, season))
+    if dataset == STANDINGS:
+        driver_standings, team_standings = store.read_through(
+            is_f1_feed, season, dataset, epoch, lambda: list(fetch_driver_team_standings_for_season(is_f1_feed, season))
+        )
+        return driver_standings, team_standings
+    # JSON object keys are strings, the driver numbers are kept as pairs
+    pairs = store.read_through(is_f1_feed, season, dataset, epoch, lambda: list(get_season_grid_map(is_f1_feed, season).items()))
+    return dict((number, grid_id) for number, grid_id in pairs)
 
 
 def fetch_constructor_standings_for_season_moto_gp(is_f1_feed: bool, season: str) :
-    end_point = get_graphql_endpoint(is_f1_feed)
     variables = {
         "season": season,
     }
     logger.info(f"fetch_constructor_standings_for_season_moto_gp variables: {variables}")
 
-    resp = requests.post(end_point, json={'query': query_get_constructor_standing_moto_gp, "variables": variables}, headers=get_headers(is_f1_feed))
+    resp = get_graphql_client(is_f1_feed).post({'query': query_get_constructor_standing_moto_gp, "variables": variables})
     resp.raise_for_status()
     result = resp.json()
     logger.debug(f"fetch_constructor_standings_for_season_moto_gp response: {result}")
@@ -807,7 +800,6 @@ def fetch_constructor_standings_for_season_moto_gp(is_f1_feed: bool, season: str
 
 
 def update_constructor_standings_for_season_moto_gp(is_f1_feed: bool, row_id: str, json_standings) :
-    end_point = get_graphql_endpoint(is_f1_feed)
     variables = f"""
       {{
         "input": {json.dumps(json_standings)},
@@ -815,20 +807,19 @@ def update_constructor_standings_for_season_moto_gp(is_f1_feed: bool, row_id: st
       }}
       """
     logger.info(f"update_constructor_standings_for_season_moto_gp variables: {variables}")
-    response = requests.post(end_point, json={'query': mutation_update_constructor_standing_moto_gp, "variables": variables}, headers=get_headers(is_f1_feed))
+    response = get_graphql_client(is_f1_feed).post({'query': mutation_update_constructor_standing_moto_gp, "variables": variables})
     data = response.json()
     logger.debug(f"update_constructor_standings_for_season_moto_gp response: {data}")
     return response.json()
 
 def create_constructor_standings_for_season_moto_gp(is_f1_feed: bool, json_standings) :
-    end_point = get_graphql_endpoint(is_f1_feed)
     variables = f"""
       {{
         "input": {json.dumps(json_standings)}
       }}
       """
     logger.info(f"create_constructor_standings_for_season_moto_gp variables: {variables}")
-    response = requests.post(end_point, json={'query': mutation_create_constructor_standing_moto_gp, "variables": variables}, headers=get_headers(is_f1_feed))
+    response = get_graphql_client(is_f1_feed).post({'query': mutation_create_constructor_standing_moto_gp, "variables": variables})
     # data = response.json()
     logger.debug(f"create_constructor_standings_for_season_moto_gp response: {response}")
     return response.json()
@@ -0,0 +1,154 @@
+import re
+
+import requests
+from loguru import logger
+
+from cron.strapi_api.graphql_client import get_graphql_client
+
+#----------------------------------------------------------------------------------------------------------------
+# batched (aliased) GraphQL mutations
+#----------------------------------------------------------------------------------------------------------------
+# Strapi runs every top level field of a mutation document independently, so N single-row mutations can be
+# sent as one request by aliasing them:
+#
+#   mutation Batch($input_0: RaceResultInput!, $input_1: RaceResultInput!) {
+#       r0: createRaceResult(data: $input_0) { data { id } }
+#       r1: createRaceResult(data: $input_1) { data { id } }
+#   }
+#
+# A failing alias comes back as null with an error whose path starts with the alias, the others still succeed.
+# Only those aliases are retried. A request that fails as a whole (timeout, dropped connection, 5xx of a proxy) may
+# have been committed anyway: it is retried for idempotent mutations (updates, deletes) only, create mutations
+# leave its rows None (retrying would insert them twice).
+DEFAULT_BATCH_SIZE = 25
+DEFAULT_MAX_RETRIES = 2
+
+_HEADER_RE = re.compile(r"^\s*mutation\s*(\w*)\s*\((?P<vars>[^)]*)\)\s*\{(?P<body>.*)\}\s*$", re.DOTALL)
+_VAR_RE = re.compile(r"\$(\w+)")
+_ALIAS_PREFIX = "r"
+
+
+def _split_mutation(mutation: str) -> tuple[str, str]:
+    """Return (variable definitions, selection body) of a single-field mutation from api_queries.py."""
+    match = _HEADER_RE.match(mutation)
+    if not match:
+        raise ValueError(f"not a single mutation with variables: {mutation}")
+    return match.group("vars").strip(), match.group("body").strip()
+
+
+def build_batch_mutation(mutation: str, count: int) -> str:
+    """
+    Turn a single-row mutation (e.g. ``mutation_post_race_result``) into one document holding ``count``
+    aliased copies. Every variable ``$x`` of copy ``i`` is renamed to ``$x_i`` and the copy is aliased ``r<i>``.
+    """
+    var_defs, body = _split_mutation(mutation)
+    all_defs = []
+    fields = []
+    for i in range(count):
+        all_defs.append(_VAR_RE.sub(lambda m: f"${m.group(1)}_{i}", var_defs))
+        fields.append(f"{_ALIAS_PREFIX}{i}: " + _VAR_RE.sub(lambda m: f"${m.group(1)}_{i}", body))
+    return "mutation Batch(" + ", ".join(all_defs) + ") {\n" + "\n".join(fields) + "\n}"
+
+
+def build_batch_variables(variables_list: list[dict]) -> dict:
+    batch_variables = {}
+    for i, variables in enumerate(variables_list):
+        for key, value in variables.items():
+            batch_variables[f"{key}_{i}"] = value
+    return batch_variables
+
+
+def _failed_aliases(result: dict, count: int) -> set[int]:
+    """Indexes of aliases that came back null or are referenced by an error path."""
+    data = result.get("data") or {}
+    failed = {i for i in range(count) if data.get(f"{_ALIAS_PREFIX}{i}") is None}
+    for error in result.get("errors") or []:
+        path = error.get("path") or []
+        if path and isinstance(path[0], str) and path[0].startswith(_ALIAS_PREFIX):
+            try:
+                failed.add(int(path[0][len(_ALIAS_PREFIX):]))
+            except ValueError:
+                pass
+    return failed
+
+
+def _request_not_sent(error: Exception) -> bool:
+    """Only a connect timeout proves the request never reached the server."""
+    return isinstance(error, requests.exceptions.ConnectTimeout)
+
+
+def failed_rows(results: list) -> list[int]:
+    """Indexes of the rows of a run_batched_mutation result that were not applied (or may not have been)."""
+    return [row for row, result in enumerate(results) if result is None]
+
+
+def require_all_rows(results: list, what: str) -> None:
+    """Raise when a row of ``results`` was not applied, so the caller does not record the upload as complete."""
+    failed = failed_rows(results)
+    if failed:
+        raise ValueError(f"{what}: {len(failed)} of {len(results)} row(s) not uploaded (rows {failed})")
+
+
+def run_batched_mutation(
+        is_f1_feed: bool,
+        mutation: str,
+        variables_list: list[dict],
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        idempotent: bool = True,
+) -> list:
+    """
+    Execute ``mutation`` once per entry of ``variables_list``, ``batch_size`` rows per request.
+
+    Aliases that fail are retried (only those) up to ``max_retries`` times. Pass ``idempotent=False`` for create
+    mutations: the rows of a request that failed after it was sent are then not retried.
+
+    Returns:
+        list aligned with ``variables_list`` holding the mutation field's response (e.g.
+        ``{"data": {"id": "12"}}``) for each row, or None when the row still failed after retries.
+    """
+    results = [None] * len(variables_list)
+    pending = list(range(len(variables_list)))
+    unknown = []
+    client = get_graphql_client(is_f1_feed)
+
+    for attempt in range(max_retries + 1):
+        if not pending:
+            break
+        if attempt > 0:
+            logger.warning(f"retrying {len(pending)} failed mutation(s), attempt {attempt}/{max_retries}")
+
+        still_failed = []
+        for start in range(0, len(pending), batch_size):
+            chunk = pending[start:start + batch_size]
+            query = build_batch_mutation(mutation, len(chunk))
+            variables = build_batch_variables([variables_list[row] for row in chunk])
+            try:
+                result = client.execute(query, variables)
+            except Exception as e:
+                if idempotent or _request_not_sent(e):
+                    logger.error(f"batch mutation request failed for {len(chunk)} row(s): {e}")
+                    still_failed.extend(chunk)
+                else:
+                    logger.error(f"batch mutation request failed for {len(chunk)} row(s), they may have been "
+                                 f"created, not retrying: {e}")
+                    unknown.extend(chunk)
+                continue
+
+            if result.get("errors"):
+                logger.error(f"batch mutation errors: {result['errors']}")
+            failed = _failed_aliases(result, len(chunk))
+            data = result.get("data") or {}
+            for i, row in enumerate(chunk):
+                if i in failed:
+                    still_failed.append(row)
+                else:
+                    results[row] = data[f"{_ALIAS_PREFIX}{i}"]
+            logger.debug(f"batch mutation: {len(chunk) - len(failed)}/{len(chunk)} row(s) succeeded")
+        pending = still_failed
+
+    if pending:
+        logger.error(f"{len(pending)} row(s) failed after {max_retries} retries: {pending}")
+    if unknown:
+        logger.error(f"{len(unknown)} row(s) in an unknown state (request failed after it was sent): {sorted(unknown)}")
+    return results
@@ -0,0 +1,117 @@
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from loguru import logger
+from urllib3.util.retry import Retry
+
+from cron.utils import get_graphql_endpoint, get_graphql_token
+
+#----------------------------------------------------------------------------------------------------------------
+# pooled GraphQL transport
+#----------------------------------------------------------------------------------------------------------------
+# one keep-alive session per endpoint (F1 / MotoGP). Every call in apis.py goes through here so the
+# TCP + TLS handshake is paid once per process instead of once per mutation.
+GRAPHQL_POOL_SIZE = 16
+GRAPHQL_CONNECT_TIMEOUT = 10  # seconds
+GRAPHQL_READ_TIMEOUT = 60  # seconds
+GRAPHQL_MAX_RETRIES = 3  # connection level retries only, mutations are never replayed after being sent
+
+
+class GraphQLClient:
+    """
+    Thin wrapper around a pooled ``requests.Session`` bound to one GraphQL endpoint.
+
+    The session keeps its connections alive between calls and the auth headers are set once,
+    so callers only pass the GraphQL payload.
+    """
+
+    def __init__(
+            self,
+            end_point: str,
+            token: str | None,
+            pool_size: int = GRAPHQL_POOL_SIZE,
+            connect_timeout: float = GRAPHQL_CONNECT_TIMEOUT,
+            read_timeout: float = GRAPHQL_READ_TIMEOUT,
+            max_retries: int = GRAPHQL_MAX_RETRIES,
+    ):
+        self.end_point = end_point
+        self.timeout = (connect_timeout, read_timeout)
+
+        retry = Retry(
+            total=max_retries,
+            connect=max_retries,
+            read=0,
+            status=0,
+            backoff_factor=0.5,
+            allowed_methods=None,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry, pool_block=True)
+
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {token}",
+            "Connection": "keep-alive",
+        })
+
+    def post(self, json: dict, timeout=None) -> requests.Response:
+        """POST a GraphQL payload ({"query": ..., "variables": ...}) and return the raw response."""
+        return self.session.post(self.end_point, json=json, timeout=timeout or self.timeout)
+
+    def execute(self, query: str, variables=None) -> dict:
+        """POST a query/mutation, raise on HTTP errors and return the decoded JSON body."""
+        payload = {"query": query}
+        if variables is not None:
+            payload["variables"] = variables
+        response = self.post(payload)
+        response.raise_for_status()
+        return response.json()
+
+    def close(self) -> None:
+        self.session.close()
+
+
+_clients: dict[bool, GraphQLClient] = {}
+_client_options: dict[bool, dict] = {}
+_clients_lock = threading.Lock()
+
+
+def get_graphql_client(is_f1_feed: bool) -> GraphQLClient:
+    """Return the shared client for the F1 or MotoGP endpoint, creating it on first use."""
+    client = _clients.get(is_f1_feed)
+    if client is not None:
+        return client
+
+    with _clients_lock:
+        client = _clients.get(is_f1_feed)
+        if client is None:
+            options = dict(_client_options.get(is_f1_feed, {}))
+            end_point = options.pop("end_point", None) or get_graphql_endpoint(is_f1_feed)
+            token = options.pop("token", None) or get_graphql_token(is_f1_feed)
+            client = GraphQLClient(end_point, token, **options)
+            _clients[is_f1_feed] = client
+            logger.debug(f"created pooled graphql client for {end_point}")
+    return client
+
+
+def configure_graphql_client(is_f1_feed: bool, **options) -> None:
+    """
+    Override the transport settings (pool_size, connect_timeout, read_timeout, max_retries,
+    end_point, token) for one endpoint. Any existing client is closed and rebuilt lazily.
+    """
+    with _clients_lock:
+        _client_options[is_f1_feed] = dict(options)
+        client = _clients.pop(is_f1_feed, None)
+    if client is not None:
+        client.close()
+
+
+def close_graphql_clients() -> None:
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        client.close()
@@ -0,0 +1,103 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator
+
+from loguru import logger
+
+from cron.strapi_api.graphql_client import get_graphql_client
+
+#----------------------------------------------------------------------------------------------------------------
+# parallel offset pagination for strapi collection queries
+#----------------------------------------------------------------------------------------------------------------
+# the collection fetches used to walk start = 0, 50, 100, ... one request after the other and only stopped on an
+# empty page (one extra round trip every time). The first page now also asks for meta.pagination.total, the
+# remaining offsets are known up front and fetched by a small thread pool, the pages are yielded in offset order
+# as soon as they are in, so callers can stream rows (e.g. into a RaceResultIndex) while the rest is in flight.
+#
+# The query must take $start / $limit, sort on a unique key (e.g. "id:asc", otherwise concurrent offset pages
+# can overlap) and select the total:
+#
+#   raceResults(pagination: {start: $start, limit: $limit}, sort: "id:asc", ...) {
+#       data { ... }
+#       meta { pagination { total } }
+#   }
+#
+# Not for the cleanup scans of clean_rss.py: those delete rows while paging, which shifts every offset, so they
+# keep the id cursor of bulk_delete.iter_ids_by_cursor.
+DEFAULT_PAGE_SIZE = 100  # strapi caps limit at its api.rest.maxLimit (100 by default)
+DEFAULT_PAGE_PARALLELISM = 4
+
+
+def _fetch_page(is_f1_feed: bool, query: str, variables: dict, collection: str, start: int, limit: int) -> tuple[list, int | None]:
+    page_variables = {**variables, "start": start, "limit": limit}
+    result = get_graphql_client(is_f1_feed).execute(query, page_variables)
+    if result.get("errors"):
+        logger.error(f"{collection} page {start}..{start + limit} failed: {result['errors']}")
+        raise ValueError(f"{collection} page at {start} failed: {result['errors']}")
+    node = (result.get("data") or {}).get(collection) or {}
+    total = ((node.get("meta") or {}).get("pagination") or {}).get("total")
+    return node.get("data") or [], total
+
+
+def count_rows(is_f1_feed: bool, query: str, variables: dict, collection: str) -> int | None:
+    """``meta.pagination.total`` of a paginated query (one row requested), None when the response has none."""
+    return _fetch_page(is_f1_feed, query, variables, collection, 0, 1)[1]
+
+
+def iter_pages(
+        is_f1_feed: bool,
+        query: str,
+        variables: dict,
+        collection: str,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        parallelism: int = DEFAULT_PAGE_PARALLELISM,
+) -> Iterator[list]:
+    """
+    Yield the pages of ``collection`` (the top level field of ``query``) in order.
+
+    Without a total in the response (query not selecting meta) the pages are read one by one until a short page.
+    """
+    rows, total = _fetch_page(is_f1_feed, query, variables, collection, 0, page_size)
+    logger.info(f"{collection}: first page {len(rows)} rows, total {total}")
+    if rows:
+        yield rows
+
+    if total is None:
+        start = page_size
+        while len(rows) == page_size:
+            rows, _ = _fetch_page(is_f1_feed, query, variables, collection, start, page_size)
+            if rows:
+                yield rows
+            start += page_size
+        return
+
+    offsets = list(range(page_size, total, page_size))
+    if not offsets:
+        return
+    with ThreadPoolExecutor(max_workers=max(1, min(parallelism, len(offsets)))) as pool:
+        # keep at most `parallelism` pages in flight ahead of the consumer
+        pending = []
+        offsets_iter = iter(offsets)
+        for start in offsets_iter:
+            pending.append(pool.submit(_fetch_page, is_f1_feed, query, variables, collection, start, page_size))
+            if len(pending) >= parallelism:
+                break
+        while pending:
+            rows, _ = pending.pop(0).result()
+            next_start = next(offsets_iter, None)
+            if next_start is not None:
+                pending.append(pool.submit(_fetch_page, is_f1_feed, query, variables, collection, next_start, page_size))
+            if rows:
+                yield rows
+
+
+def iter_rows(
+        is_f1_feed: bool,
+        query: str,
+        variables: dict,
+        collection: str,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        parallelism: int = DEFAULT_PAGE_PARALLELISM,
+) -> Iterator[dict]:
+    """Rows of every page of ``collection``, in offset order (see iter_pages)."""
+    for page in iter_pages(is_f1_feed, query, variables, collection, page_size, parallelism):
+        yield from page
@@ -0,0 +1,195 @@
+import hashlib
+import json
+import multiprocessing
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from loguru import logger
+
+#----------------------------------------------------------------------------------------------------------------
+# recorded GraphQL responses and a local replay server
+#----------------------------------------------------------------------------------------------------------------
+# the benchmarks run the strapi code paths unchanged against a local endpoint (configure_graphql_client):
+#   - queries are answered from a GraphQLRecording, keyed by the query text and its variables (every page of a
+#     paginated query is its own entry, so a replay must use the page size of the recording)
+#   - mutations are never recorded nor forwarded: aliased batches (run_batched_mutation) get one
+#     {"data": {"id": <rowId>}} per alias, any other mutation an empty data object
+#   - record mode: unknown queries are forwarded to the real endpoint and the responses are added to the recording
+#   - an optional fixed latency per request stands in for the network round trip
+# GET /__stats returns the number of requests per operation name.
+STATS_PATH = "/__stats"
+
+_OPERATION_RE = re.compile(r"^\s*(query|mutation)\s*(\w*)")
+_ALIAS_RE = re.compile(r"\b(r\d+)\s*:")
+
+
+def _variables(variables) -> dict:
+    # some callers (update_config_for_*) send the variables as a JSON string
+    if isinstance(variables, str):
+        return json.loads(variables) if variables.strip() else {}
+    return variables or {}
+
+
+def query_key(query: str, variables=None) -> str:
+    normalised = " ".join(query.split())
+    return hashlib.sha1(f"{normalised}\n{json.dumps(_variables(variables), sort_keys=True)}".encode()).hexdigest()
+
+
+def operation_name(query: str) -> str:
+    match = _OPERATION_RE.match(query)
+    return (match.group(2) or match.group(1)) if match else "anonymous"
+
+
+def is_mutation(query: str) -> bool:
+    match = _OPERATION_RE.match(query)
+    return match is not None and match.group(1) == "mutation"
+
+
+def mutation_response(query: str, variables=None) -> dict:
+    """What the stub answers to a mutation: every alias of a batch succeeds with its rowId (or its index)."""
+    variables = _variables(variables)
+    aliases = _ALIAS_RE.findall(query)
+    return {"data": {
+        alias: {"data": {"id": str(variables.get(f"rowId_{alias[1:]}", alias[1:]))}} for alias in aliases
+    }}
+
+
+class GraphQLRecording:
+    """Query responses keyed by query_key, with free form ``meta`` (series, season, page size...)."""
+
+    def __init__(self, responses: dict | None = None, meta: dict | None = None):
+        self.responses = responses or {}
+        self.meta = meta or {}
+
+    def add(self, query: str, variables, response: dict) -> None:
+        self.responses[query_key(query, variables)] = {
+            "operation": operation_name(query),
+            "variables": _variables(variables),
+            "response": response,
+        }
+
+    def lookup(self, query: str, variables=None) -> dict | None:
+        entry = self.responses.get(query_key(query, variables))
+        return entry["response"] if entry else None
+
+    def save(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"meta": self.meta, "responses": self.responses}, f)
+        logger.info(f"graphql recording: {len(self.responses)} responses written to {path}")
+
+    @classmethod
+    def load(cls, path: str) -> "GraphQLRecording":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data.get("responses"), data.get("meta"))
+
+    def __len__(self):
+        return len(self.responses)
+
+
+def _make_handler(recording: GraphQLRecording, latency: float, upstream: str | None, token: str | None):
+    counts = {}
+    lock = threading.Lock()
+
+    class ReplayHandler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _reply(self, body: dict) -> None:
+            raw = json.dumps(body).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(raw)))
+            self.end_headers()
+            self.wfile.write(raw)
+
+        def do_GET(self):
+            if self.path != STATS_PATH:
+                self.send_error(404)
+                return
+            with lock:
+                self._reply(dict(counts))
+
+        def do_POST(self):
+            payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+            query, variables = payload.get("query") or "", payload.get("variables")
+            with lock:
+                counts[operation_name(query)] = counts.get(operation_name(query), 0) + 1
+            if latency:
+                time.sleep(latency)
+
+            if is_mutation(query):
+                self._reply(mutation_response(query, variables))
+                return
+            response = recording.lookup(query, variables)
+            if response is None and upstream:
+                upstream_response = requests.post(
+                    upstream, json=payload, headers={"Authorization": f"Bearer {token}"}, timeout=60
+                )
+                upstream_response.raise_for_status()
+                response = upstream_response.json()
+                with lock:
+                    recording.add(query, variables, response)
+            if response is None:
+                logger.error(f"replay: no recorded response for {operation_name(query)} {_variables(variables)}")
+                response = {"data": None, "errors": [{"message": f"no recorded response for {operation_name(query)}"}]}
+            self._reply(response)
+
+    return ReplayHandler
+
+
+def start_replay_server(recording: GraphQLRecording, latency_ms: float = 0, upstream: str | None = None,
+                        token: str | None = None) -> ThreadingHTTPServer:
+    """Replay (or, with ``upstream``, record) server on a free local port, served by a daemon thread."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _make_handler(recording, latency_ms / 1000, upstream, token))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def server_url(server: ThreadingHTTPServer) -> str:
+    return f"http://127.0.0.1:{server.server_port}/graphql"
+
+
+def _serve_in_process(recording, latency_ms, conn) -> None:
+    server = start_replay_server(recording, latency_ms)
+    conn.send(server.server_port)
+    conn.recv()  # any message (or the parent going away) stops the server
+    server.shutdown()
+
+
+class ReplayServerProcess:
+    """
+    The replay server in a child process, so its JSON encoding does not share the GIL (nor the tracemalloc
+    traces) of the code being measured.
+    """
+
+    def __init__(self, recording: GraphQLRecording, latency_ms: float = 0):
+        self._conn, child_conn = multiprocessing.Pipe()
+        self._process = multiprocessing.Process(
+            target=_serve_in_process, args=(recording, latency_ms, child_conn), daemon=True
+        )
+        self._process.start()
+        self.port = self._conn.recv()
+        self.url = f"http://127.0.0.1:{self.port}/graphql"
+
+    def stats(self) -> dict:
+        """Requests per operation name since the start."""
+        return requests.get(f"http://127.0.0.1:{self.port}{STATS_PATH}", timeout=10).json()
+
+    def stop(self) -> None:
+        try:
+            self._conn.send("stop")
+        except (BrokenPipeError, OSError):
+            pass
+        self._process.join(timeout=10)
+        if self._process.is_alive():
+            self._process.terminate()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,126 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Callable
+
+from loguru import logger
+
+from cron.utils import get_cache_dir
+
+#----------------------------------------------------------------------------------------------------------------
+# local snapshots of the season wide strapi datasets
+#----------------------------------------------------------------------------------------------------------------
+# the stats and data upload jobs download the same season datasets (race results, driver / team standings,
+# season grid map) on every run, megabytes of GraphQL JSON for a value that changes a few times per weekend.
+# They are kept in a sqlite file keyed by (series, season, dataset), zlib compressed JSON, together with the
+# strapi config epoch that covers the dataset and the time the snapshot was taken:
+#   race_results : max epoch of raceResultFastestLapForGrandPrixJson (bumped by update_config_for_race_result)
+#   standings    : driver / team standings epoch of the season (bumped by update_config_for_stats)
+#   season_grid  : chassisSeasonGrid
+# a snapshot is served only while the epoch is unchanged and it is younger than max_age (edits made in the
+# strapi admin do not bump anything). The update_config_* calls of this process also drop the snapshots they
+# cover right away. Kept next to the stats snapshots, so the CI cache of .cache/stats carries it between runs.
+SEASON_SNAPSHOT_DIR = "stats"
+SEASON_SNAPSHOT_MAX_AGE = 24 * 3600  # seconds
+RACE_RESULTS = "race_results"
+STANDINGS = "standings"
+SEASON_GRID = "season_grid"
+SNAPSHOT_DATASETS = (RACE_RESULTS, STANDINGS, SEASON_GRID)
+
+
+def _series(is_f1_feed: bool) -> str:
+    return "f1" if is_f1_feed else "moto_gp"
+
+
+class SeasonSnapshotStore:
+    """Persistent (series, season, dataset) -> JSON value store (sqlite), invalidated by config epoch and age."""
+
+    def __init__(self, path: str | None = None, max_age: float = SEASON_SNAPSHOT_MAX_AGE):
+        self.path = path or os.path.join(get_cache_dir(SEASON_SNAPSHOT_DIR), "season_snapshots.sqlite3")
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS snapshots ("
+            " series TEXT NOT NULL, season TEXT NOT NULL, dataset TEXT NOT NULL, epoch TEXT, payload BLOB NOT NULL,"
+            " taken_at REAL NOT NULL,"
+            " PRIMARY KEY (series, season, dataset))"
+        )
+        self._conn.commit()
+
+    def get(self, is_f1_feed: bool, season: str, dataset: str, epoch: str | None):
+        """The stored value, None when missing, taken at another ``epoch`` or older than max_age."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT epoch, payload, taken_at FROM snapshots WHERE series = ? AND season = ? AND dataset = ?",
+                (_series(is_f1_feed), str(season), dataset),
+            ).fetchone()
+        if row is None:
+            return None
+        stored_epoch, payload, taken_at = row
+        if stored_epoch != epoch or (self.max_age and time.time() - taken_at > self.max_age):
+            return None
+        return json.loads(zlib.decompress(payload))
+
+    def put(self, is_f1_feed: bool, season: str, dataset: str, epoch: str | None, value) -> None:
+        payload = zlib.compress(json.dumps(value, separators=(",", ":")).encode("utf-8"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?, ?, ?, ?)",
+                (_series(is_f1_feed), str(season), dataset, epoch, payload, time.time()),
+            )
+            self._conn.commit()
+
+    def taken_at(self, is_f1_feed: bool, season: str, dataset: str) -> float | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT taken_at FROM snapshots WHERE series = ? AND season = ? AND dataset = ?",
+                (_series(is_f1_feed), str(season), dataset),
+            ).fetchone()
+        return row[0] if row else None
+
+    def invalidate(self, is_f1_feed: bool, season: str | None = None, dataset: str | None = None) -> int:
+        """Drop the snapshots of the series, optionally only one season and / or dataset. Returns the count."""
+        query = "DELETE FROM snapshots WHERE series = ?"
+        params = [_series(is_f1_feed)]
+        if season is not None:
+            query += " AND season = ?"
+            params.append(str(season))
+        if dataset is not None:
+            query += " AND dataset = ?"
+            params.append(dataset)
+        with self._lock:
+            count = self._conn.execute(query, params).rowcount
+            self._conn.commit()
+        return count
+
+    def read_through(self, is_f1_feed: bool, season: str, dataset: str, epoch: str | None, fetch: Callable[[], object]):
+        """The stored value of ``epoch`` or, on a miss, ``fetch()`` (JSON serialisable) stored and returned."""
+        value = self.get(is_f1_feed, season, dataset, epoch)
+        if value is not None:
+            logger.info(f"season snapshot hit: {_series(is_f1_feed)} {season} {dataset} (epoch {epoch})")
+            return value
+        logger.info(f"season snapshot miss: {_series(is_f1_feed)} {season} {dataset} (epoch {epoch}), fetching")
+        value = fetch()
+        self.put(is_f1_feed, season, dataset, epoch, value)
+        return value
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_store: SeasonSnapshotStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_season_snapshot_store() -> SeasonSnapshotStore:
+    """Process wide store under the cache dir."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SeasonSnapshotStore()
+        return _store
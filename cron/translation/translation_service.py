@@ -0,0 +1,240 @@
+import asyncio
+import hashlib
+import inspect
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from loguru import logger
+
+from cron.utils import get_cache_dir
+
+#----------------------------------------------------------------------------------------------------------------
+# translation service used by the RSS ingestion and the push notifications
+#----------------------------------------------------------------------------------------------------------------
+# cache    : sqlite file keyed by (backend, sha256(text), locale) with a TTL and LRU eviction, so the same
+#            title / description is never sent to the backend twice (re-runs, duplicated feeds, notifications)
+# batching : all texts of one item (title + description) are joined into a single backend request per locale
+# locales  : translated concurrently, at most TRANSLATION_CONCURRENCY backend requests in flight
+# backend  : google (default) or stub, selected with PS_TRANSLATION_BACKEND or set_translation_backend()
+TRANSLATION_CONCURRENCY = 4
+TRANSLATION_CACHE_TTL = 30 * 24 * 3600  # seconds
+TRANSLATION_CACHE_MAX_ENTRIES = 50_000
+TRANSLATION_CACHE_DIR = "translations"
+
+# joins the texts of one batch. The marker survives machine translation untouched, the surrounding blank
+# lines keep it from being merged into the sentences around it.
+BATCH_SEPARATOR = "\n\n###\n\n"
+_BATCH_SPLIT_RE = re.compile(r"\s*###\s*")
+
+# strapi locale -> google translate language code
+GOOGLE_LOCALE_MAP = {"zh": "zh-CN"}
+
+
+class TranslationBackend:
+    """Translates one text to ``dest``. Implementations must be safe to call from worker threads."""
+    name = "base"
+
+    def translate(self, text: str, dest: str) -> str:
+        raise NotImplementedError
+
+
+class GoogleTranslateBackend(TranslationBackend):
+    """googletrans-py, one Translator (and its http connection pool) per worker thread."""
+    name = "google"
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def _translator(self):
+        translator = getattr(self._local, "translator", None)
+        if translator is None:
+            from googletrans import Translator
+            translator = Translator()
+            self._local.translator = translator
+        return translator
+
+    def translate(self, text: str, dest: str) -> str:
+        result = self._translator().translate(text, dest=GOOGLE_LOCALE_MAP.get(dest, dest))
+        # some googletrans releases return a coroutine, we always run in a worker thread so it can be driven here
+        if inspect.isawaitable(result):
+            result = asyncio.run(result)
+        if result is None or not result.text:
+            raise ValueError(f"empty translation for locale {dest}")
+        return result.text
+
+
+class StubTranslationBackend(TranslationBackend):
+    """Offline backend for local runs and tests: returns ``[<locale>] <text>``."""
+    name = "stub"
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = 0
+
+    def translate(self, text: str, dest: str) -> str:
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        return "\n\n".join(f"[{dest}] {part}" if part != "###" else part for part in text.split("\n\n"))
+
+
+_BACKENDS = {
+    GoogleTranslateBackend.name: GoogleTranslateBackend,
+    StubTranslationBackend.name: StubTranslationBackend,
+}
+
+
+class TranslationCache:
+    """Persistent content addressed translation cache (sqlite) with TTL and LRU eviction."""
+
+    def __init__(self, path: str | None = None, ttl: int = TRANSLATION_CACHE_TTL,
+                 max_entries: int = TRANSLATION_CACHE_MAX_ENTRIES):
+        self.path = path or os.path.join(get_cache_dir(TRANSLATION_CACHE_DIR), "translations.sqlite3")
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS translations ("
+            " backend TEXT NOT NULL, text_hash TEXT NOT NULL, locale TEXT NOT NULL, translated TEXT NOT NULL,"
+            " created_at REAL NOT NULL, last_used REAL NOT NULL,"
+            " PRIMARY KEY (backend, text_hash, locale))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS translations_last_used ON translations (last_used)")
+        self._conn.commit()
+
+    @staticmethod
+    def text_hash(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get(self, backend: str, text: str, locale: str) -> str | None:
+        key = (backend, self.text_hash(text), locale)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT translated, created_at FROM translations WHERE backend = ? AND text_hash = ? AND locale = ?",
+                key,
+            ).fetchone()
+            if row is None:
+                return None
+            if self.ttl and now - row[1] > self.ttl:
+                self._conn.execute("DELETE FROM translations WHERE backend = ? AND text_hash = ? AND locale = ?", key)
+                self._conn.commit()
+                return None
+            self._conn.execute(
+                "UPDATE translations SET last_used = ? WHERE backend = ? AND text_hash = ? AND locale = ?",
+                (now, *key),
+            )
+            self._conn.commit()
+        return row[0]
+
+    def put(self, backend: str, text: str, locale: str, translated: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?, ?, ?)",
+                (backend, self.text_hash(text), locale, translated, now, now),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        if self.ttl:
+            self._conn.execute("DELETE FROM translations WHERE created_at < ?", (time.time() - self.ttl,))
+        overflow = self._conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0] - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM translations WHERE rowid IN"
+                " (SELECT rowid FROM translations ORDER BY last_used ASC LIMIT ?)",
+                (overflow,),
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class TranslationService:
+    """Cached, batched and locale-concurrent translation of small groups of texts (title + description)."""
+
+    def __init__(self, backend: TranslationBackend | None = None, cache: TranslationCache | None = None,
+                 concurrency: int = TRANSLATION_CONCURRENCY):
+        self.backend = backend or _backend_from_env()
+        self.cache = cache if cache is not None else TranslationCache()
+        self.concurrency = concurrency
+
+    def translate_texts(self, texts: list[str], locale: str) -> list[str]:
+        """Translate ``texts`` to ``locale`` (blocking). Cached texts are not sent, the rest go in one request."""
+        results = [text if not text else self.cache.get(self.backend.name, text, locale) for text in texts]
+        missing = [i for i, translated in enumerate(results) if translated is None]
+        if not missing:
+            return results
+
+        for i, translated in zip(missing, self._translate_batch([texts[i] for i in missing], locale)):
+            results[i] = translated
+            self.cache.put(self.backend.name, texts[i], locale, translated)
+        return results
+
+    def _translate_batch(self, texts: list[str], locale: str) -> list[str]:
+        if len(texts) == 1:
+            return [self.backend.translate(texts[0], locale)]
+        if not any(BATCH_SEPARATOR.strip() in text for text in texts):
+            parts = _BATCH_SPLIT_RE.split(self.backend.translate(BATCH_SEPARATOR.join(texts), locale).strip())
+            if len(parts) == len(texts) and all(parts):
+                return parts
+            logger.debug(f"batched translation for {locale} did not split back into {len(texts)} parts, retrying one by one")
+        return [self.backend.translate(text, locale) for text in texts]
+
+    async def translate_all(self, texts: list[str], locales) -> dict[str, list[str]]:
+        """
+        Translate ``texts`` to every locale concurrently.
+
+        Returns:
+            {locale: translated texts}, locales whose translation failed are left out (and logged)
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def _one(locale: str):
+            async with semaphore:
+                return await asyncio.to_thread(self.translate_texts, texts, locale)
+
+        locales = list(locales)
+        results = await asyncio.gather(*(_one(locale) for locale in locales), return_exceptions=True)
+        translations = {}
+        for locale, result in zip(locales, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Translation failed for locale {locale}: {type(result).__name__}: {result}")
+                continue
+            translations[locale] = result
+        return translations
+
+
+def _backend_from_env() -> TranslationBackend:
+    name = os.getenv("PS_TRANSLATION_BACKEND", GoogleTranslateBackend.name)
+    if name not in _BACKENDS:
+        raise ValueError(f"unknown translation backend '{name}', expected one of {sorted(_BACKENDS)}")
+    return _BACKENDS[name]()
+
+
+_service: TranslationService | None = None
+_service_lock = threading.Lock()
+
+
+def get_translation_service() -> TranslationService:
+    """Process wide service, created on first use."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = TranslationService()
+        return _service
+
+
+def set_translation_backend(backend: TranslationBackend, cache: TranslationCache | None = None) -> TranslationService:
+    """Swap the backend (e.g. a StubTranslationBackend in tests) of the process wide service."""
+    global _service
+    with _service_lock:
+        _service = TranslationService(backend=backend, cache=cache)
+        return _service
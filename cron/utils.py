@@ -2,6 +2,7 @@ import os
 from datetime import datetime, timezone
 from dotenv import load_dotenv
 from dateutil import parser as date_parser
+from loguru import logger
 
 # Load environment variables from .env file - this is for local setup of token
 load_dotenv()
@@ -31,6 +32,18 @@ def get_graphql_token(is_f1_feed):
     else:
         return moto_graphql_token
 
+def get_cache_dir(*parts: str) -> str:
+    """
+    Local cache directory shared by the cron jobs (HTTP validators, translations, snapshots...).
+
+    Defaults to ``<repo>/.cache`` and can be moved with the ``PS_CACHE_DIR`` environment variable.
+    Sub directories given in ``parts`` are created on demand.
+    """
+    base = os.getenv("PS_CACHE_DIR") or os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache")
+    path = os.path.join(base, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
 def get_feed_urls(is_f1_feed):
     if is_f1_feed:
         return f1_feed_urls
@@ -118,12 +131,11 @@ def get_epoch(date_str: str) -> int:
     Returns:
         Integer epoch timestamp (seconds since Unix epoch)
     """
-    print(date_str)
     try:
         dt = parse_datetime_string(date_str)
         return int(dt.timestamp())
     except ValueError as e:
-        print(f"Failed to parse date: {date_str} - {e}")
+        logger.warning(f"Failed to parse date: {date_str} - {e}")
         # Return current epoch as fallback
         return int(datetime.now(timezone.utc).timestamp())
 